@@ -0,0 +1,253 @@
+import os
+import random
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+from DoesThisAutocomplete import Solution, CompactSolution, makeWords
+
+"""
+Title: Local autocomplete query service over a built trie.
+AutocompleteService answers prefix queries from many threads at once: the trie (Solution or CompactSolution)
+is never changed after it's built, so reading it needs no lock, and only the ResultCache in front of it does.
+queryBatch resolves many prefixes in one call, walking each shared part of the prefixes only once.
+To change the words while serving, a writer updates its own Solution and publishes a snapshot() of it.
+
+"""
+
+
+class ResultCache:
+    """
+    Thread-safe LRU cache of key -> results. Entries expire ttlSeconds after they were stored, and the
+    least recently used ones go first once there are more than maxEntries, or more than maxWords words in all.
+    Results are kept as tuples, so whoever gets them can't change what the next hit sees.
+    """
+    def __init__(self, maxEntries=10000, maxWords=None, ttlSeconds=None, clock=time.monotonic):
+        self.maxEntries = maxEntries
+        self.maxWords = maxWords
+        self.ttlSeconds = ttlSeconds
+        self.clock = clock
+        # key -> (time stored, results), least recently used first
+        self.entries = OrderedDict()
+        self.words = 0
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key):
+        """ The cached results of key, or None. """
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if self.ttlSeconds is not None and self.clock() - entry[0] > self.ttlSeconds:
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, results):
+        with self.lock:
+            if key in self.entries:
+                self._remove(key)
+            self.entries[key] = (self.clock(), tuple(results))
+            self.words += len(results)
+            while len(self.entries) > self.maxEntries or (self.maxWords is not None and self.words > self.maxWords
+                                                         and len(self.entries) > 1):
+                self._remove(next(iter(self.entries)))
+                self.evictions += 1
+
+    def _remove(self, key):
+        self.words -= len(self.entries.pop(key)[1])
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.words = 0
+
+    def getHitRate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class AutocompleteService:
+    """
+    Queries over a built Solution or CompactSolution, through a ResultCache.
+    With a limit, a query gives a tuple of the limit best completions as (word, weight) pairs from topK,
+    otherwise of every completion from autocomplete.
+    Results are cached under (generation, prefix), so nothing cached from a solution shows up after the next publish.
+    """
+    def __init__(self, solution, cache=None, limit=10):
+        self.cache = ResultCache() if cache is None else cache
+        self.limit = limit
+        # (generation, solution), swapped as one so a query never mixes a solution with another one's generation
+        self.current = (0, solution)
+
+    def publish(self, solution):
+        """ Serves solution from now on, e.g. a new Solution.snapshot(). Running queries finish on the old one. """
+        self.current = (self.current[0] + 1, solution)
+        self.cache.clear()
+
+    def getSolution(self):
+        return self.current[1]
+
+    def _resolve(self, solution, prefix, node=None):
+        if self.limit is None:
+            return tuple(solution.autocomplete(prefix, node))
+        return tuple(solution.topK(prefix, self.limit, node))
+
+    def query(self, prefix):
+        generation, solution = self.current
+        results = self.cache.get((generation, prefix))
+        if results is None:
+            results = self._resolve(solution, prefix)
+            self.cache.put((generation, prefix), results)
+        return results
+
+    def queryBatch(self, prefixes):
+        """
+        The results of every prefix, in order. The prefixes the cache misses are walked in sorted order,
+        each from the node of the longest one before it that it extends, so shared beginnings are walked once.
+        """
+        generation, solution = self.current
+        found = {}
+        for prefix in set(prefixes):
+            results = self.cache.get((generation, prefix))
+            if results is not None:
+                found[prefix] = results
+        missing = sorted(set(prefixes) - found.keys())
+        # (prefix, its node) for the chain of prefixes the last one extends; '' is the root
+        path = [('', solution.walk(''))]
+        for prefix in missing:
+            while not prefix.startswith(path[-1][0]):
+                path.pop()
+            parent, node = path[-1]
+            if node is not None:
+                node = solution.walk(prefix[len(parent):], node)
+            path.append((prefix, node))
+            results = () if node is None else self._resolve(solution, prefix, node)
+            self.cache.put((generation, prefix), results)
+            found[prefix] = results
+        return [found[prefix] for prefix in prefixes]
+
+
+# ----------------------------------
+# LOAD TEST
+# ----------------------------------
+def makeQueries(words, numberOfQueries, seed=0):
+    # Prefixes of 1 to 6 chars of Zipf-distributed words, so a few queries are very common, like real typing
+    rng = random.Random(seed)
+    ranked = rng.sample(words, min(len(words), 50000))
+    cumulative = []
+    total = 0.0
+    for rank in range(1, len(ranked) + 1):
+        total += 1 / rank
+        cumulative.append(total)
+    picks = rng.choices(ranked, cum_weights=cumulative, k=numberOfQueries)
+    return [word[:rng.randint(1, 6)] for word in picks]
+
+
+def percentile(sortedValues, fraction):
+    return sortedValues[min(len(sortedValues) - 1, int(fraction * len(sortedValues)))]
+
+
+def loadTest(service, queries, threads=8, batchSize=None):
+    """
+    Splits queries over threads that send them as fast as they can, one by one or in batches of batchSize,
+    and prints queries per second, the cache hit rate and the latency percentiles of a call.
+    """
+    latencies = []
+    lock = threading.Lock()
+
+    def client(share):
+        own = []
+        if batchSize is None:
+            for prefix in share:
+                start = time.perf_counter()
+                service.query(prefix)
+                own.append(time.perf_counter() - start)
+        else:
+            for first in range(0, len(share), batchSize):
+                start = time.perf_counter()
+                service.queryBatch(share[first:first + batchSize])
+                own.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(own)
+
+    hits, misses = service.cache.hits, service.cache.misses
+    workers = [threading.Thread(target=client, args=(queries[thread::threads],)) for thread in range(threads)]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    seconds = time.perf_counter() - start
+    latencies.sort()
+    hits, misses = service.cache.hits - hits, service.cache.misses - misses
+    calls = 'batch' if batchSize else 'query'
+    print(f'\t{len(queries)} queries from {threads} thread{"s" if threads != 1 else ""}'
+          f'{f" in batches of {batchSize}" if batchSize else ""}: {len(queries) / seconds:,.0f} QPS, '
+          f'cache hit rate {hits / max(hits + misses, 1):.1%}, per {calls} p50 {percentile(latencies, 0.5) * 1000:.3f} ms, '
+          f'p99 {percentile(latencies, 0.99) * 1000:.3f} ms')
+
+
+def main():
+    words = makeWords(300000)
+    weights = [1 / rank for rank in range(1, len(words) + 1)]
+    solution = CompactSolution()
+    solution.build(words, weights)
+    # Serve from a saved index, as the workers of a real service would
+    path = os.path.join(tempfile.gettempdir(), 'autocomplete_service.dawg')
+    solution.save(path)
+    solution = CompactSolution.load(path)
+    queries = makeQueries(words, 200000)
+
+    print('No cache (1 entry):')
+    loadTest(AutocompleteService(solution, ResultCache(maxEntries=1)), queries[:20000])
+    service = AutocompleteService(solution, ResultCache(maxEntries=20000, ttlSeconds=60))
+    print('LRU cache of 20000 prefixes, 60s TTL:')
+    loadTest(service, queries)
+    loadTest(service, queries, threads=1)
+    service.cache.clear()
+    print('Batches, cold cache:')
+    loadTest(service, queries, batchSize=100)
+
+    same = all(service.queryBatch(queries[:500])[i] == tuple(solution.topK(queries[i], 10)) for i in range(500))
+    print(f'Batched results match topK: {same}')
+    solution.close()
+    os.remove(path)
+
+    # A writer merging new words and publishing a snapshot after each batch, while the readers query
+    writer = Solution()
+    writer.build(words, weights)
+    service = AutocompleteService(writer.snapshot(), ResultCache(maxEntries=20000, ttlSeconds=60))
+    newWords = makeWords(len(words) // 2, seed=1)
+    stop = threading.Event()
+    published = []
+
+    def write():
+        while not stop.is_set() and newWords:
+            batch = [newWords.pop() for _ in range(min(200, len(newWords)))]
+            writer.merge(batch, [random.random() for _ in batch])
+            service.publish(writer.snapshot())
+            published.append(len(batch))
+
+    writerThread = threading.Thread(target=write)
+    print('With a writer publishing a snapshot every 200 new words:')
+    writerThread.start()
+    loadTest(service, queries[:50000])
+    stop.set()
+    writerThread.join()
+    print(f'\t{len(published)} snapshots published, {sum(published)} words added meanwhile')
+
+
+if __name__ == "__main__":
+    # execute only if run as a script
+    main()
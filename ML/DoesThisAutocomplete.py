@@ -1,51 +1,930 @@
+import mmap
+import os
+import random
+import struct
+import sys
+import tempfile
+import time
+import tracemalloc
+from array import array
+from multiprocessing import get_context
+from heapq import heapify, heappush, heappop
+from itertools import count, islice, repeat
+
+"""
+Title: Autocomplete with a trie, and a compact trie for big dictionaries.
+Solution builds a plain trie of Node objects, a dict of children each.
+CompactSolution has the same build/autocomplete API, but stores the trie as a minimized DAWG
+(prefixes and suffixes shared) in a few flat buffers: an edge range per state, and a label and
+target per edge. It's built from sorted words in one pass with the incremental algorithm of
+Daciuk et al., so only the current word's path is ever unminimized.
+Both can stream completions lazily with iterComplete, and rank them by weight with topK, which keeps
+the best weight below every node so it only opens the nodes that can still hold the next best word.
+CompactSolution.save writes the buffers to an index file, and CompactSolution.load memory-maps one read-only,
+so worker processes start in milliseconds and share a single copy of the index through the page cache.
+Solution can also change in place, with insert, delete and merge. Its snapshot() is copy-on-write: writes after
+it copy the nodes they touch, so readers of the snapshot keep seeing the words as they were.
+Both forgive typos with iterFuzzy and fuzzyTopK, which walk the trie along with a LevenshteinAutomaton of the
+prefix, leave the subtrees that can't come within the edit distance, and rank by fewest edits then best weight.
+
+"""
+
+
+# Index file: this header, then the buffers of CompactSolution, each starting on a multiple of 8 bytes:
+# weights, maxWeights (float64 per state), first (uint32 per state + 1), targets (uint32 per edge),
+# labels (latin-1, or UTF-32 if any char needs it), isWord (a byte per state). Numbers are in byteOrder.
+INDEX_MAGIC = b'DAWG'
+INDEX_VERSION = 1
+INDEX_HEADER = struct.Struct('<4sBBBxIII')
+BYTE_ORDERS = ('little', 'big')
+
+
+def _padding(size):
+    return -size % 8
+
+
+# Every Solution and snapshot gets its own version, so a node always belongs to exactly one of them.
+_versions = count(1)
+
+
+class LevenshteinAutomaton:
+    """
+    Edit distance to prefix, one char at a time, as a DFA built lazily. A state is a row of the DP:
+    row[j] is the fewest edits that turn prefix[:j] into the chars read so far, capped at maxDistance + 1,
+    as rows that only differ beyond maxDistance lead to the same matches. The row a state goes to on a char
+    is worked out the first time, and looked up after that, so a trie walk mostly pays for a dict lookup per edge.
+    """
+    def __init__(self, prefix, maxDistance):
+        self.prefix = prefix
+        self.limit = maxDistance + 1
+        self.ids = {}
+        self.rows = []
+        # Per state: the distance of the whole prefix, the least distance in the row (no state below does better),
+        # and char -> state for the chars seen so far
+        self.distances = []
+        self.closest = []
+        self.transitions = []
+        self._add(tuple(min(j, self.limit) for j in range(len(prefix) + 1)))
+
+    def _add(self, row):
+        state = self.ids[row] = len(self.rows)
+        self.rows.append(row)
+        self.distances.append(row[-1])
+        self.closest.append(min(row))
+        self.transitions.append({})
+        return state
+
+    def step(self, state, char):
+        """ The state after char. The start state is 0. """
+        row = self.rows[state]
+        limit = self.limit
+        left = min(row[0] + 1, limit)
+        new = [left]
+        for j, expected in enumerate(self.prefix):
+            # Keep or replace the char, or skip a char of the chars read or of prefix
+            cost = row[j] if expected == char else row[j] + 1
+            if row[j + 1] + 1 < cost:
+                cost = row[j + 1] + 1
+            if left + 1 < cost:
+                cost = left + 1
+            left = cost if cost < limit else limit
+            new.append(left)
+        new = tuple(new)
+        nextState = self.ids.get(new)
+        if nextState is None:
+            nextState = self._add(new)
+        self.transitions[state][char] = nextState
+        return nextState
+
+
 class Node:
-    def __init__(self, children, isWord):
+    def __init__(self, children, isWord, weight=0, version=0):
         self.children = children
         self.isWord = isWord
+        # Weight of the word ending here, and the best weight of any word at or below this node
+        self.weight = weight
+        self.maxWeight = float('-inf')
+        # The Solution that may change this node in place; any other one copies it first
+        self.version = version
+
+    def updateMaxWeight(self):
+        # Once the children are up to date
+        weights = [child.maxWeight for child in self.children.values()]
+        if self.isWord:
+            weights.append(self.weight)
+        self.maxWeight = max(weights, default=float('-inf'))
+
+
+class SlotNode:
+    # Node without a __dict__, for the build phase of CompactSolution.
+    __slots__ = ('children', 'isWord', 'weight', 'maxWeight')
+
+    def __init__(self, children, isWord, weight=0):
+        self.children = children
+        self.isWord = isWord
+        self.weight = weight
+        self.maxWeight = float('-inf')
+
+    def updateMaxWeight(self):
+        # Once the children are final
+        weights = [child.maxWeight for child in self.children.values()]
+        if self.isWord:
+            weights.append(self.weight)
+        self.maxWeight = max(weights)
+
+    def signature(self):
+        # Two nodes with the same signature have the same words and weights below them, once their children are minimized.
+        return self.isWord, self.weight, tuple((char, id(child)) for char, child in self.children.items())
 
 
 class Solution:
     def __init__(self):
         self.trie = None
+        self.version = next(_versions)
 
-    def build(self, words):
+    def build(self, words, weights=None):
+        # weights: one per word, higher ranks first in topK. A word listed twice keeps its best weight.
+        if weights is None:
+            weights = repeat(0)
         # build tree
-        self.trie = Node({}, False)
-        for word in words:
+        self.trie = Node({}, False, version=self.version)
+        for word, weight in zip(words, weights):
             current = self.trie
+            current.maxWeight = max(current.maxWeight, weight)
             for char in word:
                 if char not in current.children:
-                    current.children[char] = Node({}, False)
+                    current.children[char] = Node({}, False, version=self.version)
                 current = current.children[char]
+                current.maxWeight = max(current.maxWeight, weight)
+            current.weight = max(current.weight, weight) if current.isWord else weight
             current.isWord = True
 
-    def autocomplete(self, prefix):
-        current = self.trie
-        word = prefix
+    # ---- Updates ----
+    def snapshot(self):
+        """
+        A read-only Solution with the words as they are now. Later writes to this Solution copy the nodes
+        they change instead of changing them, so the snapshot can be queried from other threads meanwhile.
+        """
+        snapshot = Solution()
+        snapshot.trie = self.trie
+        self.version = next(_versions)
+        return snapshot
+
+    def _own(self, node):
+        # node itself if only this Solution uses it, otherwise a copy that this Solution can change
+        if node.version == self.version:
+            return node
+        copy = Node(dict(node.children), node.isWord, node.weight, self.version)
+        copy.maxWeight = node.maxWeight
+        return copy
+
+    def _ownPath(self, word):
+        # The nodes from the root to word, made changeable and created where missing
+        if self.trie is None:
+            self.trie = Node({}, False, version=self.version)
+        current = self.trie = self._own(self.trie)
+        path = [current]
         for char in word:
+            child = current.children.get(char)
+            child = Node({}, False, version=self.version) if child is None else self._own(child)
+            current.children[char] = child
+            current = child
+            path.append(current)
+        return path
+
+    def insert(self, word, weight=0):
+        """ Adds word, or sets its weight if it's there already. """
+        path = self._ownPath(word)
+        path[-1].isWord = True
+        path[-1].weight = weight
+        for node in reversed(path):
+            node.updateMaxWeight()
+
+    def delete(self, word):
+        """ Removes word and the nodes that lead to no other word. Returns False if it wasn't there. """
+        node = self.walk(word) if self.trie is not None else None
+        if node is None or not node.isWord:
+            return False
+        path = self._ownPath(word)
+        path[-1].isWord = False
+        path[-1].weight = 0
+        # Prune from the end of the word up, as long as a node has nothing left below it
+        depth = len(word)
+        while depth > 0 and not path[depth].isWord and not path[depth].children:
+            del path[depth - 1].children[word[depth - 1]]
+            depth -= 1
+        for node in reversed(path[:depth + 1]):
+            node.updateMaxWeight()
+        return True
+
+    def merge(self, words, weights=None, deletions=()):
+        """
+        Inserts (or re-weights) many words, then deletes the deletions. A word listed twice keeps its best weight.
+        Words are added in sorted order along one path, so each node is walked, copied and re-weighed once.
+        """
+        if weights is None:
+            weights = repeat(0)
+        bestWeights = {}
+        for word, weight in zip(words, weights):
+            bestWeights[word] = max(bestWeights.get(word, weight), weight)
+        if self.trie is None:
+            self.trie = Node({}, False, version=self.version)
+        path = [self._own(self.trie)]
+        self.trie = path[0]
+        previous = ''
+        for word in sorted(bestWeights):
+            common = 0
+            while common < len(previous) and common < len(word) and previous[common] == word[common]:
+                common += 1
+            # The nodes past the common prefix are done with
+            while len(path) > common + 1:
+                path.pop().updateMaxWeight()
+            current = path[-1]
+            for char in word[common:]:
+                child = current.children.get(char)
+                child = Node({}, False, version=self.version) if child is None else self._own(child)
+                current.children[char] = child
+                current = child
+                path.append(current)
+            current.isWord = True
+            current.weight = bestWeights[word]
+            previous = word
+        while path:
+            path.pop().updateMaxWeight()
+        for word in deletions:
+            self.delete(word)
+
+    def walk(self, prefix, start=None):
+        """ Node that prefix leads to from start (the root by default), or None if no word goes that way. """
+        current = self.trie if start is None else start
+        for char in prefix:
             if char not in current.children:
-                return []
+                return None
             current = current.children[char]
-        return self._findWordsFromNode(current, word)
-        return []
+        return current
+
+    # The queries below take the node of the prefix too, if the caller walked there already.
+    def autocomplete(self, prefix, node=None):
+        if node is None:
+            node = self.walk(prefix)
+        if node is None:
+            return []
+        return self._findWordsFromNode(node, prefix)
 
     def _findWordsFromNode(self, node, prefix):
+        # All of them at once into one list, which is quicker than draining iterComplete
         words = []
-        if node.isWord:
-            words += [prefix]
-        for char in node.children:
-            words += self._findWordsFromNode(node.children[char], prefix + char)
+        addWord = words.append
+
+        def visit(node, word):
+            if node.isWord:
+                addWord(word)
+            for char, child in node.children.items():
+                visit(child, word + char)
+
+        visit(node, prefix)
         return words
 
+    def iterComplete(self, prefix, node=None):
+        """ Yields the completions of prefix one at a time, in the order the words were added. """
+        if node is None:
+            node = self.walk(prefix)
+        if node is None:
+            return
+        stack = [(node, prefix)]
+        while stack:
+            node, word = stack.pop()
+            if node.isWord:
+                yield word
+            for char, child in reversed(list(node.children.items())):
+                stack.append((child, word + char))
+
+    def iterRanked(self, prefix, node=None):
+        """
+        Yields (word, weight) for the completions of prefix, best weight first, ties in alphabetical order.
+        Best first search on maxWeight: only the nodes that could still hold the next best word get opened.
+        """
+        if node is None:
+            node = self.walk(prefix)
+        if node is None:
+            return
+        # (-weight, word, 0 for a word or 1 for a node to open, node)
+        heap = [(-node.maxWeight, prefix, 1, node)]
+        while heap:
+            negativeWeight, word, isNode, node = heappop(heap)
+            if not isNode:
+                yield word, -negativeWeight
+                continue
+            if node.isWord:
+                heappush(heap, (-node.weight, word, 0, None))
+            for char, child in node.children.items():
+                heappush(heap, (-child.maxWeight, word + char, 1, child))
+
+    def topK(self, prefix, k, node=None):
+        return list(islice(self.iterRanked(prefix, node), k))
+
+    # ---- Typo-tolerant queries ----
+    def _fuzzyMatches(self, prefix, maxDistance):
+        """
+        (distance, node, path) for the nodes whose path is at most maxDistance edits away from prefix.
+        Walks the trie along with a LevenshteinAutomaton, and leaves a subtree as soon as nothing below it
+        can be within maxDistance, or closer than a match already above it.
+        """
+        automaton = LevenshteinAutomaton(prefix, maxDistance)
+        transitions, distances, closest, step = (automaton.transitions, automaton.distances, automaton.closest,
+                                                 automaton.step)
+        best = min(distances[0], maxDistance + 1)
+        matches = [(best, self.trie, '')] if best <= maxDistance else []
+        stack = [(self.trie, '', 0, best)]
+        while stack:
+            node, path, state, best = stack.pop()
+            moves = transitions[state]
+            for char, child in node.children.items():
+                nextState = moves.get(char)
+                if nextState is None:
+                    nextState = step(state, char)
+                if closest[nextState] >= best:
+                    continue
+                childBest = best
+                if distances[nextState] < best:
+                    childBest = distances[nextState]
+                    matches.append((childBest, child, path + char))
+                if closest[nextState] < childBest:
+                    stack.append((child, path + char, nextState, childBest))
+        return matches
+
+    def iterFuzzy(self, prefix, maxDistance=1):
+        """
+        Yields (word, weight, distance) for the words that complete a string at most maxDistance edits
+        away from prefix, fewest edits first, then best weight first, ties in alphabetical order.
+        """
+        if self.trie is None:
+            return
+        # (distance, -weight, word, 0 for a word or 1 for a node to open, node)
+        heap = [(distance, -node.maxWeight, path, 1, node)
+                for distance, node, path in self._fuzzyMatches(prefix, maxDistance)]
+        heapify(heap)
+        # A word below two matches comes up again for the further one
+        seen = set()
+        while heap:
+            distance, negativeWeight, word, isNode, node = heappop(heap)
+            if not isNode:
+                if word not in seen:
+                    seen.add(word)
+                    yield word, -negativeWeight, distance
+                continue
+            if node.isWord:
+                heappush(heap, (distance, -node.weight, word, 0, None))
+            for char, child in node.children.items():
+                heappush(heap, (distance, -child.maxWeight, word + char, 1, child))
+
+    def fuzzyTopK(self, prefix, k, maxDistance=1):
+        return list(islice(self.iterFuzzy(prefix, maxDistance), k))
+
+
+class CompactSolution:
+    """
+    State 0 is the root. The edges of state s are first[s] up to first[s + 1], sorted by label,
+    with labels holding the char of each edge (a str, so one byte per char for plain ASCII)
+    and targets the state it leads to. States without edges (always words) are numbered last,
+    from firstLeaf on. weights holds the weight of each word state and maxWeights the best
+    weight at or below each state.
+    Words come back in sorted order, rather than the insertion order of Solution.
+    """
+    def __init__(self):
+        self.first = array('I', [0, 0])
+        self.labels = ''
+        self.targets = array('I')
+        self.isWord = bytearray(1)
+        self.weights = array('d', [0])
+        self.maxWeights = array('d', [float('-inf')])
+        self.firstLeaf = 1
+        # Set by load: the mapped index file, and the views into it, released by close
+        self._mmap = None
+        self._views = []
+
+    def build(self, words, weights=None):
+        # weights: one per word, higher ranks first in topK. A word listed twice keeps its best weight.
+        # Words only share a suffix state if the words below it have the same weights too.
+        if weights is None:
+            bestWeights = dict.fromkeys(words, 0)
+        else:
+            bestWeights = {}
+            for word, weight in zip(words, weights):
+                bestWeights[word] = max(bestWeights.get(word, weight), weight)
+        root = SlotNode({}, False)
+        register = {}
+        # (parent, char, child) along the path of the last word, not minimized yet
+        unchecked = []
+
+        def minimize(downTo):
+            while len(unchecked) > downTo:
+                parent, char, child = unchecked.pop()
+                child.updateMaxWeight()
+                key = child.signature()
+                if key in register:
+                    parent.children[char] = register[key]
+                else:
+                    register[key] = child
+
+        previous = ''
+        for word in sorted(bestWeights):
+            common = 0
+            while common < len(previous) and common < len(word) and previous[common] == word[common]:
+                common += 1
+            minimize(common)
+            current = unchecked[-1][2] if unchecked else root
+            for char in word[common:]:
+                child = SlotNode({}, False)
+                current.children[char] = child
+                unchecked.append((current, char, child))
+                current = child
+            current.isWord = True
+            current.weight = bestWeights[word]
+            previous = word
+        minimize(0)
+        if root.children or root.isWord:
+            root.updateMaxWeight()
+        self._freeze(root)
+
+    def _freeze(self, root):
+        # Number the distinct nodes breadth first, leaves after all the others, then lay out their edges in that order
+        seen = {id(root)}
+        nodes = [root]
+        leaves = []
+        for node in nodes:
+            for child in node.children.values():
+                if id(child) not in seen:
+                    seen.add(id(child))
+                    (nodes if child.children else leaves).append(child)
+        self.firstLeaf = len(nodes)
+        nodes.extend(leaves)
+        states = {id(node): state for state, node in enumerate(nodes)}
+        self.first = array('I', [0])
+        labels = []
+        self.targets = array('I')
+        self.isWord = bytearray(len(nodes))
+        self.weights = array('d', (node.weight for node in nodes))
+        self.maxWeights = array('d', (node.maxWeight for node in nodes))
+        for state, node in enumerate(nodes):
+            self.isWord[state] = node.isWord
+            for char in sorted(node.children):
+                labels.append(char)
+                self.targets.append(states[id(node.children[char])])
+            self.first.append(len(labels))
+        self.labels = ''.join(labels)
+
+    def walk(self, prefix, start=0):
+        """ State that prefix leads to from start (the root by default), or None if no word goes that way. """
+        first, labels, targets = self.first, self.labels, self.targets
+        state = start
+        for char in prefix:
+            # Edges of a state are few, so a scan in C beats a bisect in Python
+            edge = labels.find(char, first[state], first[state + 1])
+            if edge < 0:
+                return None
+            state = targets[edge]
+        return state
+
+    # The queries below take the state of the prefix too, if the caller walked there already.
+    def autocomplete(self, prefix, state=None):
+        if state is None:
+            state = self.walk(prefix)
+        if state is None:
+            return []
+        return self._findWordsFromState(state, prefix)
+
+    def _findWordsFromState(self, state, prefix):
+        # All of them at once, which is quicker than draining iterComplete
+        first, labels, targets, isWord, firstLeaf = self.first, self.labels, self.targets, self.isWord, self.firstLeaf
+        words = []
+        addWord = words.append
+
+        def visit(state, word):
+            if isWord[state]:
+                addWord(word)
+            for edge in range(first[state], first[state + 1]):
+                target = targets[edge]
+                if target >= firstLeaf:
+                    addWord(word + labels[edge])
+                else:
+                    visit(target, word + labels[edge])
+
+        visit(state, prefix)
+        return words
+
+    def iterComplete(self, prefix, state=None):
+        """ Yields the completions of prefix one at a time, in sorted order. """
+        if state is None:
+            state = self.walk(prefix)
+        if state is None:
+            return
+        first, labels, targets, isWord = self.first, self.labels, self.targets, self.isWord
+        stack = [(state, prefix)]
+        while stack:
+            state, word = stack.pop()
+            if isWord[state]:
+                yield word
+            for edge in range(first[state + 1] - 1, first[state] - 1, -1):
+                stack.append((targets[edge], word + labels[edge]))
+
+    def iterRanked(self, prefix, state=None):
+        """ Yields (word, weight) for the completions of prefix, best weight first, ties in alphabetical order. """
+        if state is None:
+            state = self.walk(prefix)
+        if state is None:
+            return
+        first, labels, targets, isWord = self.first, self.labels, self.targets, self.isWord
+        weights, maxWeights = self.weights, self.maxWeights
+        # (-weight, word, 0 for a word or 1 for a state to open, state)
+        heap = [(-maxWeights[state], prefix, 1, state)]
+        while heap:
+            negativeWeight, word, isState, state = heappop(heap)
+            if not isState:
+                yield word, -negativeWeight
+                continue
+            if isWord[state]:
+                heappush(heap, (-weights[state], word, 0, state))
+            for edge in range(first[state], first[state + 1]):
+                target = targets[edge]
+                heappush(heap, (-maxWeights[target], word + labels[edge], 1, target))
+
+    def topK(self, prefix, k, state=None):
+        return list(islice(self.iterRanked(prefix, state), k))
+
+    # ---- Typo-tolerant queries ----
+    def _fuzzyMatches(self, prefix, maxDistance):
+        """ (distance, state, path) for the paths at most maxDistance edits away from prefix, as in Solution. """
+        first, labels, targets = self.first, self.labels, self.targets
+        automaton = LevenshteinAutomaton(prefix, maxDistance)
+        transitions, distances, closest, step = (automaton.transitions, automaton.distances, automaton.closest,
+                                                 automaton.step)
+        best = min(distances[0], maxDistance + 1)
+        matches = [(best, 0, '')] if best <= maxDistance else []
+        stack = [(0, '', 0, best)]
+        while stack:
+            state, path, automatonState, best = stack.pop()
+            moves = transitions[automatonState]
+            for edge in range(first[state], first[state + 1]):
+                char = labels[edge]
+                nextState = moves.get(char)
+                if nextState is None:
+                    nextState = step(automatonState, char)
+                if closest[nextState] >= best:
+                    continue
+                childBest = best
+                if distances[nextState] < best:
+                    childBest = distances[nextState]
+                    matches.append((childBest, targets[edge], path + char))
+                if closest[nextState] < childBest:
+                    stack.append((targets[edge], path + char, nextState, childBest))
+        return matches
+
+    def iterFuzzy(self, prefix, maxDistance=1):
+        """
+        Yields (word, weight, distance) for the words that complete a string at most maxDistance edits
+        away from prefix, fewest edits first, then best weight first, ties in alphabetical order.
+        """
+        first, labels, targets, isWord = self.first, self.labels, self.targets, self.isWord
+        weights, maxWeights = self.weights, self.maxWeights
+        # (distance, -weight, word, 0 for a word or 1 for a state to open, state)
+        heap = [(distance, -maxWeights[state], path, 1, state)
+                for distance, state, path in self._fuzzyMatches(prefix, maxDistance)]
+        heapify(heap)
+        # A word below two matches comes up again for the further one
+        seen = set()
+        while heap:
+            distance, negativeWeight, word, isState, state = heappop(heap)
+            if not isState:
+                if word not in seen:
+                    seen.add(word)
+                    yield word, -negativeWeight, distance
+                continue
+            if isWord[state]:
+                heappush(heap, (distance, -weights[state], word, 0, state))
+            for edge in range(first[state], first[state + 1]):
+                target = targets[edge]
+                heappush(heap, (distance, -maxWeights[target], word + labels[edge], 1, target))
+
+    def fuzzyTopK(self, prefix, k, maxDistance=1):
+        return list(islice(self.iterFuzzy(prefix, maxDistance), k))
+
+    def save(self, path):
+        """ Writes the index to path, for load. """
+        labelWidth = 1 if all(ord(char) < 256 for char in set(self.labels)) else 4
+        labels = self.labels.encode('latin-1' if labelWidth == 1 else 'utf-32-le')
+        header = INDEX_HEADER.pack(INDEX_MAGIC, INDEX_VERSION, BYTE_ORDERS.index(sys.byteorder), labelWidth,
+                                   self.getStateCount(), self.getEdgeCount(), self.firstLeaf)
+        with open(path, 'wb') as index:
+            for buffer in (header, self.weights, self.maxWeights, self.first, self.targets, labels, self.isWord):
+                data = memoryview(buffer).cast('B')
+                index.write(data)
+                index.write(bytes(_padding(len(data))))
+
+    @classmethod
+    def load(cls, path):
+        """
+        Memory-maps an index written by save, read-only. Every buffer but labels stays in the file's pages,
+        shared by all processes that load it; labels is decoded into a str, a byte per edge for plain ASCII.
+        """
+        with open(path, 'rb') as index:
+            size = os.fstat(index.fileno()).st_size
+            if size < INDEX_HEADER.size:
+                raise ValueError(f'{path} is not a version {INDEX_VERSION} autocomplete index: only {size} bytes')
+            mapped = mmap.mmap(index.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, byteOrder, labelWidth, states, edges, firstLeaf = INDEX_HEADER.unpack_from(mapped)
+        if (magic != INDEX_MAGIC or version != INDEX_VERSION or byteOrder >= len(BYTE_ORDERS)
+                or labelWidth not in (1, 4)):
+            mapped.close()
+            raise ValueError(f'{path} is not a version {INDEX_VERSION} autocomplete index')
+        # Every section has to be in the file before any of them is looked at
+        sizes = (8 * states, 8 * states, 4 * (states + 1), 4 * edges, labelWidth * edges, states)
+        needed = sum(sectionSize + _padding(sectionSize) for sectionSize in (INDEX_HEADER.size,) + sizes[:-1])
+        needed += sizes[-1]
+        if needed > size:
+            mapped.close()
+            raise ValueError(f'{path} is truncated: {states} states and {edges} edges take {needed} bytes, '
+                             f'the file has {size}')
+        solution = cls()
+        solution._mmap = mapped
+        view = memoryview(mapped)
+        solution._views.append(view)
+        offset = INDEX_HEADER.size + _padding(INDEX_HEADER.size)
+
+        def section(size, fmt):
+            nonlocal offset
+            data = view[offset:offset + size]
+            offset += size + _padding(size)
+            if fmt == 'B':
+                solution._views.append(data)
+                return data
+            if BYTE_ORDERS[byteOrder] != sys.byteorder:
+                # Written on the other kind of machine: copy and swap, nothing to share then
+                numbers = array(fmt, data)
+                numbers.byteswap()
+                return numbers
+            numbers = data.cast(fmt)
+            solution._views += [data, numbers]
+            return numbers
+
+        solution.weights = section(8 * states, 'd')
+        solution.maxWeights = section(8 * states, 'd')
+        solution.first = section(4 * (states + 1), 'I')
+        solution.targets = section(4 * edges, 'I')
+        solution.labels = str(section(labelWidth * edges, 'B'), 'latin-1' if labelWidth == 1 else 'utf-32-le')
+        solution.isWord = section(states, 'B')
+        solution.firstLeaf = firstLeaf
+        return solution
+
+    def close(self):
+        """ Unmaps a loaded index; the solution can't be queried after. """
+        for view in reversed(self._views):
+            view.release()
+        self._views = []
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+
+    def getStateCount(self):
+        return len(self.isWord)
+
+    def getEdgeCount(self):
+        return len(self.labels)
+
+
+def makeWords(numberOfWords, seed=0):
+    # Made-up words from syllables and common endings, so they share prefixes and suffixes like a real dictionary.
+    rng = random.Random(seed)
+    syllables = ['ba', 'con', 'de', 'do', 'fa', 'for', 'ga', 'in', 'ka', 'lo', 'ma', 'mis', 'ne', 'or', 'pa', 'pre',
+                 'ra', 're', 'sa', 'sto', 'ta', 'tri', 'un', 've', 'wa', 'zo']
+    endings = ['', '', 's', 'ed', 'er', 'ing', 'ly', 'ness', 'tion', 'able']
+    words = set()
+    while len(words) < numberOfWords:
+        stem = ''.join(rng.choice(syllables) for _ in range(rng.randint(1, 4)))
+        words.add(stem + rng.choice(endings))
+    return list(words)
+
+
+def measure(solutionClass, words, prefixes):
+    # How long building and the lookups take, then the memory a build keeps (traced apart, as tracing is slow)
+    solution = solutionClass()
+    start = time.perf_counter()
+    solution.build(words)
+    buildSeconds = time.perf_counter() - start
+    start = time.perf_counter()
+    completions = sum(len(solution.autocomplete(prefix)) for prefix in prefixes)
+    lookupSeconds = time.perf_counter() - start
+    del solution
+    tracemalloc.start()
+    solution = solutionClass()
+    solution.build(words)
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return size, buildSeconds, lookupSeconds, completions
+
+
+def memoryKiB():
+    # Resident memory of this process, and how much of it is private (anon) or mapped from files (shared)
+    try:
+        with open('/proc/self/status') as status:
+            fields = dict(line.split(':', 1) for line in status)
+    except OSError:
+        return None
+    return tuple(int(fields[name].split()[0]) for name in ('VmRSS', 'RssAnon', 'RssFile'))
+
+
+def _coldStart(args):
+    # One worker process: get an index ready, by building it or loading a saved one, then answer some queries
+    how, path, prefixes = args
+    start = time.perf_counter()
+    if how == 'load':
+        solution = CompactSolution.load(path)
+    else:
+        with open(path) as wordFile:
+            words, weights = [], []
+            for line in wordFile:
+                word, weight = line.rstrip('\n').split('\t')
+                words.append(word)
+                weights.append(float(weight))
+        solution = Solution() if how == 'Solution.build' else CompactSolution()
+        solution.build(words, weights)
+        del words, weights
+    seconds = time.perf_counter() - start
+    for prefix in prefixes:
+        solution.topK(prefix, 10)
+    return seconds, memoryKiB()
+
+
+def benchmarkColdStart(words, weights, prefixes, workers=4):
+    """ Start-up time and memory of worker processes that build the index from a word list, or load a saved one. """
+    directory = tempfile.mkdtemp()
+    wordsPath = os.path.join(directory, 'words.tsv')
+    indexPath = os.path.join(directory, 'words.dawg')
+    with open(wordsPath, 'w') as wordFile:
+        wordFile.writelines(f'{word}\t{weight!r}\n' for word, weight in zip(words, weights))
+    solution = CompactSolution()
+    solution.build(words, weights)
+    solution.save(indexPath)
+    print(f'Index file: {os.path.getsize(indexPath) / 2 ** 20:.1f} MiB, {workers} workers each:')
+    # Fresh interpreters, so the workers don't start with this process's memory
+    context = get_context('spawn')
+    for how, path in (('Solution.build', wordsPath), ('CompactSolution.build', wordsPath), ('load', indexPath)):
+        with context.Pool(workers) as pool:
+            results = pool.map(_coldStart, [(how, path, prefixes)] * workers)
+        seconds = max(result[0] for result in results)
+        line = f'\t{how}: ready in {seconds * 1000:.1f} ms'
+        if results[0][1] is not None:
+            rss, anon, shared = (sum(result[1][i] for result in results) / workers / 1024 for i in range(3))
+            line += f', RSS {rss:.1f} MiB ({anon:.1f} MiB private, {shared:.1f} MiB file-backed)'
+        print(line)
+    os.remove(wordsPath)
+    os.remove(indexPath)
+    os.rmdir(directory)
+
+
+def benchmarkUpdates(words, weights, batches=20, batchSize=1000):
+    """ Changes per second through insert/delete and merge, with a snapshot per batch, against a full rebuild. """
+    start = time.perf_counter()
+    Solution().build(words, weights)
+    buildSeconds = time.perf_counter() - start
+    print(f'Full rebuild of {len(words)} words: {buildSeconds:.2f}s')
+    # The same batches for both: half new words, a third re-weighted ones, the rest deleted
+    rng = random.Random(2)
+    vocabulary = dict(zip(words, weights))
+    newWords = [word for word in makeWords(len(words) // 2, seed=1) if word not in vocabulary]
+    changes = []
+    for _ in range(batches):
+        known = list(vocabulary)
+        updates = [newWords.pop() for _ in range(batchSize // 2)] + rng.sample(known, batchSize // 3)
+        updateWeights = [rng.random() / 1000 for _ in updates]
+        deleted = [word for word in rng.sample(known, batchSize - len(updates)) if word not in updates]
+        vocabulary.update(zip(updates, updateWeights))
+        for word in deleted:
+            del vocabulary[word]
+        changes.append((updates, updateWeights, deleted))
+    rebuilt = Solution()
+    rebuilt.build(list(vocabulary), list(vocabulary.values()))
+    prefixes = [word[:3] for word in rng.sample(words, 500)]
+    for name in ('insert/delete', 'merge'):
+        solution = Solution()
+        solution.build(words, weights)
+        firstSnapshot = solution.snapshot()
+        firstResults = [firstSnapshot.topK(prefix, 10) for prefix in prefixes]
+        snapshots = []
+        start = time.perf_counter()
+        for updates, updateWeights, deleted in changes:
+            if name == 'merge':
+                solution.merge(updates, updateWeights, deleted)
+            else:
+                for word, weight in zip(updates, updateWeights):
+                    solution.insert(word, weight)
+                for word in deleted:
+                    solution.delete(word)
+            # Readers would query this while the next batch goes in
+            snapshots.append(solution.snapshot())
+        seconds = time.perf_counter() - start
+        print(f'\t{name}: {batches * batchSize / seconds:,.0f} changes/sec, {seconds / batches * 1000:.1f} ms per batch '
+              f'of {batchSize} with a snapshot, {buildSeconds / (seconds / batches):.0f}x quicker than a rebuild. '
+              f'Same as a rebuild: {all(solution.topK(prefix, 10) == rebuilt.topK(prefix, 10) for prefix in prefixes)}, '
+              f'first snapshot unchanged: {[firstSnapshot.topK(prefix, 10) for prefix in prefixes] == firstResults}')
+
+
+def makeTypos(words, numberOfQueries, seed=3):
+    # Prefixes of 3 to 8 chars of random words, each with one char replaced, added or left out
+    rng = random.Random(seed)
+    letters = 'abcdefghijklmnopqrstuvwxyz'
+    queries = []
+    for word in rng.choices(words, k=numberOfQueries):
+        chars = list(word[:rng.randint(3, 8)])
+        at = rng.randrange(len(chars))
+        typo = rng.randrange(3)
+        if typo == 0:
+            chars[at] = rng.choice(letters)
+        elif typo == 1:
+            chars.insert(at, rng.choice(letters))
+        else:
+            del chars[at]
+        queries.append(''.join(chars))
+    return queries
+
+
+def benchmarkFuzzy(solution, queries, distances=(1, 2), k=10):
+    """ Latency percentiles of fuzzyTopK, and of the first result of iterFuzzy, at each of distances. """
+    for maxDistance in distances:
+        for name, query in (('fuzzyTopK ' + str(k), lambda prefix: solution.fuzzyTopK(prefix, k, maxDistance)),
+                            ('first result', lambda prefix: next(solution.iterFuzzy(prefix, maxDistance), None))):
+            latencies = []
+            for prefix in queries:
+                start = time.perf_counter()
+                query(prefix)
+                latencies.append(time.perf_counter() - start)
+            latencies.sort()
+            print(f'\t{type(solution).__name__} {name}, distance {maxDistance}: '
+                  f'p50 {latencies[len(latencies) // 2] * 1000:.2f} ms, '
+                  f'p99 {latencies[int(0.99 * len(latencies))] * 1000:.2f} ms, max {latencies[-1] * 1000:.2f} ms')
+
+
+def main():
+    s = Solution()
+    s.build(['dog', 'dark', 'cat', 'ass', 'door', 'dodge', 'doctor', 'doom', 'dooptidoo', 'fog', 'ford', 'force', 'fan'])
+    print(s.autocomplete('do'))
+    h = {}
+    test = h
+    ch = "a"
+    print(test)
+    if ch not in test:
+        test[ch] = {}
+
+    print(test)
+
+    c = CompactSolution()
+    c.build(['dog', 'dark', 'cat', 'ass', 'door', 'dodge', 'doctor', 'doom', 'dooptidoo', 'fog', 'ford', 'force', 'fan'])
+    print(c.autocomplete('do'))
+
+    words = makeWords(300000)
+    rng = random.Random(1)
+    prefixes = [word[:rng.randint(4, 8)] for word in rng.sample(words, 20000)]
+    for solutionClass in (Solution, CompactSolution):
+        size, buildSeconds, lookupSeconds, completions = measure(solutionClass, words, prefixes)
+        print(f'{solutionClass.__name__}: {size / 2 ** 20:.1f} MiB, built in {buildSeconds:.2f}s, {len(prefixes)} '
+              f'prefixes ({completions} completions) in {lookupSeconds:.2f}s')
+    s.build(words)
+    c.build(words)
+    same = all(sorted(s.autocomplete(prefix)) == c.autocomplete(prefix) for prefix in prefixes[:2000])
+    print(f'Same completions: {same}')
+    print(f'{len(words)} words in {c.getStateCount()} states and {c.getEdgeCount()} edges')
+
+    # Zipf-like weights, as word frequencies would be
+    weights = [1 / rank for rank in range(1, len(words) + 1)]
+    s.build(words, weights)
+    c.build(words, weights)
+    print(f'Weighted: {c.getStateCount()} states and {c.getEdgeCount()} edges, same top 10: '
+          f'{all(s.topK(prefix, 10) == c.topK(prefix, 10) for prefix in prefixes[:2000])}')
+    for solution in (s, c):
+        for name, query in (('autocomplete', solution.autocomplete),
+                            ('first 10 of iterComplete', lambda prefix: list(islice(solution.iterComplete(prefix), 10))),
+                            ('topK 10', lambda prefix: solution.topK(prefix, 10))):
+            start = time.perf_counter()
+            for prefix in ('d', 'm', 'r', 't'):
+                query(prefix)
+            print(f'{type(solution).__name__} {name}: {(time.perf_counter() - start) / 4 * 1000:.2f} ms per 1 char prefix')
+
+    benchmarkColdStart(words, weights, prefixes[:1000])
+    benchmarkUpdates(words, weights)
+
+    print(f'Typo tolerant: {s.fuzzyTopK("dorr", 5, 1)}')
+    del s, c
+    words = makeWords(1000000)
+    weights = [1 / rank for rank in range(1, len(words) + 1)]
+    queries = makeTypos(words, 2000)
+    print(f'Fuzzy completion of {len(queries)} prefixes with a typo, {len(words)} words:')
+    for solutionClass in (Solution, CompactSolution):
+        solution = solutionClass()
+        solution.build(words, weights)
+        benchmarkFuzzy(solution, queries)
+        del solution
 
-s = Solution()
-s.build(['dog', 'dark', 'cat', 'ass', 'door', 'dodge', 'doctor', 'doom', 'dooptidoo', 'fog', 'ford', 'force', 'fan'])
-print(s.autocomplete('do'))
-h = {}
-test = h
-ch = "a"
-print(test)
-if ch not in test:
-    test[ch] = {}
 
-print(test)
\ No newline at end of file
+if __name__ == "__main__":
+    # execute only if run as a script
+    main()
@@ -1,5 +1,80 @@
+import bisect
+import heapq
+import math
+import os
+import random
+import struct
+import tempfile
+import time
+from array import array
+from itertools import chain, islice
+from multiprocessing import Pool, cpu_count
+
+import numpy as np
+
+"""
+Title: Kth largest element by quickselect.
+findKthLargest partitions the list in place around its last element (Lomuto), which is quick on random
+data but quadratic on sorted or duplicate-heavy input. Its introselect mode works on a copy instead, picks
+the pivot as the median of random samples, splits three ways so runs of equal values are done in one step,
+and falls back to median-of-medians pivots (linear in the worst case) if the partitions stop shrinking.
+find_kth_many answers several order statistics (say p50, p90 and p99) with the same partitions.
+findKthLargestStream does the same for a stream of numbers too big to keep: exactly with a StreamingTopK
+(a heap of the k largest so far) for small k, or approximately with a KLLSketch for big ones.
+Both can be merged and saved as bytes, so workers can sketch their own part of a stream and send it to one place.
+NumPy arrays, and anything else with typed numbers behind the buffer protocol (array.array, a cast memoryview),
+skip the Python loops: they're selected on with np.partition, straight from their buffer. Untyped bytes, like
+an mmap or a bytearray, are refused: give them a dtype with np.frombuffer(buffer, dtype) or map the file
+with np.memmap. NaN has no rank, so findKthLargest, find_kth_many and findKthLargestChunked refuse values
+with NaN among them, whichever path they take.
+findKthLargestChunked selects from a memory-mapped file bigger than memory, a chunk per process at a time:
+a sample of every chunk brackets the answer, then each chunk sends back only its values inside the bracket.
+
+"""
+
+# Below this many values a sort is quicker than partitioning in Python.
+SORT_BELOW = 32
+# findKthLargestStream keeps the k largest values exactly for k up to this, and sketches them for bigger ones.
+EXACT_UP_TO = 10000
+# findKthLargestChunked: samples taken per full chunk to bracket the answer, and how many sampling errors
+# (standard deviations of a sample rank) the bracket is wide on either side
+SAMPLES_PER_CHUNK = 4096
+BRACKET_DEVIATIONS = 6
+
+
+def _numericView(arr):
+    # A NumPy view of arr's numbers without copying them, or None for lists and anything else without a buffer
+    if isinstance(arr, np.ndarray):
+        return arr.reshape(-1)
+    if isinstance(arr, (list, tuple, str, bytes)):
+        return None
+    try:
+        view = memoryview(arr)
+    except TypeError:
+        return None
+    # An mmap, bytearray or plain memoryview says 'B' whatever numbers its bytes hold
+    if view.format == 'B' and not isinstance(arr, array):
+        raise TypeError(f'{type(arr).__name__} holds untyped bytes: '
+                        f'wrap it in np.frombuffer(buffer, dtype) or map the file with np.memmap')
+    return np.asarray(view).reshape(-1)
+
+
+def _checkNoNaN(values, numeric=None):
+    # NaN is neither above nor below any number, so there's no kth largest with one among the values
+    if numeric is not None:
+        hasNaN = numeric.dtype.kind in 'fc' and bool(np.isnan(numeric).any())
+    else:
+        hasNaN = any(value != value for value in values)
+    if hasNaN:
+        raise ValueError('NaN has no rank among the values')
+
+
 class Solution(object):
-    def findKthLargest(self, arr, k):
+    def findKthLargest(self, arr, k, mode='lomuto'):
+        # mode 'lomuto' reorders arr, 'introselect' leaves it as it is. Arrays of numbers never get reordered.
+        if mode == 'introselect' or _numericView(arr) is not None:
+            return self.find_kth_many(arr, [k])[0]
+        _checkNoNaN(arr)
         left = 0
         right = len(arr) - 1
         while left <= right:
@@ -24,8 +99,151 @@ class Solution(object):
         arr[index], arr[high] = arr[high], arr[index]
         return index
 
-print(Solution().findKthLargest([1,3,8,5], 3))
-# 5
+    def find_kth_many(self, arr, ks):
+        """
+        The kth largest of arr for each k in ks, in the order of ks, without changing arr.
+        Each partition serves every k that falls in it, so asking for p50, p90 and p99 together
+        costs little more than asking for one of them.
+        """
+        numeric = _numericView(arr)
+        n = len(arr) if numeric is None else numeric.size
+        for k in ks:
+            if not 1 <= k <= n:
+                raise ValueError(f'k must be between 1 and {n}, got {k}')
+        _checkNoNaN(arr, numeric)
+        if numeric is not None:
+            return self._selectNumeric(numeric, ks)
+        # The kth largest is at index n - k once sorted ascending
+        found = {}
+        # (values, the indexes wanted in them, the index of their first value in all of arr,
+        #  pivots left before median-of-medians)
+        stack = [(list(arr), sorted({n - k for k in ks}), 0, 2 * n.bit_length())]
+        while stack:
+            values, indexes, offset, budget = stack.pop()
+            if len(values) <= SORT_BELOW:
+                values.sort()
+                for index in indexes:
+                    found[offset + index] = values[index]
+                continue
+            if budget > 0:
+                pivot = self._samplePivot(values)
+            else:
+                pivot = self._medianOfMedians(values)
+            lows = [value for value in values if value < pivot]
+            highs = [value for value in values if pivot < value]
+            equalEnd = len(values) - len(highs)
+            lowIndexes = [index for index in indexes if index < len(lows)]
+            highIndexes = [index - equalEnd for index in indexes if index >= equalEnd]
+            for index in indexes:
+                if len(lows) <= index < equalEnd:
+                    found[offset + index] = pivot
+            # Bad pivots use up the budget, good ones (the kept side at most half as big) don't
+            if lowIndexes:
+                lowBudget = budget if 2 * len(lows) <= len(values) else budget - 1
+                stack.append((lows, lowIndexes, offset, lowBudget))
+            if highIndexes:
+                highBudget = budget if 2 * len(highs) <= len(values) else budget - 1
+                stack.append((highs, highIndexes, offset + equalEnd, highBudget))
+        return [found[n - k] for k in ks]
+
+    def _selectNumeric(self, values, ks):
+        # One np.partition (introselect in C) for all of ks, on a copy so values stays as it is
+        n = values.size
+        partitioned = np.partition(values, sorted({n - k for k in ks}))
+        return [partitioned[n - k].item() for k in ks]
+
+    def findKthLargestChunked(self, source, k, dtype='float64', chunkSize=1 << 23, processes=None):
+        """
+        The kth largest of the numbers in a file, or in an np.memmap of one, in memory bounded by the chunks
+        and the values near the answer. source is a path to raw numbers of dtype, or a contiguous np.memmap
+        (a slice of one too).
+        Pass 1 samples every chunk, and picks from the samples a bracket that the answer is all but sure to be in.
+        Pass 2 gets from each chunk how many of its values are below the bracket, at either end of it,
+        and the values strictly inside it, then one np.partition of those finds the answer.
+        It also counts the NaNs, and a file with any is refused, as NaN has no rank.
+        A bracket that misses (about 1 in 10^9) is widened and pass 2 runs again.
+        """
+        if isinstance(source, np.memmap):
+            if not source.flags.c_contiguous:
+                raise ValueError('findKthLargestChunked needs a contiguous np.memmap')
+            # A slice keeps the offset of the memmap it came from, so the offset of its own first byte
+            # is worked out from where its data starts in the mapping of the file
+            mapped = source
+            while isinstance(mapped.base, np.ndarray):
+                mapped = mapped.base
+            offset = mapped.offset + source.ctypes.data - mapped.ctypes.data
+            path, dtype, n = source.filename, source.dtype, source.size
+        else:
+            dtype = np.dtype(dtype)
+            path, offset, n = source, 0, os.path.getsize(source) // dtype.itemsize
+        if not 1 <= k <= n:
+            raise ValueError(f'k must be between 1 and {n}, got {k}')
+        chunks = [(path, dtype.str, offset, n, start, min(start + chunkSize, n)) for start in range(0, n, chunkSize)]
+        with Pool(processes or cpu_count()) as pool:
+            # Samples in proportion to the length of each chunk, so a short last chunk doesn't count for more
+            sampled = [chunk + (max(1, round(SAMPLES_PER_CHUNK * (chunk[5] - chunk[4]) / chunkSize)),)
+                       for chunk in chunks]
+            samples = np.sort(np.concatenate(pool.map(_sampleChunk, sampled)))
+            # Where the answer would be among the samples, give or take the sampling error
+            target = n - k
+            at = target / n * samples.size
+            spread = BRACKET_DEVIATIONS * math.sqrt(samples.size) + 1
+            while True:
+                lowAt, highAt = int(at - spread), int(at + spread)
+                low = samples[lowAt].item() if lowAt >= 0 else -math.inf
+                high = samples[highAt].item() if highAt < samples.size else math.inf
+                below = atLow = atHigh = nans = 0
+                inside = []
+                for chunkBelow, chunkAtLow, chunkAtHigh, chunkInside, chunkNaNs in pool.imap_unordered(
+                        _bracketChunk, [chunk + (low, high) for chunk in chunks]):
+                    below += chunkBelow
+                    atLow += chunkAtLow
+                    atHigh += chunkAtHigh
+                    inside.append(chunkInside)
+                    nans += chunkNaNs
+                # NaNs are in none of the counts, so with any the bracket could never be made to fit
+                if nans:
+                    raise ValueError(f'{path} has {nans} NaN values, and NaN has no rank among the values')
+                inside = np.concatenate(inside)
+                # In order: below, the ones equal to low, inside, the ones equal to high (if it isn't low)
+                if below <= target < below + atLow:
+                    return low
+                target -= below + atLow
+                if 0 <= target < inside.size:
+                    return np.partition(inside, target)[target].item()
+                if 0 <= target - inside.size < atHigh:
+                    return high
+                target += below + atLow
+                spread *= 4
+
+    def _samplePivot(self, values):
+        # Median of 3 random values, or the ninther (median of 3 medians of 3) of 9 for bigger lists
+        if len(values) < 1000:
+            return sorted(random.sample(values, 3))[1]
+        samples = random.sample(values, 9)
+        return sorted(sorted(samples[i:i + 3])[1] for i in (0, 3, 6))[1]
+
+    def findKthLargestStream(self, values, k, exactUpTo=EXACT_UP_TO, sketchSize=200):
+        """
+        The kth largest of an iterable of numbers, read once. Exact for k up to exactUpTo,
+        otherwise from a KLLSketch of sketchSize, within about 1.7 / sketchSize of the count in rank.
+        """
+        if k <= exactUpTo:
+            topK = StreamingTopK(k)
+            topK.extend(values)
+            return topK.kthLargest()
+        sketch = KLLSketch(sketchSize)
+        sketch.extend(values)
+        return sketch.kthLargest(k)
+
+    def _medianOfMedians(self, values):
+        # A pivot with at least 3/10 of values on either side of it: the median of the medians of groups of 5
+        medians = [sorted(values[i:i + 5])[len(values[i:i + 5]) // 2] for i in range(0, len(values), 5)]
+        if len(medians) <= 5:
+            return sorted(medians)[len(medians) // 2]
+        return self.find_kth_many(medians, [len(medians) - len(medians) // 2])[0]
+
+
 '''
 # Real World Quicksort. it's important to recurse on the smaller part, then loop (or tail-recurse, but that's another story) on the larger part.
 This way the range of each recursive call is at most half the range of the caller, and the maximum depth is O(log n)
@@ -40,3 +258,390 @@ QUICKSORT(A, p, r)
             QUICKSORT(A, q + 1, r)
             r = q-1
  '''
+
+
+def _sampleChunk(args):
+    # Some random values of one chunk of a file, read through a memory map
+    path, dtype, offset, n, start, stop, numberOfSamples = args
+    values = np.memmap(path, dtype=dtype, mode='r', offset=offset, shape=(n,))[start:stop]
+    indexes = np.random.default_rng(start).integers(0, values.size, numberOfSamples)
+    return values[np.sort(indexes)]
+
+
+def _bracketChunk(args):
+    # How many values of one chunk are below low, equal to low, equal to high, the ones between them,
+    # and how many are NaN
+    path, dtype, offset, n, start, stop, low, high = args
+    values = np.memmap(path, dtype=dtype, mode='r', offset=offset, shape=(n,))[start:stop]
+    below = int(np.count_nonzero(values < low))
+    atLow = int(np.count_nonzero(values == low))
+    atHigh = int(np.count_nonzero(values == high)) if high != low else 0
+    nans = int(np.count_nonzero(np.isnan(values))) if values.dtype.kind in 'fc' else 0
+    return below, atLow, atHigh, values[(values > low) & (values < high)], nans
+
+
+# ----------------------------------
+# STREAMING
+# ----------------------------------
+class StreamingTopK(object):
+    """ The k largest numbers seen so far, in a min-heap of k, so memory stays O(k) however long the stream. """
+    HEADER = struct.Struct('<4sIQ')
+    MAGIC = b'TOPK'
+
+    def __init__(self, k):
+        self.k = k
+        self.count = 0
+        self.heap = []
+
+    def add(self, value):
+        self.count += 1
+        if len(self.heap) < self.k:
+            heapq.heappush(self.heap, value)
+        elif value > self.heap[0]:
+            heapq.heapreplace(self.heap, value)
+
+    def extend(self, values, chunkSize=1 << 16):
+        # The k largest of the heap and a chunk at a time, with nlargest doing the comparisons in C
+        values = iter(values)
+        while True:
+            chunk = list(islice(values, chunkSize))
+            if not chunk:
+                return
+            self.count += len(chunk)
+            # Ascending, so a heap already
+            self.heap = heapq.nlargest(self.k, chain(self.heap, chunk))[::-1]
+
+    def merge(self, other):
+        """ Adds the numbers other saw, as far as the k largest go. """
+        count = self.count + other.count
+        self.extend(other.heap)
+        self.count = count
+
+    def kthLargest(self):
+        if len(self.heap) < self.k:
+            raise ValueError(f'only {len(self.heap)} values seen, fewer than k={self.k}')
+        return self.heap[0]
+
+    def largest(self):
+        return sorted(self.heap, reverse=True)
+
+    def toBytes(self):
+        return self.HEADER.pack(self.MAGIC, self.k, self.count) + array('d', self.heap).tobytes()
+
+    @classmethod
+    def fromBytes(cls, data):
+        magic, k, count = cls.HEADER.unpack_from(data)
+        if magic != cls.MAGIC:
+            raise ValueError('not a StreamingTopK')
+        topK = cls(k)
+        topK.count = count
+        # A heap stays a heap when saved and read back in the same order
+        topK.heap = array('d', data[cls.HEADER.size:]).tolist()
+        return topK
+
+
+class KLLSketch(object):
+    """
+    Quantile sketch of Karnin, Lang and Liberty. Level h holds numbers that each stand for 2 ** h of the stream.
+    A full level is sorted and every other number of it (starting at random at the first or second one)
+    moves up a level, so ranks stay unbiased. Capacities shrink by 2/3 per level below the top one,
+    so about 3 * size numbers are kept, and a rank is off by around 1.7 / size of the count.
+    """
+    HEADER = struct.Struct('<4sIQQI')
+    MAGIC = b'KLL1'
+
+    def __init__(self, size=200, seed=None):
+        self.size = size
+        self.count = 0
+        self.levels = [[]]
+        # The rng is always seeded from self.seed, a 64-bit number drawn again after every compaction,
+        # so toBytes can save where the random choices are up to without drawing from the rng
+        self.rng = random.Random()
+        self._reseed(random.Random(seed).getrandbits(64))
+        # How many numbers all levels may hold before one gets compacted
+        self.capacities = self._capacities(1)
+        self.maxKept = sum(self.capacities)
+        self.kept = 0
+
+    def _reseed(self, seed):
+        self.seed = seed
+        self.rng.seed(seed)
+
+    def _capacities(self, height):
+        # The top level holds size numbers, each one below it 2/3 as many, and at least 2
+        return [max(2, int(self.size * (2 / 3) ** (height - 1 - level)) + 1) for level in range(height)]
+
+    def _grow(self):
+        self.levels.append([])
+        self.capacities = self._capacities(len(self.levels))
+        self.maxKept = sum(self.capacities)
+
+    def add(self, value):
+        self.levels[0].append(value)
+        self.count += 1
+        self.kept += 1
+        if self.kept >= self.maxKept:
+            self._compress()
+
+    def extend(self, values):
+        # Adds a slice at a time to level 0, at least size numbers of it: a bigger level 0 only means
+        # fewer compactions of it, and so less error, for a little more memory until the next one
+        values = iter(values)
+        while True:
+            room = max(self.size, self.maxKept - self.kept)
+            chunk = list(islice(values, room))
+            if not chunk:
+                return
+            self.levels[0].extend(chunk)
+            self.count += len(chunk)
+            self.kept += len(chunk)
+            while self.kept >= self.maxKept:
+                self._compress()
+
+    def _compress(self):
+        # Compacts the lowest level that is over its capacity
+        for level, items in enumerate(self.levels):
+            if len(items) >= self.capacities[level]:
+                if level + 1 == len(self.levels):
+                    self._grow()
+                items.sort()
+                # An odd one out stays where it is
+                odd = len(items) % 2
+                self.levels[level + 1].extend(items[odd + self.rng.getrandbits(1)::2])
+                del items[odd:]
+                self._reseed(self.rng.getrandbits(64))
+                break
+        self.kept = sum(len(items) for items in self.levels)
+
+    def merge(self, other):
+        """ Adds everything other has seen; the error stays that of one sketch of the whole stream. """
+        while len(self.levels) < len(other.levels):
+            self._grow()
+        for level, items in enumerate(other.levels):
+            self.levels[level].extend(items)
+        self.count += other.count
+        self.kept = sum(len(items) for items in self.levels)
+        while self.kept >= self.maxKept:
+            self._compress()
+
+    def _weighted(self):
+        # (number, how many of the stream it stands for), sorted by number
+        weighted = [(value, 1 << level) for level, items in enumerate(self.levels) for value in items]
+        weighted.sort()
+        return weighted
+
+    def rank(self, value):
+        """ About how many numbers seen were at most value. """
+        return sum(len([item for item in items if item <= value]) << level for level, items in enumerate(self.levels))
+
+    def quantiles(self, fractions):
+        """ About the number below which each fraction of the stream falls, e.g. 0.99 for p99. """
+        if not self.count:
+            raise ValueError('no values seen')
+        weighted = self._weighted()
+        total = sum(weight for _, weight in weighted)
+        results = []
+        for fraction in fractions:
+            wanted = fraction * total
+            seen = 0
+            for value, weight in weighted:
+                seen += weight
+                if seen >= wanted:
+                    break
+            results.append(value)
+        return results
+
+    def quantile(self, fraction):
+        return self.quantiles([fraction])[0]
+
+    def kthLargest(self, k):
+        if not 1 <= k <= self.count:
+            raise ValueError(f'k must be between 1 and {self.count}, got {k}')
+        return self.quantile((self.count - k + 1) / self.count)
+
+    def getKept(self):
+        return self.kept
+
+    def toBytes(self):
+        header = self.HEADER.pack(self.MAGIC, self.size, self.count, self.seed, len(self.levels))
+        lengths = array('I', [len(items) for items in self.levels])
+        return header + lengths.tobytes() + array('d', [value for items in self.levels for value in items]).tobytes()
+
+    @classmethod
+    def fromBytes(cls, data):
+        magic, size, count, seed, height = cls.HEADER.unpack_from(data)
+        if magic != cls.MAGIC:
+            raise ValueError('not a KLLSketch')
+        sketch = cls(size)
+        sketch._reseed(seed)
+        while len(sketch.levels) < height:
+            sketch._grow()
+        lengths = array('I', data[cls.HEADER.size:cls.HEADER.size + 4 * height])
+        values = array('d', data[cls.HEADER.size + 4 * height:]).tolist()
+        start = 0
+        for level, length in enumerate(lengths):
+            sketch.levels[level] = values[start:start + length]
+            start += length
+        sketch.count = count
+        sketch.kept = start
+        return sketch
+
+
+# ----------------------------------
+# BENCHMARK
+# ----------------------------------
+def makeInputs(n, seed=0):
+    # Random data, and the kinds of input that a last element pivot does worst on
+    rng = random.Random(seed)
+    randomValues = [rng.random() for _ in range(n)]
+    return {
+        'random': randomValues,
+        'sorted': sorted(randomValues),
+        'reversed': sorted(randomValues, reverse=True),
+        'all equal': [1.0] * n,
+        '10 distinct': [rng.randrange(10) for _ in range(n)],
+        'organ pipe': list(range(n // 2)) + list(range(n - n // 2, 0, -1)),
+    }
+
+
+def benchmark(n, k, lomutoUpTo=20000):
+    """ Seconds to find the kth largest of n values with each method, per kind of input. """
+    solution = Solution()
+    methods = (
+        ('lomuto', lambda values: solution.findKthLargest(list(values), k)),
+        ('introselect', lambda values: solution.findKthLargest(values, k, mode='introselect')),
+        ('heapq.nlargest', lambda values: heapq.nlargest(k, values)[-1]),
+        ('sorted', lambda values: sorted(values)[-k]),
+    )
+    print(f'n={n}, k={k}:')
+    print(f'\t{"input":<14}' + ''.join(f'{name:>16}' for name, _ in methods))
+    for kind, values in makeInputs(n).items():
+        expected = sorted(values)[-k]
+        line = f'\t{kind:<14}'
+        for name, method in methods:
+            # The quadratic cases of lomuto would take hours at big n
+            if name == 'lomuto' and n > lomutoUpTo and kind != 'random':
+                line += f'{"-":>16}'
+                continue
+            start = time.perf_counter()
+            result = method(values)
+            seconds = time.perf_counter() - start
+            line += f'{seconds:>15.3f}s' if result == expected else f'{"WRONG":>16}'
+        print(line)
+
+
+def benchmarkPercentiles(n):
+    # p50, p90 and p99 as the kth largest
+    values = makeInputs(n)['random']
+    ks = [n - n * percent // 100 for percent in (50, 90, 99)]
+    solution = Solution()
+    start = time.perf_counter()
+    many = solution.find_kth_many(values, ks)
+    manySeconds = time.perf_counter() - start
+    start = time.perf_counter()
+    one = [solution.findKthLargest(values, k, mode='introselect') for k in ks]
+    oneSeconds = time.perf_counter() - start
+    start = time.perf_counter()
+    ordered = sorted(values)
+    sortedSeconds = time.perf_counter() - start
+    print(f'p50/p90/p99 of {n} values: find_kth_many {manySeconds:.3f}s, 3 introselects {oneSeconds:.3f}s, '
+          f'sorted {sortedSeconds:.3f}s. Same: {many == one == [ordered[-k] for k in ks]}')
+
+
+def rankError(sortedValues, estimates, fractions):
+    # Worst distance, as a fraction of the count, between the rank asked for and the rank of what came back
+    n = len(sortedValues)
+    return max(abs(bisect.bisect_right(sortedValues, estimate) / n - fraction)
+               for estimate, fraction in zip(estimates, fractions))
+
+
+def benchmarkStreaming(n, sizes=(50, 100, 200, 400, 800), workers=8):
+    """ Accuracy against memory of KLLSketch sizes, of a sketch merged from workers, and StreamingTopK speed. """
+    rng = random.Random(0)
+    # Latencies are about log-normal
+    values = [rng.lognormvariate(0, 1) for _ in range(n)]
+    ordered = sorted(values)
+    fractions = [percent / 100 for percent in range(1, 100)]
+    print(f'KLLSketch of {n} values, rank error over p1..p99:')
+    print(f'\t{"size":>6}{"kept":>8}{"bytes":>8}{"max error":>12}{"p99 error":>12}{"values/sec":>14}')
+    for size in sizes:
+        sketch = KLLSketch(size, seed=1)
+        start = time.perf_counter()
+        sketch.extend(values)
+        seconds = time.perf_counter() - start
+        print(f'\t{size:>6}{sketch.getKept():>8}{len(sketch.toBytes()):>8}'
+              f'{rankError(ordered, sketch.quantiles(fractions), fractions):>12.4%}'
+              f'{rankError(ordered, [sketch.quantile(0.99)], [0.99]):>12.4%}{n / seconds:>14,.0f}')
+
+    # Each worker sketches its share and sends the bytes on, one place merges them
+    share = -(-n // workers)
+    merged = KLLSketch(200, seed=1)
+    for worker in range(workers):
+        sketch = KLLSketch(200, seed=worker)
+        sketch.extend(values[worker * share:(worker + 1) * share])
+        merged.merge(KLLSketch.fromBytes(sketch.toBytes()))
+    print(f'\t{workers} merged sketches of size 200: {merged.getKept()} kept, max error '
+          f'{rankError(ordered, merged.quantiles(fractions), fractions):.4%}, count {merged.count}')
+
+    k = n // 1000
+    for name, method in (('StreamingTopK', lambda: Solution().findKthLargestStream(iter(values), k)),
+                         ('heapq.nlargest', lambda: heapq.nlargest(k, values)[-1]),
+                         ('sorted', lambda: sorted(values)[-k])):
+        start = time.perf_counter()
+        result = method()
+        print(f'\t{name}: kth largest for k={k} (p99.9) in {time.perf_counter() - start:.3f}s, '
+              f'exact: {result == ordered[-k]}')
+
+
+def benchmarkNumeric(n, processes=None):
+    """ NumPy against pure Python selection, then n float64 values in memory and from a memory-mapped file. """
+    solution = Solution()
+    values = np.random.default_rng(0).random(n)
+    sample = values[:1000000]
+    asList = sample.tolist()
+    start = time.perf_counter()
+    expected = solution.findKthLargest(asList, len(asList) // 2, mode='introselect')
+    pythonSeconds = time.perf_counter() - start
+    start = time.perf_counter()
+    result = solution.findKthLargest(sample, sample.size // 2)
+    numpySeconds = time.perf_counter() - start
+    print(f'Median of {sample.size} float64: {pythonSeconds:.3f}s from a list, {numpySeconds:.4f}s from an array '
+          f'({pythonSeconds / numpySeconds:.0f}x), same: {result == expected}')
+
+    k = n // 100
+    start = time.perf_counter()
+    expected = solution.findKthLargest(values, k)
+    print(f'p99 of {n} float64 in memory: {time.perf_counter() - start:.2f}s')
+    path = os.path.join(tempfile.gettempdir(), 'kth_largest.float64')
+    values.tofile(path)
+    del values
+    mapped = np.memmap(path, dtype='float64', mode='r')
+    start = time.perf_counter()
+    result = solution.findKthLargest(mapped, k)
+    print(f'\tfrom a memory-mapped file, copied into memory: {time.perf_counter() - start:.2f}s, same: {result == expected}')
+    for workers in sorted({1, processes or cpu_count()}):
+        start = time.perf_counter()
+        result = solution.findKthLargestChunked(mapped, k, processes=workers)
+        print(f'\tfrom a memory-mapped file, chunked over {workers} process{"es" if workers > 1 else ""}: '
+              f'{time.perf_counter() - start:.2f}s, same: {result == expected}')
+    del mapped
+    os.remove(path)
+
+
+def main():
+    print(Solution().findKthLargest([1,3,8,5], 3))
+    # 5
+    print(Solution().find_kth_many([1, 3, 8, 5, 5, 2], [1, 3, 6]))
+    # [8, 5, 1]
+    benchmark(5000, 2500)
+    benchmark(5000, 50)
+    benchmark(1000000, 500000)
+    benchmark(1000000, 10000)
+    benchmarkPercentiles(1000000)
+    benchmarkStreaming(1000000)
+    benchmarkNumeric(10 ** 8, processes=4)
+
+
+if __name__ == "__main__":
+    # execute only if run as a script
+    main()
@@ -1,3 +1,23 @@
+import random
+import time
+from bisect import insort_right
+from heapq import heapify, heappop, heapreplace
+
+"""
+Title: Merge sort.
+MergeSort splits recursively and merges through two new lists per merge.
+MergeSortBottomUp sorts without recursion and allocates one buffer for the whole sort: it sorts short runs
+by binary insertion, then merges runs of doubling width back and forth between the list and the buffer,
+copying pairs of runs that are already in order instead of merging them. Equal items keep their order,
+and with key= the keys are worked out once per item.
+mergeSorted is the k-way form of the merge, over any number of sorted iterables, for runs that don't fit in memory.
+
+"""
+
+# MergeSortBottomUp sorts runs of this many items by insertion before merging.
+RUN_SIZE = 32
+
+
 class Solution(object):
     def MergeSort(self, arr, left, right):
         if left < right:
@@ -42,11 +62,134 @@ class Solution(object):
 
         return arr
 
+    def MergeSortBottomUp(self, arr, key=None, runSize=RUN_SIZE):
+        """ Sorts arr in place, stably, and returns it. """
+        if key is None:
+            return self._sortBottomUp(arr, runSize)
+        # Sorted as (key, index), so equal keys keep their order and items never get compared
+        decorated = [(itemKey, index) for index, itemKey in enumerate(map(key, arr))]
+        self._sortBottomUp(decorated, runSize)
+        arr[:] = [arr[index] for _, index in decorated]
+        return arr
+
+    def _sortBottomUp(self, arr, runSize):
+        n = len(arr)
+        for low in range(0, n, runSize):
+            run = []
+            for item in arr[low:low + runSize]:
+                # After any equal ones, which keeps it stable; items already in order just go on the end
+                if run and item < run[-1]:
+                    insort_right(run, item)
+                else:
+                    run.append(item)
+            arr[low:low + runSize] = run
+        # Each pass merges pairs of runs from src into dst, then the two swap
+        src, dst = arr, [None] * n
+        width = runSize
+        while width < n:
+            for low in range(0, n, 2 * width):
+                mid = min(low + width, n)
+                high = min(low + 2 * width, n)
+                if mid == high or not src[mid] < src[mid - 1]:
+                    # One run, or two already in order
+                    dst[low:high] = src[low:high]
+                else:
+                    self._mergeRuns(src, dst, low, mid, high)
+            src, dst = dst, src
+            width *= 2
+        if src is not arr:
+            arr[:] = src
+        return arr
+
+    def _mergeRuns(self, src, dst, low, mid, high):
+        # Merges src[low:mid] and src[mid:high] into dst[low:high], the left one first on ties
+        i, j, k = low, mid, low
+        left, right = src[i], src[j]
+        while True:
+            if right < left:
+                dst[k] = right
+                k += 1
+                j += 1
+                if j == high:
+                    dst[k:high] = src[i:mid]
+                    return
+                right = src[j]
+            else:
+                dst[k] = left
+                k += 1
+                i += 1
+                if i == mid:
+                    dst[k:high] = src[j:high]
+                    return
+                left = src[i]
+
+
+def mergeSorted(runs, key):
+    """ Yields the items of the sorted iterables runs in key order, the earlier run first on ties. """
+    # (key, run number, item, run) for the next item of each run; run numbers differ, so items never get compared
+    heap = []
+    for number, run in enumerate(map(iter, runs)):
+        for item in run:
+            heap.append((key(item), number, item, run))
+            break
+    heapify(heap)
+    while heap:
+        _, number, item, run = heap[0]
+        yield item
+        for item in run:
+            heapreplace(heap, (key(item), number, item, run))
+            break
+        else:
+            heappop(heap)
+
+
+# ----------------------------------
+# BENCHMARK
+# ----------------------------------
+def benchmark(n, recursive=True):
+    """ Seconds for MergeSort, MergeSortBottomUp and sorted on n random ints, and on other kinds of input. """
+    rng = random.Random(0)
+    values = [rng.randrange(n) for _ in range(n)]
+    expected = sorted(values)
+    s = Solution()
+    print(f'n={n}:')
+    if recursive:
+        arr = list(values)
+        start = time.perf_counter()
+        s.MergeSort(arr, 0, len(arr) - 1)
+        print(f'\tMergeSort, random: {time.perf_counter() - start:.2f}s, sorted: {arr == expected}')
+    inputs = (('random', values), ('sorted', expected), ('reversed', expected[::-1]),
+              ('sorted, 1% moved', [value if rng.random() > 0.01 else rng.randrange(n) for value in expected]))
+    for kind, data in inputs:
+        arr = list(data)
+        start = time.perf_counter()
+        s.MergeSortBottomUp(arr)
+        seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        sorted(data)
+        print(f'\tMergeSortBottomUp, {kind}: {seconds:.2f}s, sorted: {arr == sorted(data)} '
+              f'(sorted(): {time.perf_counter() - start:.2f}s)')
+    # Records by one field, where stable means ties stay in the order they came in
+    records = [(value % 100, index) for index, value in enumerate(values)]
+    start = time.perf_counter()
+    s.MergeSortBottomUp(records, key=lambda record: record[0])
+    print(f'\tMergeSortBottomUp with key=, random: {time.perf_counter() - start:.2f}s, '
+          f'stable: {records == sorted(records)}')
+
+
+def main():
+    # Driver function here!
+    s = Solution()
+    array = [1, 1, 7, 6, 5, 2, 3, 4]
+    print(s.MergeSort(array, 0, len(array)-1))
+    #print(s._merge(array,0,2,4))
+    print(s.MergeSortBottomUp([1, 1, 7, 6, 5, 2, 3, 4]))
+    print(s.MergeSortBottomUp(['pear', 'fig', 'apple', 'kiwi', 'plum'], key=len))
+    print(list(mergeSorted([[1, 4, 7], ['2', '5'], [3, 6]], key=int)))
+    benchmark(10 ** 6)
+    benchmark(10 ** 7)
 
-# Driver function here!
-s = Solution()
-array = [1, 1, 7, 6, 5, 2, 3, 4]
-print(s.MergeSort(array, 0, len(array)-1))
-#print(s._merge(array,0,2,4))
 
-quit()
\ No newline at end of file
+if __name__ == "__main__":
+    # execute only if run as a script
+    main()
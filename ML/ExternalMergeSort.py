@@ -0,0 +1,207 @@
+import os
+import random
+import shutil
+import struct
+import sys
+import tempfile
+import time
+from itertools import islice
+from multiprocessing import Pool, cpu_count
+from operator import itemgetter
+
+from DoesThisMergeSort import mergeSorted
+
+"""
+Title: External merge sort, for files of records bigger than memory.
+The file holds fixed-size binary records, sorted by the bytes of a key at a fixed place in each record.
+ExternalSort reads it a chunk at a time, sorts each chunk in memory and spills it to a temporary run file,
+in the same record format, optionally with a process per chunk. A chunk is sorted as a list of its keys, each
+followed by the record's index, and the records are written from the chunk in that order, so the records
+themselves are never copied into objects of their own. Then it merges the runs with DoesThisMergeSort.mergeSorted,
+the k-way version of its merge: a heap holds the next record of every run, and the smallest one goes out next,
+the earlier run first on ties so the sort is stable. Reads and writes go through buffers of bufferSize bytes.
+If there are more runs than fanIn, they're merged fanIn at a time into longer runs first.
+
+"""
+
+# ----------------------------------
+# STATIC FUNCTIONS & VARIABLES
+# ----------------------------------
+MiB = 1 << 20
+# A run's records are numbered in four big-endian bytes after their keys, so a run holds at most 2 ** 32 records.
+INDEX = struct.Struct('>I')
+
+
+def _sortOverhead(keySize):
+    # Bytes a record costs while its chunk is sorted, besides the record: its key and index, and their list slot
+    return sys.getsizeof(bytes(keySize + INDEX.size)) + 8
+
+
+def _sortRun(args):
+    # Sorts records start up to stop of a file into a run file; one chunk, in a worker process or not
+    inputPath, start, stop, recordSize, keyOffset, keySize, runPath = args
+    with open(inputPath, 'rb') as source:
+        source.seek(start)
+        data = source.read(stop - start)
+    # Key then index, big-endian: equal keys sort in file order, so the sort is stable
+    pack, unpack = INDEX.pack, INDEX.unpack_from
+    keys = [data[at + keyOffset:at + keyOffset + keySize] + pack(index)
+            for index, at in enumerate(range(0, len(data), recordSize))]
+    keys.sort()
+    records = memoryview(data)
+    with open(runPath, 'wb') as run:
+        run.writelines(records[at:at + recordSize]
+                       for at in (unpack(key, keySize)[0] * recordSize for key in keys))
+    return runPath
+
+
+def _readRecords(path, recordSize, bufferSize):
+    # Yields the records of a run, reading bufferSize bytes (rounded to whole records) at a time
+    blockSize = max(1, bufferSize // recordSize) * recordSize
+    with open(path, 'rb', buffering=0) as run:
+        while True:
+            block = run.read(blockSize)
+            if not block:
+                return
+            yield from (block[at:at + recordSize] for at in range(0, len(block), recordSize))
+
+
+# ----------------------------------
+# CLASSES
+# ----------------------------------
+class ExternalSort:
+    """
+    Sorts a file of recordSize byte records by their key, the keySize bytes from keyOffset, compared as bytes.
+    memoryLimit bounds the memory of each process making runs, to within a few percent: a chunk of records,
+    plus a small bytes object of its key and index per record (about 55 bytes with its list slot, for 10 byte
+    keys). The merge holds a buffer of bufferSize bytes per run it reads and one it writes.
+    """
+    def __init__(self, recordSize=100, keySize=10, keyOffset=0, memoryLimit=64 * MiB, bufferSize=MiB, fanIn=64,
+                 processes=1, tempDir=None):
+        self.recordSize = recordSize
+        self.keySize = keySize
+        self.keyOffset = keyOffset
+        # Whole records per run, as many as fit in memoryLimit with the keys they're sorted by
+        recordsPerRun = min(max(1, memoryLimit // (recordSize + _sortOverhead(keySize))), 1 << 8 * INDEX.size)
+        self.runBytes = recordsPerRun * recordSize
+        self.bufferSize = bufferSize
+        self.fanIn = fanIn
+        self.processes = processes
+        self.tempDir = tempDir
+        # Of the last sort: how many runs it made, and how many times their records were merged
+        self.runs = 0
+        self.mergePasses = 0
+
+    def sort(self, inputPath, outputPath):
+        size = os.path.getsize(inputPath)
+        if size % self.recordSize:
+            raise ValueError(f'{inputPath} is {size} bytes, not a whole number of {self.recordSize} byte records')
+        directory = tempfile.mkdtemp(prefix='external_sort_', dir=self.tempDir)
+        try:
+            runs = self._makeRuns(inputPath, size, directory)
+            self.runs = len(runs)
+            self.mergePasses = 0
+            # Longer runs, fanIn at a time, until one merge can take them all
+            while len(runs) > self.fanIn:
+                merged = []
+                for first in range(0, len(runs), self.fanIn):
+                    group = runs[first:first + self.fanIn]
+                    path = os.path.join(directory, f'merged_{self.mergePasses}_{first}.run')
+                    self._merge(group, path)
+                    for run in group:
+                        os.remove(run)
+                    merged.append(path)
+                runs = merged
+                self.mergePasses += 1
+            if not runs:
+                open(outputPath, 'wb').close()
+            elif len(runs) == 1:
+                shutil.move(runs[0], outputPath)
+            else:
+                self._merge(runs, outputPath)
+                self.mergePasses += 1
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+
+    def _makeRuns(self, inputPath, size, directory):
+        chunks = [(inputPath, start, min(start + self.runBytes, size), self.recordSize, self.keyOffset, self.keySize,
+                   os.path.join(directory, f'run_{number}.run'))
+                  for number, start in enumerate(range(0, size, self.runBytes))]
+        if self.processes == 1 or len(chunks) <= 1:
+            return [_sortRun(chunk) for chunk in chunks]
+        with Pool(self.processes or cpu_count()) as pool:
+            return pool.map(_sortRun, chunks)
+
+    def _merge(self, runs, outputPath):
+        """ Merges the sorted run files into outputPath, the earlier run first on equal keys. """
+        recordSize = self.recordSize
+        # A read buffer of bufferSize bytes per run, but no smaller than 64 KiB, so the disk reads stay long
+        readBuffer = max(self.bufferSize, 1 << 16)
+        readers = [_readRecords(run, recordSize, readBuffer) for run in runs]
+        records = mergeSorted(readers, key=itemgetter(slice(self.keyOffset, self.keyOffset + self.keySize)))
+        recordsPerWrite = max(1, self.bufferSize // recordSize)
+        with open(outputPath, 'wb', buffering=0) as output:
+            while True:
+                pending = list(islice(records, recordsPerWrite))
+                if not pending:
+                    return
+                output.write(b''.join(pending))
+
+
+# ----------------------------------
+# BENCHMARK
+# ----------------------------------
+def makeRecordFile(path, numberOfRecords, recordSize=100, keySize=10, seed=0):
+    # Records like those of the sort benchmarks: a random key, then the record's number and filler
+    rng = random.Random(seed)
+    filler = b'.' * (recordSize - keySize - 12)
+    with open(path, 'wb', buffering=MiB) as records:
+        for number in range(numberOfRecords):
+            records.write(rng.getrandbits(8 * keySize).to_bytes(keySize, 'big') + b'%10d\r\n' % number + filler)
+
+
+def isSorted(path, recordSize=100, keySize=10):
+    # For a file of makeRecordFile: every key is at least the one before it, and equal keys are in record number order
+    previous = None
+    for record in _readRecords(path, recordSize, 16 * MiB):
+        current = (record[:keySize], record[keySize:keySize + 10])
+        if previous is not None and current < previous:
+            return False
+        previous = current
+    return True
+
+
+def benchmark(sizesMiB=(16, 64, 256, 1024), memoryLimit=64 * MiB, processes=1):
+    """ MB/s of ExternalSort on files of random 100 byte records, against a plain in-memory sort for the small ones. """
+    directory = tempfile.mkdtemp(prefix='external_sort_benchmark_')
+    inputPath = os.path.join(directory, 'input.records')
+    outputPath = os.path.join(directory, 'output.records')
+    sorter = ExternalSort(memoryLimit=memoryLimit, processes=processes)
+    print(f'ExternalSort, {memoryLimit / MiB:g} MiB per run, {processes or cpu_count()} process(es):')
+    try:
+        for sizeMiB in sizesMiB:
+            makeRecordFile(inputPath, sizeMiB * MiB // 100)
+            start = time.perf_counter()
+            sorter.sort(inputPath, outputPath)
+            seconds = time.perf_counter() - start
+            line = (f'\t{sizeMiB:>5} MiB: {seconds:6.2f}s, {sizeMiB * MiB / 1e6 / seconds:6.1f} MB/s, '
+                    f'{sorter.runs} runs, {sorter.mergePasses} merge pass(es), sorted: {isSorted(outputPath)}')
+            if sizeMiB * MiB <= memoryLimit:
+                start = time.perf_counter()
+                _sortRun((inputPath, 0, sizeMiB * MiB, 100, 0, 10, outputPath))
+                line += f' (all in memory: {sizeMiB * MiB / 1e6 / (time.perf_counter() - start):.1f} MB/s)'
+            print(line)
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def main():
+    benchmark()
+    # Many small runs, so they take more than one merge pass
+    benchmark(sizesMiB=(64,), memoryLimit=MiB // 2)
+    benchmark(sizesMiB=(256,), processes=None)
+
+
+if __name__ == "__main__":
+    # execute only if run as a script
+    main()
@@ -0,0 +1,398 @@
+import math
+import random
+import time
+
+import numpy as np
+
+from BlackJackGame import HI_LO
+from BlackJackHistory import HandHistoryReader
+from BlackJackSimulator import (Simulator, SimulationResult, RunningStats, TRUE_COUNT_LIMIT, mimic_dealer_strategy,
+                                flat_bet, spread_1_to_8)
+from BlackJackStrategy import StrategyTables
+
+"""
+Title: Bankroll and risk of ruin analytics over a stream of Blackjack rounds.
+A round stream yields (true count before the round, net of the round in bets) for rounds played with
+one flat bet. No decision in a round depends on the bet, so a bet-spread policy just scales each
+round's net by the bet it places at that true count, and any number of policies can be evaluated
+on one stream. BankrollAnalytics follows one policy round by round, PolicySweep evaluates a whole
+table of them at once with NumPy. Both keep running sums only, so memory stays the same over any
+number of rounds.
+
+Sessions are consecutive windows of session_rounds rounds, each starting from the same bankroll, like
+a new Game.start. A session is ruined when its balance drops to 0, and won when it reaches the goal;
+either way it sits out the rest of its window. Bankrolls, goals and bets are all in base bets
+(Game starts at 1000 credits and stops at 20000, with bets of 10: a bankroll of 100 and a goal of 2000).
+
+"""
+
+# ----------------------------------
+# STATIC FUNCTIONS & VARIABLES
+# ----------------------------------
+# Rounds of a simulated stream are played for 10 credits, so a blackjack's 3:2 pays out exactly.
+ROUND_BET = 10
+# z for two-sided 95% confidence intervals
+Z_95 = 1.959964
+NUMBER_OF_BUCKETS = 2 * TRUE_COUNT_LIMIT + 1
+
+
+def true_count_buckets(true_counts):
+    # Same buckets as SimulationResult.add_true_count_round, for a whole array of true counts
+    return np.clip(np.floor(true_counts), -TRUE_COUNT_LIMIT, TRUE_COUNT_LIMIT).astype(np.intp) + TRUE_COUNT_LIMIT
+
+
+def wilson_interval(successes, trials, z=Z_95):
+    """ Confidence interval of a proportion, which stays inside [0, 1] even for 0 or all successes. """
+    if trials == 0:
+        return 0.0, 1.0
+    p = successes / trials
+    center = (p + z * z / (2 * trials)) / (1 + z * z / trials)
+    half_width = z * math.sqrt(p * (1 - p) / trials + z * z / (4 * trials * trials)) / (1 + z * z / trials)
+    return max(0.0, center - half_width), min(1.0, center + half_width)
+
+
+def n0(ev, variance):
+    """ Rounds needed for the expected win to equal one standard deviation of the result. """
+    if ev == 0:
+        return math.inf
+    return variance / (ev * ev)
+
+
+def policy_table(bet_size):
+    """ A bet_size callback (see BlackJackSimulator) as a row of bets per true count bucket, for PolicySweep. """
+    return [bet_size(count) for count in range(-TRUE_COUNT_LIMIT, TRUE_COUNT_LIMIT + 1)]
+
+
+def spread_policies(top_bets=tuple(range(1, 17)), ramp_starts=(-1, 0, 1, 2, 3, 4), bets_per_count=(0.5, 1, 1.5, 2, 3, 4),
+                    wong_outs=(None, -1, 0, 1)):
+    """
+    Grid of bet ramps: one bet below ramp_start, then bets_per_count more per true count, up to top_bet.
+    Below a wong_out count the policy sits the round out (bets 0), as if it left the table.
+    :return: Tuple of (labels, array of shape (number of policies, NUMBER_OF_BUCKETS))
+    """
+    counts = np.arange(-TRUE_COUNT_LIMIT, TRUE_COUNT_LIMIT + 1)
+    labels = []
+    rows = []
+    for top_bet in top_bets:
+        for ramp_start in ramp_starts:
+            for step in bets_per_count:
+                ramp = np.clip(1 + step * (counts - ramp_start + 1), 1, top_bet)
+                ramp[counts < ramp_start] = 1
+                for wong_out in wong_outs:
+                    row = ramp.copy()
+                    if wong_out is not None:
+                        row[counts < wong_out] = 0
+                    rows.append(row)
+                    labels.append(f'1-{top_bet} from TC {ramp_start:+d} by {step:g}'
+                                  + ('' if wong_out is None else f', out below {wong_out:+d}'))
+    return labels, np.array(rows, dtype=np.float64)
+
+
+# ----------------------------------
+# ROUND STREAMS
+# ----------------------------------
+def simulated_rounds(number_of_rounds, strategy=mimic_dealer_strategy, number_of_decks=3, counting_system=HI_LO,
+                     rng=random, penetration=0.75):
+    """ Rounds played by the Simulator, with the same Shoe and Hand rules as Game. """
+    simulator = Simulator(strategy, number_of_decks, ROUND_BET, rng=rng, penetration=penetration,
+                          counting_system=counting_system)
+    shoe = simulator.get_shoe()
+    result = SimulationResult(ROUND_BET)
+    for _ in range(number_of_rounds):
+        if shoe.cut_card_reached():
+            shoe.new_shoe()
+        true_count = shoe.get_true_count()
+        yield true_count, simulator.play_round(result) / ROUND_BET
+
+
+def recorded_rounds(path):
+    """
+    Rounds read back from a hand history log (see BlackJackHistory), in bets of each round.
+    The log does not record shuffles, so every round comes with a true count of 0.
+    Rounds without a bet have no net in bets, so they are skipped.
+    """
+    for bet, net, balance, outcomes in HandHistoryReader(path).replay().rounds:
+        if bet:
+            yield 0.0, net / bet
+
+
+def round_chunks(rounds, chunk_size):
+    """ Groups a round stream into (true counts, nets) arrays of chunk_size rounds, for PolicySweep. """
+    true_counts = []
+    nets = []
+    for true_count, net in rounds:
+        true_counts.append(true_count)
+        nets.append(net)
+        if len(nets) == chunk_size:
+            yield np.array(true_counts), np.array(nets)
+            true_counts = []
+            nets = []
+    if nets:
+        yield np.array(true_counts), np.array(nets)
+
+
+# ----------------------------------
+# CLASSES
+# ----------------------------------
+class BankrollAnalytics:
+    def __init__(self, bankroll=100, session_rounds=1000, goal=None, bet_size=flat_bet, checkpoint_every=100):
+        # param: bet_size, a callback from the true count to the bet, like the Simulator's.
+        # param: checkpoint_every, how often (in rounds) the balance of a session goes into its trajectory.
+        self.bankroll = bankroll
+        self.session_rounds = session_rounds
+        self.goal = goal
+        self.checkpoint_every = checkpoint_every
+        self.stats = RunningStats()
+        self.wagered = 0.0
+        self.sessions = 0
+        self.ruined = 0
+        self.reached_goal = 0
+        # Balance at every checkpoint of a session, over all sessions.
+        self.trajectory = [RunningStats() for _ in range(session_rounds // checkpoint_every)]
+        self.final_balances = RunningStats()
+        self.__bet_size = bet_size
+        self.__balance = bankroll
+        self.__round = 0
+        self.__session_over = False
+
+    def push(self, true_count, net_in_bets):
+        bet = self.__bet_size(true_count)
+        net = bet * net_in_bets
+        self.stats.push(net)
+        self.wagered += bet
+        if not self.__session_over:
+            self.__balance += net
+            if self.__balance <= 0:
+                self.ruined += 1
+                self.__session_over = True
+            elif self.goal is not None and self.__balance >= self.goal:
+                self.reached_goal += 1
+                self.__session_over = True
+        self.__round += 1
+        if self.__round % self.checkpoint_every == 0:
+            self.trajectory[self.__round // self.checkpoint_every - 1].push(self.__balance)
+        if self.__round == self.session_rounds:
+            self.sessions += 1
+            self.final_balances.push(self.__balance)
+            self.__balance = self.bankroll
+            self.__round = 0
+            self.__session_over = False
+
+    def run(self, rounds):
+        push = self.push
+        for true_count, net_in_bets in rounds:
+            push(true_count, net_in_bets)
+        return self
+
+    def get_ev(self):
+        """ Expected net per round, in base bets. """
+        return self.stats.mean
+
+    def get_ev_interval(self, z=Z_95):
+        half_width = z * math.sqrt(self.stats.get_variance() / max(self.stats.count, 1))
+        return self.stats.mean - half_width, self.stats.mean + half_width
+
+    def get_n0(self):
+        return n0(self.stats.mean, self.stats.get_variance())
+
+    def get_risk_of_ruin(self):
+        if self.sessions == 0:
+            return 0.0
+        return self.ruined / self.sessions
+
+    def get_risk_of_ruin_interval(self, z=Z_95):
+        return wilson_interval(self.ruined, self.sessions, z)
+
+    def get_analytic_risk_of_ruin(self):
+        """ Risk of ever losing the bankroll over an endless session, from EV and variance alone. """
+        if self.stats.mean <= 0:
+            return 1.0
+        variance = self.stats.get_variance()
+        # Without variance every round wins the mean, so the bankroll only grows
+        if variance == 0:
+            return 0.0
+        return math.exp(-2 * self.stats.mean * self.bankroll / variance)
+
+    def summary(self):
+        low, high = self.get_ev_interval()
+        ruin_low, ruin_high = self.get_risk_of_ruin_interval()
+        lines = [f'Rounds: {self.stats.count}, wagered: {self.wagered:,.0f} bets',
+                 f'EV per round: {self.get_ev():+.5f} bets (95% CI {low:+.5f} to {high:+.5f})',
+                 f'EV per bet wagered: {self.stats.mean * self.stats.count / max(self.wagered, 1):+.5f}',
+                 f'SD per round: {math.sqrt(self.stats.get_variance()):.4f} bets, N0: {self.get_n0():,.0f} rounds',
+                 f'Sessions of {self.session_rounds} rounds from {self.bankroll} bets: {self.sessions}, '
+                 f'reached goal: {self.reached_goal}',
+                 f'Risk of ruin: {self.get_risk_of_ruin():.4f} (95% CI {ruin_low:.4f} to {ruin_high:.4f}), '
+                 f'endless session: {self.get_analytic_risk_of_ruin():.4f}',
+                 'Bankroll trajectory (round: mean +- SD):']
+        for checkpoint, stats in enumerate(self.trajectory, 1):
+            lines.append(f'\t{checkpoint * self.checkpoint_every}: {stats.mean:8.2f} +- '
+                         f'{math.sqrt(stats.get_variance()):.2f}')
+        return '\n'.join(lines)
+
+
+class PolicySweep:
+    """
+    BankrollAnalytics for a whole table of bet-spread policies at once, minus the trajectory.
+    A policy's bet only depends on the true count bucket, so its EV and variance follow from the rounds,
+    net and squared net per bucket: only the sessions need every round bet by every policy, which is
+    done a chunk at a time, one round of every session and policy per array operation. Just the last unfinished
+    session is kept between chunks.
+    """
+    def __init__(self, policies, bankroll=100, session_rounds=1000, goal=None):
+        # param: policies, the bet of each policy for each true count bucket, see policy_table and spread_policies.
+        self.policies = np.asarray(policies, dtype=np.float64)
+        self.bankroll = bankroll
+        self.session_rounds = session_rounds
+        self.goal = goal
+        number_of_policies = len(self.policies)
+        # Round count, net and squared net of the stream per true count bucket
+        self.bucket_rounds = np.zeros(NUMBER_OF_BUCKETS)
+        self.bucket_net = np.zeros(NUMBER_OF_BUCKETS)
+        self.bucket_squares = np.zeros(NUMBER_OF_BUCKETS)
+        self.sessions = 0
+        self.ruined = np.zeros(number_of_policies, dtype=np.int64)
+        self.reached_goal = np.zeros(number_of_policies, dtype=np.int64)
+        self.final_balance_sum = np.zeros(number_of_policies)
+        # Sessions run in float32, twice as fast as float64, while that is exact: bets and nets in whole
+        # half bets, so round nets are whole quarters, and balances short of 2 ** 22 bets (float32 counts
+        # quarters up to 2 ** 24). A 6:5 blackjack or a recorded bet breaks that, and they run in float64.
+        self.__half_bets = bool(np.all(self.policies * 2 == np.round(self.policies * 2)))
+        self.__largest_bet = float(np.abs(self.policies).max(initial=0))
+        self.__dtype = np.float32 if self.__half_bets else np.float64
+        self.__bets_by_bucket = np.ascontiguousarray(self.policies.T, dtype=self.__dtype)
+        self.__unfinished = np.zeros((0, number_of_policies), dtype=self.__dtype)
+
+    def push_chunk(self, true_counts, nets):
+        buckets = true_count_buckets(true_counts)
+        self.bucket_rounds += np.bincount(buckets, minlength=NUMBER_OF_BUCKETS)
+        self.bucket_net += np.bincount(buckets, nets, minlength=NUMBER_OF_BUCKETS)
+        self.bucket_squares += np.bincount(buckets, nets * nets, minlength=NUMBER_OF_BUCKETS)
+        if self.__dtype == np.float32 and not self.__exact_in_float32(nets):
+            self.__dtype = np.float64
+            self.__bets_by_bucket = np.ascontiguousarray(self.policies.T)
+            self.__unfinished = self.__unfinished.astype(np.float64)
+        round_nets = self.__bets_by_bucket[buckets]
+        round_nets *= nets.astype(self.__dtype)[:, None]
+        if len(self.__unfinished) != 0:
+            round_nets = np.concatenate((self.__unfinished, round_nets))
+        self.__play_sessions(round_nets)
+
+    def __exact_in_float32(self, nets):
+        if not np.all(nets * 2 == np.round(nets * 2)):
+            return False
+        largest_round = self.__largest_bet * float(np.abs(nets).max(initial=0))
+        return max(self.bankroll, self.goal or 0) + self.session_rounds * largest_round < 2 ** 22
+
+    def __play_sessions(self, round_nets):
+        # round_nets has one row per round and one column per policy
+        sessions = len(round_nets) // self.session_rounds
+        played = sessions * self.session_rounds
+        self.__unfinished = round_nets[played:].copy()
+        if sessions == 0:
+            return
+        rounds = round_nets[:played].reshape(sessions, self.session_rounds, len(self.policies))
+        balances = np.full((sessions, len(self.policies)), self.bankroll, dtype=self.__dtype)
+        playing = np.ones(balances.shape, dtype=bool)
+        step = np.empty_like(balances)
+        above = np.empty_like(playing)
+        # One round of every session and policy per step: a few small array operations,
+        # much cheaper than a cumsum over the whole chunk followed by a search for the first ruin
+        for i in range(self.session_rounds):
+            np.multiply(rounds[:, i], playing, out=step)
+            balances += step
+            np.greater(balances, 0, out=above)
+            playing &= above
+            if self.goal is not None:
+                np.less(balances, self.goal, out=above)
+                playing &= above
+        self.ruined += (balances <= 0).sum(axis=0)
+        if self.goal is not None:
+            self.reached_goal += (balances >= self.goal).sum(axis=0)
+        self.final_balance_sum += balances.sum(axis=0, dtype=np.float64)
+        self.sessions += sessions
+
+    def run(self, rounds, chunk_rounds=None):
+        if chunk_rounds is None:
+            # About eight million round results (32 MB in float32) per chunk, whatever the number of policies
+            sessions_per_chunk = max(1, 8000000 // (len(self.policies) * self.session_rounds))
+            chunk_rounds = sessions_per_chunk * self.session_rounds
+        for true_counts, nets in round_chunks(rounds, chunk_rounds):
+            self.push_chunk(true_counts, nets)
+        return self
+
+    def get_rounds(self):
+        return int(self.bucket_rounds.sum())
+
+    def get_wagered(self):
+        return self.policies @ self.bucket_rounds
+
+    def get_ev(self):
+        return self.policies @ self.bucket_net / max(self.get_rounds(), 1)
+
+    def get_variance(self):
+        rounds = self.get_rounds()
+        ev = self.get_ev()
+        return np.maximum(self.policies ** 2 @ self.bucket_squares - rounds * ev * ev, 0) / max(rounds - 1, 1)
+
+    def get_ev_interval(self, z=Z_95):
+        ev = self.get_ev()
+        half_width = z * np.sqrt(self.get_variance() / max(self.get_rounds(), 1))
+        return ev - half_width, ev + half_width
+
+    def get_n0(self):
+        ev = self.get_ev()
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(ev != 0, self.get_variance() / (ev * ev), np.inf)
+
+    def get_risk_of_ruin(self):
+        return self.ruined / max(self.sessions, 1)
+
+    def best(self, number_of_policies=10, max_risk_of_ruin=1.0):
+        """ Indices of the winning policies with the lowest N0, among those within max_risk_of_ruin. """
+        n0s = np.where((self.get_ev() > 0) & (self.get_risk_of_ruin() <= max_risk_of_ruin), self.get_n0(), np.inf)
+        order = np.argsort(n0s, kind='stable')[:number_of_policies]
+        return [int(policy) for policy in order if np.isfinite(n0s[policy])]
+
+
+# ----------------------------------
+# DRIVER FUNCTION
+# ----------------------------------
+def main():
+    number_of_rounds = 200000
+    labels, policies = spread_policies()
+    labels.insert(0, 'spread_1_to_8')
+    policies = np.vstack((policy_table(spread_1_to_8), policies))
+    session_rounds = 1000
+    analytics = BankrollAnalytics(100, session_rounds, bet_size=spread_1_to_8)
+    sweep = PolicySweep(policies, 100, session_rounds)
+    strategy = StrategyTables.load_or_build(3)
+
+    # One pass over the stream feeds both
+    start = time.perf_counter()
+    sweep_seconds = 0.0
+    stream = simulated_rounds(number_of_rounds, strategy, rng=random.Random(0))
+    for true_counts, nets in round_chunks(stream, 10 * session_rounds):
+        analytics.run(zip(true_counts.tolist(), nets.tolist()))
+        sweep_start = time.perf_counter()
+        sweep.push_chunk(true_counts, nets)
+        sweep_seconds += time.perf_counter() - sweep_start
+    seconds = time.perf_counter() - start
+    print(f'{number_of_rounds} basic strategy rounds, Hi-Lo, in {seconds:.1f}s')
+    print('spread_1_to_8:')
+    print(analytics.summary())
+    print(f'Sweep of {len(policies)} policies in {sweep_seconds:.2f}s '
+          f'({len(policies) * number_of_rounds / sweep_seconds:,.0f} policy rounds/sec)')
+    evs, variances, n0s, risks = sweep.get_ev(), sweep.get_variance(), sweep.get_n0(), sweep.get_risk_of_ruin()
+    print(f'Sweep matches spread_1_to_8: EV {math.isclose(evs[0], analytics.get_ev())}, '
+          f'variance {math.isclose(variances[0], analytics.stats.get_variance())}, '
+          f'ruined {sweep.ruined[0] == analytics.ruined}, '
+          f'final balances {math.isclose(sweep.final_balance_sum[0], analytics.final_balances.mean * analytics.sessions)}')
+    print(f'Lowest N0 with risk of ruin under 5%, over {sweep.sessions} sessions:')
+    for policy in sweep.best(10, max_risk_of_ruin=0.05):
+        print(f'\t{labels[policy]}: EV {evs[policy]:+.4f}, N0 {n0s[policy]:,.0f}, risk of ruin {risks[policy]:.3f}')
+
+
+if __name__ == "__main__":
+    # execute only if run as a script
+    main()
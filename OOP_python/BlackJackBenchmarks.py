@@ -0,0 +1,167 @@
+import os
+import sys
+import tempfile
+import time
+from functools import partial
+
+from BlackJackGame import Shoe, CompactShoe, Hand, CARDS_BY_CODE, encode_card, SUIT
+from BlackJackGame import Game, ScriptedGameUI, Player, Dealer, TerminalRenderer, BufferedRenderer, NullRenderer
+from BlackJackStrategy import StrategyTables, _dealer_from
+
+"""
+Title: Benchmarks for the on-Terminal Blackjack game and its simulator.
+Run this file as a script to print every benchmark.
+
+"""
+
+
+# ----------------------------------
+# BENCHMARKS
+# ----------------------------------
+def shoe_memory(number_of_decks=8):
+    """ Bytes held by a full shoe: the container plus every distinct card object in it. """
+    object_shoe = Shoe(number_of_decks)
+    cards = object_shoe.get_cards()
+    object_bytes = sys.getsizeof(cards) + sum(sys.getsizeof(card) + sys.getsizeof(card.__dict__)
+                                              for card in cards)
+    compact_bytes = sys.getsizeof(CompactShoe(number_of_decks).get_codes())
+    print(f'{number_of_decks}-deck shoe memory:')
+    print(f'\tShoe (BlackJackCard objects): {len(cards)} objects, {object_bytes} bytes')
+    print(f'\tCompactShoe (one byte per card): 0 objects, {compact_bytes} bytes')
+
+
+def deal_cost(deck_counts=(1, 2, 8, 32, 128, 512), deals=200000):
+    """ Nanoseconds per dealt card, which should not grow with the size of the shoe. """
+    print('Deal cost per card (ns):')
+    print('\tdecks\tlist.pop(0)\tShoe\tCompactShoe')
+    for number_of_decks in deck_counts:
+        # The old way of dealing, for comparison: pop the top of a list of cards.
+        cards = Shoe(number_of_decks).get_cards()
+        pop_ns = _time_deals(lambda: partial(list(cards).pop, 0), deals, len(cards))
+        shoe_ns = _time_deals(lambda: Shoe(number_of_decks).deal_card, deals, len(cards))
+        compact_ns = _time_deals(lambda: CompactShoe(number_of_decks).deal_card, deals, len(cards))
+        print(f'\t{number_of_decks}\t{pop_ns:.0f}\t\t{shoe_ns:.0f}\t{compact_ns:.0f}')
+
+
+def _time_deals(make_dealer, deals, pile_size):
+    # Deal the first half of fresh shoes until `deals` cards were dealt, only timing the dealing.
+    per_pile = min(pile_size // 2, deals)
+    seconds = 0.0
+    dealt = 0
+    while dealt < deals:
+        deal = make_dealer()
+        start = time.perf_counter()
+        for _ in range(per_pile):
+            deal()
+        seconds += time.perf_counter() - start
+        dealt += per_pile
+    return seconds / dealt * 1e9
+
+
+def legacy_resolve_score(cards):
+    # Hand.resolve_score as it used to be: list every total, doubling the list for each Ace.
+    totals = [0]
+    for card in cards:
+        new_total = []
+        for score in totals:
+            new_total.append(card.get_game_value() + score)
+            if card.get_game_value() == 1:
+                new_total.append(11 + score)
+        totals = new_total
+    best_score = 0
+    for score in totals:
+        if 21 >= score > best_score:
+            best_score = score
+    return best_score
+
+
+def scoring_cost(max_aces=8, repeat=20000):
+    """
+    Nanoseconds per hit-and-score decision, for hands holding more and more Aces: the hit that brings in
+    the last card, then the score. The legacy hand appended the card and expanded every Ace to score,
+    Hand does its work in add_card, so both are timed together, each time on a hand of its own.
+    """
+    ace = CARDS_BY_CODE[encode_card(SUIT.SPADES, 1)]
+    two = CARDS_BY_CODE[encode_card(SUIT.HEARTS, 2)]
+    print('Scoring cost per decision (ns):')
+    print('\taces\tlegacy\tHand')
+    for aces in range(0, max_aces + 1):
+        # Every hand holds all the cards but the one it's hit with
+        hit = ace if aces else two
+        before_hit = [two, two] + [ace] * max(aces - 1, 0)
+        card_lists = [list(before_hit) for _ in range(repeat)]
+        start = time.perf_counter()
+        for cards in card_lists:
+            cards.append(hit)
+            legacy_resolve_score(cards)
+        legacy_ns = (time.perf_counter() - start) / repeat * 1e9
+        hands = []
+        for _ in range(repeat):
+            hand = Hand(two, two)
+            for card in before_hit[2:]:
+                hand.add_card(card)
+            hands.append(hand)
+        start = time.perf_counter()
+        for hand in hands:
+            hand.add_card(hit)
+            hand.resolve_score()
+        hand_ns = (time.perf_counter() - start) / repeat * 1e9
+        print(f'\t{aces}\t{legacy_ns:.0f}\t{hand_ns:.0f}')
+
+
+def strategy_tables(number_of_decks=8, lookups=200000):
+    """ Time to build the strategy tables, to load them from the disk cache, and to look a decision up. """
+    _dealer_from.cache_clear()
+    start = time.perf_counter()
+    StrategyTables.for_decks(number_of_decks)
+    build_seconds = time.perf_counter() - start
+    directory = tempfile.mkdtemp(prefix='blackjack_strategy_')
+    path = os.path.join(directory, 'strategy.json')
+    StrategyTables.load_or_build(number_of_decks, path)
+    start = time.perf_counter()
+    tables = StrategyTables.load_or_build(number_of_decks, path)
+    load_seconds = time.perf_counter() - start
+    os.remove(path)
+    os.rmdir(directory)
+    shoe = CompactShoe(number_of_decks)
+    hands = [(Hand(shoe.deal_card(), shoe.deal_card()), shoe.deal_card().get_game_value()) for _ in range(1000)]
+    lookup = tables.lookup
+    start = time.perf_counter()
+    for i in range(lookups):
+        hand, upcard = hands[i % 1000]
+        lookup(hand, upcard)
+    lookup_ns = (time.perf_counter() - start) / lookups * 1e9
+    print(f'Strategy tables for {number_of_decks} decks:')
+    print(f'\tbuild: {build_seconds * 1000:.1f} ms, load from disk: {load_seconds * 1000:.2f} ms, '
+          f'lookup: {lookup_ns:.0f} ns')
+
+
+def rendering_cost(rounds=5000):
+    """ Rounds per second through Game.play_round, writing each message, buffering per screen, or not at all. """
+    print('Game rounds/sec by renderer:')
+    with open(os.devnull, 'w') as devnull:
+        for renderer in (TerminalRenderer(devnull), BufferedRenderer(devnull), NullRenderer()):
+            player = Player()
+            game = Game(player, Dealer(), renderer, ScriptedGameUI)
+            start = time.perf_counter()
+            for on_round in range(1, rounds + 1):
+                player.set_balance(1000)
+                game.play_round(on_round)
+            seconds = time.perf_counter() - start
+            print(f'\t{type(renderer).__name__}: {rounds / seconds:,.0f}')
+
+
+# ----------------------------------
+# DRIVER FUNCTION
+# ----------------------------------
+def main():
+    shoe_memory()
+    deal_cost()
+    scoring_cost()
+    strategy_tables()
+    rendering_cost()
+
+
+if __name__ == "__main__":
+    # execute only if run as a script
+    main()
@@ -1,7 +1,10 @@
 from enum import Enum
 from abc import ABC, abstractmethod
+from functools import lru_cache
+from fractions import Fraction
 import datetime
 import random
+import sys
 
 """
 Title: Alright so, this is an on-Terminal Blackjack game for 1-player. (A python OOP exercise)
@@ -38,6 +41,34 @@ def join_lines(strings):
     return '\n'.join(''.join(lines) for lines in zip(*split_lines_list))
 
 
+def settle_hand(best_score, dealer_score, player_blackjack, dealer_blackjack, bet, blackjack_payout=1.5):
+    """
+    Settle one player hand against the dealer, following the house rules of Game.stand.
+    :param best_score: Resolved score of the player's hand (0 means bust)
+    :param dealer_score: Resolved score of the dealer's hand (0 means bust)
+    :param player_blackjack: True if the player's hand is a blackjack
+    :param dealer_blackjack: True if the dealer's hand is a blackjack
+    :param bet: The bet riding on the hand
+    :param blackjack_payout: What a blackjack pays per credit bet, 1.5 for 3:2 or 1.2 for 6:5
+    :return: Tuple of (OUTCOME, net change to the player's balance)
+    """
+    # If player has Blackjack and dealer doesn't.
+    if player_blackjack and not dealer_blackjack:
+        return OUTCOME.BLACKJACK, round(bet * blackjack_payout)
+    # If dealer instead has blackjack and player doesn't
+    elif dealer_blackjack and not player_blackjack:
+        return OUTCOME.LOSE_BY_BLACKJACK, -1 * bet
+    # If player scores better than dealer.
+    elif best_score > dealer_score:
+        return OUTCOME.WIN, bet
+    # If dealer scores better than player.
+    elif best_score < dealer_score:
+        return OUTCOME.LOSE, -1 * bet
+    # If both have equal score.
+    else:
+        return OUTCOME.TIE, 0
+
+
 def numbers_to_strings(argument):
     switcher = {
         11: "J",
@@ -51,15 +82,83 @@ def numbers_to_strings(argument):
 # ----------------------------------
 # FUNCTIONS FOR PRETTY CARD PRINTING
 # ----------------------------------
+@lru_cache(maxsize=None)
+def card_glyph(face_value, suit):
+    """ The lines of a card's ASCII drawing, formatted once per distinct card. """
+    return tuple(CARD.format(rank=numbers_to_strings(face_value), suit=name_to_symbol[suit.name]).splitlines())
+
+
 def card_to_string(card):
-    rank = card.get_face_value()
-    suit = card.get_suit().name
+    if isinstance(card, int):
+        card = CARDS_BY_CODE[card]
     # add the individual card on a line by line basis
-    return CARD.format(rank=numbers_to_strings(rank), suit=name_to_symbol[suit])
+    return '\n'.join(card_glyph(card.get_face_value(), card.get_suit())) + '\n'
+
+
+def cards_in_row_to_string(cards):
+    glyphs = [card_glyph(card.get_face_value(), card.get_suit()) for card in cards]
+    return '\n'.join(''.join(lines) for lines in zip(*glyphs))
+
+
+def pretty_print_cards_in_row(cards, renderer=None):
+    if renderer is None:
+        print(cards_in_row_to_string(cards))
+    else:
+        renderer.write(cards_in_row_to_string(cards))
+
+
+# ----------------------------------
+# RENDERERS
+# ----------------------------------
+# Everything the game shows goes through a renderer, which takes the same arguments as print.
+class Renderer(ABC):
+    @abstractmethod
+    def write(self, *values, sep=' ', end='\n'):
+        pass
+
+    def flush(self):
+        pass
+
+
+class TerminalRenderer(Renderer):
+    """ Writes every message straight to the stream, like print does on a terminal. """
+    def __init__(self, stream=None):
+        # param: stream, defaults to whatever sys.stdout is at the time of writing.
+        self.__stream = stream
 
+    def get_stream(self):
+        return self.__stream or sys.stdout
 
-def pretty_print_cards_in_row(cards):
-    print(join_lines(map(card_to_string, cards)))
+    def write(self, *values, sep=' ', end='\n'):
+        stream = self.get_stream()
+        stream.write(sep.join(map(str, values)) + end)
+        stream.flush()
+
+    def flush(self):
+        self.get_stream().flush()
+
+
+class BufferedRenderer(TerminalRenderer):
+    """ Collects a whole screen in a frame buffer and writes it out in one go on flush. """
+    def __init__(self, stream=None):
+        super().__init__(stream)
+        self.__frame = []
+
+    def write(self, *values, sep=' ', end='\n'):
+        self.__frame.append(sep.join(map(str, values)) + end)
+
+    def flush(self):
+        if self.__frame:
+            stream = self.get_stream()
+            stream.write(''.join(self.__frame))
+            stream.flush()
+            self.__frame.clear()
+
+
+class NullRenderer(Renderer):
+    """ Shows nothing, for headless runs. """
+    def write(self, *values, sep=' ', end='\n'):
+        pass
 
 
 # ----------------------------------
@@ -70,6 +169,11 @@ class SUIT(Enum):
     HEARTS, DIAMONDS, CLUBS, SPADES = 1, 2, 3, 4
 
 
+# Possible results of settling a hand.
+class OUTCOME(Enum):
+    BLACKJACK, WIN, TIE, LOSE, LOSE_BY_BLACKJACK, SURRENDER = 1, 2, 3, 4, 5, 6
+
+
 # The following class encapsulates a playing card
 class Card:
     def __init__(self, suit, face_value):
@@ -109,42 +213,236 @@ class Deck:
         return self.__cards
 
 
+# CountingSystem: the points ("tags") a card counter adds for every card seen, by game value.
+class CountingSystem:
+    def __init__(self, name, tags, balanced=True):
+        # param: tags, the tag of each game value, from Ace (1) to the 10s.
+        # param: balanced, False if a whole deck does not count up to 0, like KO.
+        self.__name = name
+        self.__tags = tuple(tags)
+        self.__balanced = balanced
+        # Same tags by card code (see COMPACT CARDS), so a CompactShoe needs a single lookup per card.
+        self.__tags_by_code = tuple(self.__tags[min(code // 4 + 1, 10) - 1] for code in range(52))
+
+    def get_name(self):
+        return self.__name
+
+    def get_tags(self):
+        return self.__tags
+
+    def get_tags_by_code(self):
+        return self.__tags_by_code
+
+    def is_balanced(self):
+        return self.__balanced
+
+    def initial_count(self, number_of_decks):
+        # Unbalanced counts start below 0 so the pivot lands where a balanced count would be 0 (KO: 4 - 4 * decks)
+        if self.__balanced:
+            return 0
+        return -sum(self.__tags_by_code) * (number_of_decks - 1)
+
+
+HI_LO = CountingSystem('Hi-Lo', (-1, 1, 1, 1, 1, 1, 0, 0, 0, -1))
+KO = CountingSystem('KO', (-1, 1, 1, 1, 1, 1, 1, 0, 0, -1), balanced=False)
+OMEGA_II = CountingSystem('Omega II', (0, 1, 1, 2, 2, 2, 1, 0, -1, -2))
+
+
+def full_composition(number_of_decks):
+    # Cards of each game value in a fresh shoe: index 0 is Aces, index 9 is all 10s.
+    return [4 * number_of_decks] * 9 + [16 * number_of_decks]
+
+
+def true_count(running_count, cards_left):
+    # Running count per deck left, with at least half a deck left, as counters estimate it at the table
+    return running_count * 52 / max(cards_left, 26)
+
+
 class Shoe:
-    def __init__(self, number_of_decks):
+    def __init__(self, number_of_decks, rng=random, penetration=1.0, counting_system=HI_LO, profiler=None):
+        # param: rng, anything with a shuffle() method: the random module, a seeded random.Random(seed),
+        #   or a numpy.random.Generator.
+        # param: penetration, the fraction of the shoe dealt before the cut card comes out.
+        # param: counting_system, how get_running_count() counts the cards dealt since the last shuffle.
+        # param: profiler, a PhaseProfiler (see BlackJackProfiler) to time dealing and shuffling with.
         self.__cards = []
+        self.__next_card = 0
         self.__number_of_decks = number_of_decks
+        self.__rng = rng
+        self.__counting_system = counting_system
+        self.__tags = (0,) + counting_system.get_tags()
+        self.__running_count = 0
+        self.__composition = []
         self.create_shoe()
+        self.__cut_card = int(len(self.__cards) * penetration)
+        if profiler is not None:
+            profiler.instrument_shoe(self)
         self.shuffle()
 
     def create_shoe(self):
         for decks in range(0, self.__number_of_decks):
             myDeck = Deck()
-            new_cards = myDeck.get_cards()
             self.__cards.extend(myDeck.get_cards())
 
     def shuffle(self):
-        card_count = len(self.__cards)
-        for i in range(0, card_count):
-            j = random.randrange(0, card_count - 1, 1)
-            self.__cards[i], self.__cards[j] = self.__cards[j], self.__cards[i]
+        # Fisher-Yates over the whole buffer, then deal from the top again
+        self.__rng.shuffle(self.__cards)
+        self.__next_card = 0
+        self.__running_count = self.__counting_system.initial_count(self.__number_of_decks)
+        self.__composition = full_composition(self.__number_of_decks)
+
+    # Put every card back and start over with a freshly shuffled shoe
+    def new_shoe(self):
+        self.shuffle()
+
+    def cut_card_reached(self):
+        return self.__next_card >= self.__cut_card
+
+    def get_cards_left(self):
+        return len(self.__cards) - self.__next_card
+
+    def get_cards(self):
+        return self.__cards
+
+    def get_counting_system(self):
+        return self.__counting_system
+
+    def get_running_count(self):
+        return self.__running_count
+
+    def get_true_count(self):
+        return true_count(self.__running_count, len(self.__cards) - self.__next_card)
+
+    def get_composition(self):
+        # Cards left of each game value, indexed like full_composition()
+        return tuple(self.__composition)
 
     # Get the next card from the shoe
     def deal_card(self):
-        if len(self.__cards) == 0:
-            self.create_shoe()
-        else:
-            dealt_card = self.__cards.pop(0)
-            return dealt_card
+        if self.__next_card == len(self.__cards):
+            self.new_shoe()
+        dealt_card = self.__cards[self.__next_card]
+        self.__next_card += 1
+        value = dealt_card.get_game_value()
+        self.__running_count += self.__tags[value]
+        self.__composition[value - 1] -= 1
+        return dealt_card
+
+
+# ----------------------------------
+# COMPACT CARDS
+# ----------------------------------
+# For simulation a card can be a small int instead of a BlackJackCard object:
+# code = (face_value - 1) * 4 + (suit.value - 1), so a deck is the codes 0..51.
+def encode_card(suit, face_value):
+    return (face_value - 1) * 4 + suit.value - 1
+
+
+def decode_card(code):
+    return SUIT(code % 4 + 1), code // 4 + 1
+
+
+# Lookup table from card code to game value, usable with bytes.translate() to
+# convert a whole buffer of codes to game values in one call.
+GAME_VALUE_TABLE = bytes(min(code // 4 + 1, 10) if code < 52 else 0 for code in range(256))
+
+# One shared BlackJackCard per code, so compact cards can be handed to Hand and card_to_string.
+CARDS_BY_CODE = tuple(BlackJackCard(*decode_card(code)) for code in range(52))
+
+
+class CompactShoe:
+    """ A Shoe that keeps its cards as one byte per card, instead of one object per card. """
+    def __init__(self, number_of_decks, rng=random, penetration=1.0, counting_system=HI_LO):
+        self.__cards = bytearray()
+        self.__next_card = 0
+        self.__number_of_decks = number_of_decks
+        self.__rng = rng
+        self.__counting_system = counting_system
+        self.__tags = counting_system.get_tags_by_code()
+        self.__running_count = 0
+        self.__left_by_code = []
+        self.create_shoe()
+        self.__cut_card = int(len(self.__cards) * penetration)
+        self.shuffle()
+
+    def create_shoe(self):
+        self.__cards.extend(bytes(range(52)) * self.__number_of_decks)
+
+    def shuffle(self):
+        # Shuffling through a memoryview lets a numpy.random.Generator shuffle the buffer in place
+        self.__rng.shuffle(memoryview(self.__cards))
+        self.__next_card = 0
+        self.__running_count = self.__counting_system.initial_count(self.__number_of_decks)
+        self.__left_by_code = [self.__number_of_decks] * 52
+
+    def new_shoe(self):
+        self.shuffle()
+
+    def cut_card_reached(self):
+        return self.__next_card >= self.__cut_card
+
+    def get_cards_left(self):
+        return len(self.__cards) - self.__next_card
+
+    def get_codes(self):
+        return self.__cards
+
+    def get_game_values(self):
+        # Game value of every card left in the shoe, in dealing order
+        return self.__cards[self.__next_card:].translate(GAME_VALUE_TABLE)
+
+    def get_counting_system(self):
+        return self.__counting_system
+
+    def get_running_count(self):
+        return self.__running_count
+
+    def get_true_count(self):
+        return true_count(self.__running_count, len(self.__cards) - self.__next_card)
+
+    def get_composition(self):
+        # Counted per card code, so dealing is one lookup; codes 36 to 51 are the 10s
+        left = self.__left_by_code
+        return tuple(sum(left[code:code + 4]) for code in range(0, 36, 4)) + (sum(left[36:]),)
+
+    # Get the code of the next card from the shoe
+    def deal_code(self):
+        if self.__next_card == len(self.__cards):
+            self.new_shoe()
+        code = self.__cards[self.__next_card]
+        self.__next_card += 1
+        self.__running_count += self.__tags[code]
+        self.__left_by_code[code] -= 1
+        return code
+
+    # Get the next card from the shoe, as a shared BlackJackCard
+    def deal_card(self):
+        return CARDS_BY_CODE[self.deal_code()]
 
 
 # Hand: Hand class encapsulates a blackjack hand which can contain multiple cards:
 class Hand:
-    def __init__(self, blackjack_card1, blackjack_card2):
-        self.__cards = [blackjack_card1, blackjack_card2]
+    def __init__(self, blackjack_card1, blackjack_card2, bet=0, split=False):
+        # param: bet, the credits riding on this hand. Doubling down or splitting a hand doesn't touch the others.
+        # param: split, True for the hands made by splitting a pair.
+        self.__cards = []
         self.__stand_state = False
+        self.__bet = bet
+        self.__split = split
+        self.__surrendered = False
+        # Scores are kept up to date as cards come in: the total with every Ace counted as 1,
+        # and how many Aces could still be counted as 11 instead.
+        self.__hard_total = 0
+        self.__soft_ace_count = 0
+        self.add_card(blackjack_card1)
+        self.add_card(blackjack_card2)
 
     def add_card(self, card):
         self.__cards.append(card)
+        value = card.get_game_value()
+        self.__hard_total += value
+        if value == 1:
+            self.__soft_ace_count += 1
 
     def get_cards(self):
         return self.__cards
@@ -158,39 +456,149 @@ class Hand:
     def set_stand_state(self, boolean):
         self.__stand_state = boolean
 
+    def get_bet(self):
+        return self.__bet
+
+    def set_bet(self, bet):
+        self.__bet = bet
+
+    def is_split(self):
+        return self.__split
+
+    def is_surrendered(self):
+        return self.__surrendered
+
+    def surrender(self):
+        self.__surrendered = True
+        self.__stand_state = True
+
+    def get_hard_total(self):
+        return self.__hard_total
+
+    def is_soft(self):
+        # An Ace can count as 11 without busting the hand
+        return self.__soft_ace_count > 0 and self.__hard_total <= 11
+
+    def get_state(self):
+        # The hand as one small int, 2 * hard total (every bust total as 22) + holds an Ace, for Rules tables
+        return 2 * min(self.__hard_total, 22) + (self.__soft_ace_count > 0)
+
     def get_scores(self):
         """ Summarize the face value of each card, but
         if an Ace is involved then there are 2 versions of the score """
-        totals = [0]
-        for card in self.__cards:
-            new_total = []
-            for score in totals:
-                new_total.append(card.get_game_value() + score)
-                if card.get_game_value() == 1:
-                    new_total.append(11 + score)
-                else:
-                    continue
-            totals = new_total
-        return totals
+        return [self.__hard_total + 10 * aces for aces in range(self.__soft_ace_count + 1)]
 
     # get highest score which is less than or equal to 21
     def resolve_score(self):
-        scores = self.get_scores()
-        best_score = 0
-        for score in scores:
-            if 21 >= score > best_score:
-                best_score = score
-            else:
-                continue
-        return best_score
+        if self.__hard_total > 21:
+            return 0
+        elif self.__soft_ace_count > 0 and self.__hard_total <= 11:
+            return self.__hard_total + 10
+        else:
+            return self.__hard_total
 
     def get_final_score(self):
-        if self.resolve_score() == 0:
-            return self.get_scores()[0]
+        if self.__hard_total > 21:
+            return self.__hard_total
         else:
             return self.resolve_score()
 
 
+# Rules: the house rules a Game or Simulator plays by.
+class Rules:
+    def __init__(self, name="House", dealer_hits_soft_17=False, double_after_split=True, double_any_cards=True,
+                 max_hands=None, surrender=False, blackjack_payout=1.5):
+        # param: double_any_cards, False to only allow doubling down on the first two cards of a hand.
+        # param: max_hands, how many hands splitting and resplitting can make, None for no limit.
+        # param: surrender, allow giving up the first two cards for half the bet (late surrender:
+        #        against a dealer blackjack the whole bet is lost).
+        # param: blackjack_payout, what a blackjack pays per credit bet, 1.5 for 3:2 or 1.2 for 6:5.
+        self.name = name
+        self.dealer_hits_soft_17 = dealer_hits_soft_17
+        self.double_after_split = double_after_split
+        self.double_any_cards = double_any_cards
+        self.max_hands = max_hands
+        self.surrender = surrender
+        self.blackjack_payout = blackjack_payout
+        self.compile()
+
+    def compile(self):
+        """
+        Fills the lookup tables the fast paths use instead of if chains; call again after changing a rule.
+        dealer_hits_by_state: does the dealer draw, by Hand.get_state().
+        outcome_table: OUTCOME by settle_key(player) * 23 + settle_key(dealer).
+        payouts: net per credit bet, by OUTCOME value.
+        """
+        self.dealer_hits_by_state = tuple(self.__dealer_hits(state // 2, state % 2 == 1) for state in range(64))
+        keys = [(21, True) if key == 22 else (key, False) for key in range(23)]
+        self.outcome_table = tuple(settle_hand(player_score, dealer_score, player_blackjack, dealer_blackjack, 1)[0]
+                                   for player_score, player_blackjack in keys for dealer_score, dealer_blackjack in keys)
+        self.payouts = [0.0] * (max(outcome.value for outcome in OUTCOME) + 1)
+        for outcome, payout in ((OUTCOME.BLACKJACK, self.blackjack_payout), (OUTCOME.WIN, 1), (OUTCOME.TIE, 0),
+                                (OUTCOME.LOSE, -1), (OUTCOME.LOSE_BY_BLACKJACK, -1), (OUTCOME.SURRENDER, -0.5)):
+            self.payouts[outcome.value] = payout
+
+    def __dealer_hits(self, hard_total, has_ace):
+        if hard_total > 21:
+            return False
+        soft = has_ace and hard_total <= 11
+        score = hard_total + 10 if soft else hard_total
+        return score < 17 or (score == 17 and soft and self.dealer_hits_soft_17)
+
+    def dealer_hits(self, hand):
+        return self.dealer_hits_by_state[hand.get_state()]
+
+    def get_payout_name(self):
+        # 1.5 -> "3:2"
+        payout = Fraction(self.blackjack_payout).limit_denominator(10)
+        return f'{payout.numerator}:{payout.denominator}'
+
+    def can_double(self, hand):
+        return ((self.double_any_cards or len(hand.get_cards()) == 2)
+                and (self.double_after_split or not hand.is_split()))
+
+    def can_split(self, hand, number_of_hands):
+        cards = hand.get_cards()
+        return (len(cards) == 2 and cards[0].get_face_value() == cards[1].get_face_value()
+                and (self.max_hands is None or number_of_hands < self.max_hands))
+
+    def can_surrender(self, hand, number_of_hands):
+        return self.surrender and number_of_hands == 1 and len(hand.get_cards()) == 2 and not hand.is_split()
+
+    def get_actions(self, hand, number_of_hands):
+        actions = ["hit", "stand"]
+        if self.can_double(hand):
+            actions.append("double down")
+        if self.can_split(hand, number_of_hands):
+            actions.append("split")
+        if self.can_surrender(hand, number_of_hands):
+            actions.append("surrender")
+        return actions
+
+    def net(self, outcome, bet):
+        # Same rounding as settle_hand
+        return round(bet * self.payouts[outcome.value])
+
+    def __repr__(self):
+        return (f'{self.name}: dealer {"hits" if self.dealer_hits_soft_17 else "stands on"} soft 17, '
+                f'{"double after split" if self.double_after_split else "no double after split"}, '
+                f'double on {"any cards" if self.double_any_cards else "two cards"}, '
+                f'{"split to " + str(self.max_hands) + " hands" if self.max_hands else "unlimited resplits"}, '
+                f'{"late surrender" if self.surrender else "no surrender"}, blackjack pays {self.get_payout_name()}')
+
+
+def settle_key(score, blackjack):
+    # Index of a hand in Rules.outcome_table: its score (0 is bust), or 22 for a blackjack
+    return 22 if blackjack else score
+
+
+# The rules Game always played by, and some common ones to compare them with.
+HOUSE_RULES = Rules()
+VEGAS_STRIP_RULES = Rules("Vegas Strip", double_any_cards=False, max_hands=4, surrender=True)
+DOWNTOWN_RULES = Rules("Downtown", dealer_hits_soft_17=True, double_any_cards=False, max_hands=4)
+SIX_FIVE_RULES = Rules("6:5", dealer_hits_soft_17=True, double_any_cards=False, max_hands=4, blackjack_payout=1.2)
+
+
 class BasePlayer(ABC):
     def __init__(self, balance):
         self.__balance = balance
@@ -228,7 +636,7 @@ class BasePlayer(ABC):
             return False
 
     @abstractmethod
-    def print_hands(self, _format):
+    def print_hands(self, _format, renderer=None):
         pass
 
 
@@ -260,16 +668,17 @@ class Player(BasePlayer):
     def add_to_balance(self, cash):
         self.__balance = self.__balance + cash
 
-    def print_hands(self, _format='ascii'):
+    def print_hands(self, _format='ascii', renderer=None):
+        write = print if renderer is None else renderer.write
         hand_number = 0
         for hand in super().get_hands():
             hand_number = hand_number + 1
-            print(f'Player Hand #{hand_number}:')
+            write(f'Player Hand #{hand_number}:')
             if _format == "text":
                 for card in hand.get_cards():
-                    print("\tA Card Shows:", card.get_face_value(), "of", card.get_suit().name)
+                    write("\tA Card Shows:", card.get_face_value(), "of", card.get_suit().name)
             else:
-                pretty_print_cards_in_row(hand.get_cards())
+                pretty_print_cards_in_row(hand.get_cards(), renderer)
 
 
 # Dealer: Dealer class extends from BasePlayer:
@@ -277,41 +686,53 @@ class Dealer(BasePlayer):
     def __init__(self, balance=1000):
         super().__init__(balance)
 
-    def print_first_card(self, _format="ascii"):
-        dealers_hand = super().get_hands()
-        dealers_hand_copy = Hand(dealers_hand[0].get_cards()[0], dealers_hand[0].get_cards()[0])
-        dealers_hand_copy.get_cards().pop()
-        dealers_first_card = dealers_hand_copy
+    def print_first_card(self, _format="ascii", renderer=None):
+        write = print if renderer is None else renderer.write
+        dealers_first_card = super().get_hands()[0].get_cards()[0]
         if _format == "text":
-            print("\tA Card Shows:", dealers_first_card.get_face_value(),
+            write("\tA Card Shows:", dealers_first_card.get_face_value(),
                   "of", dealers_first_card.get_suit().name)
         else:
-            pretty_print_cards_in_row(dealers_hand_copy.get_cards())
+            pretty_print_cards_in_row([dealers_first_card], renderer)
 
-    def print_hands(self, _format="ascii"):
+    def print_hands(self, _format="ascii", renderer=None):
+        write = print if renderer is None else renderer.write
         for hand in super().get_hands():
             if _format == "text":
                 for card in hand.get_cards():
-                    print("\tA Card Shows:", card.get_face_value(), "of", card.get_suit().name)
+                    write("\tA Card Shows:", card.get_face_value(), "of", card.get_suit().name)
             else:
-                pretty_print_cards_in_row(hand.get_cards())
+                pretty_print_cards_in_row(hand.get_cards(), renderer)
 
 
 # Game: This class encapsulates a blackjack game:
 class Game:
-    def __init__(self, player, dealer):
+    def __init__(self, player, dealer, renderer=None, game_ui_class=None, history=None, rules=HOUSE_RULES,
+                 profiler=None):
+        # param: renderer, where the game is shown: TerminalRenderer (default), BufferedRenderer or NullRenderer.
+        # param: game_ui_class, a GameUI subclass to take the user's input from somewhere else.
+        # param: history, a HandHistoryWriter (see BlackJackHistory) that every bet, card, action and payout goes to.
+        # param: rules, the Rules of the table.
+        # param: profiler, a PhaseProfiler (see BlackJackProfiler) to time each phase of a round with.
         self.__player = player
         self.__dealer = dealer
-        self.__gameUI = GameUI(player, dealer)
+        self.__history = history
+        self.__rules = rules
+        self.__gameUI = (game_ui_class or GameUI)(player, dealer, renderer, rules)
+        self.__renderer = self.__gameUI.get_renderer()
         self.__MAX_NUM_OF_DECKS = 3
-        self.__shoe = Shoe(self.__MAX_NUM_OF_DECKS)
+        self.__shoe = Shoe(self.__MAX_NUM_OF_DECKS, profiler=profiler)
+        if profiler is not None:
+            profiler.instrument_game(self)
 
     def play_action(self, action, hand):
-        print(f'(Your action was: {action})')
+        self.__renderer.write(f'(Your action was: {action})')
+        if self.__history is not None:
+            self.__history.action(self.__player.get_hands().index(hand), action.lower())
         if action.lower() == "hit":
             self.hit(hand)
-            print(f'->[] You were dealt a: {hand.get_cards()[-1].get_face_value()}'
-                  f' of {hand.get_cards()[-1].get_suit().name}')
+            self.__renderer.write(f'->[] You were dealt a: {hand.get_cards()[-1].get_face_value()}'
+                                  f' of {hand.get_cards()[-1].get_suit().name}')
             self.bust_check(hand)
 
         elif action.lower() == "split":
@@ -321,22 +742,25 @@ class Game:
             self.stand(hand)
         elif action.lower() == "double down":
             self.double_down(hand)
+        elif action.lower() == "surrender":
+            hand.surrender()
+            self.stand(hand)
         else:
-            print("\nError Invalid Action!")
+            self.__renderer.write("\nError Invalid Action!")
 
     def dealer_plays(self):
         dealers_hand = self.__dealer.get_hands()[0]
         while True:
             best_score = dealers_hand.resolve_score()
             if best_score == 0:
-                print("Yep, dealer went BUST!\n")
+                self.__renderer.write("Yep, dealer went BUST!\n")
                 break
-            elif best_score < 17:
+            elif self.__rules.dealer_hits(dealers_hand):
                 self.hit(dealers_hand)
                 # Print latest added card to hand.
-                print(f'->[] Dealer was dealt a:'
-                      f' {dealers_hand.get_cards()[-1].get_face_value()}'
-                      f' of {dealers_hand.get_cards()[-1].get_suit().name}')
+                self.__renderer.write(f'->[] Dealer was dealt a:'
+                                      f' {dealers_hand.get_cards()[-1].get_face_value()}'
+                                      f' of {dealers_hand.get_cards()[-1].get_suit().name}')
             else:
                 break
         return best_score
@@ -344,6 +768,8 @@ class Game:
     def hit(self, hand):
         new_card = self.__shoe.deal_card()
         hand.add_card(new_card)
+        if self.__history is not None:
+            self.__history.deal(new_card, dealer=hand in self.__dealer.get_hands())
 
     def bust_check(self, hand):
         if hand.resolve_score() == 0:
@@ -359,48 +785,48 @@ class Game:
         if self.__player.all_hands_standing():
             dealers_hand = self.__dealer.get_hands()[0]
             hands = self.__player.get_hands()
-            print("\n\n_____________________________"
-                  "\n     S E T T L E M E N T!    ")
-            print("No. Hands:", len(hands))
-            print(f'Total bet is at: {self.__player.get_bet()}')
+            self.__renderer.write("\n\n_____________________________"
+                                  "\n     S E T T L E M E N T!    ")
+            self.__renderer.write("No. Hands:", len(hands))
+            self.__renderer.write(f'Total bet is at: {sum(hand.get_bet() for hand in hands)}')
             self.__gameUI.show_all_hands()
-            for hand in hands:
-                # If player's hand is busted or dealer has under 16, no need for the dealer to play any further.
-                if hand.resolve_score() is not 0 and dealers_hand.resolve_score() < 17:
+            for hand_num, hand in enumerate(hands):
+                if hand.is_surrendered():
+                    # Late surrender: half the bet back, unless the dealer turns out to have blackjack.
+                    if self.__dealer.has_blackjack(dealers_hand):
+                        outcome = OUTCOME.LOSE_BY_BLACKJACK
+                    else:
+                        outcome = OUTCOME.SURRENDER
+                    net = self.__rules.net(outcome, hand.get_bet())
+                    self.__gameUI.outcome_msg(outcome)
+                    self.__player.add_to_balance(net)
+                    if self.__history is not None:
+                        self.__history.settle(hand_num, outcome, net)
+                    continue
+                # If player's hand is busted or the dealer has to stand, no need for the dealer to play any further.
+                if hand.resolve_score() != 0 and self.__rules.dealer_hits(dealers_hand):
                     dealer_score = self.dealer_plays()
                     self.__gameUI.show_all_hands()
                 else:
                     dealer_score = dealers_hand.resolve_score()
-                print(f'Dealer has:{dealers_hand.get_final_score()}')
-                print(f'And Player has:{hand.get_final_score()}')
-                best_score = hand.resolve_score()
-                # If player has Blackjack and dealer doesn't.
-                if self.__player.has_blackjack(hand) and not self.__dealer.has_blackjack(dealers_hand):
-                    self.__gameUI.win_by_blackjack_msg()
-                    self.__player.add_to_balance(round(self.__player.get_bet() * 1.5))
-                # If dealer instead has blackjack and player doesn't
-                elif self.__dealer.has_blackjack(dealers_hand) and not self.__player.has_blackjack(hand):
-                    self.__gameUI.lose_by_blackjack_msg()
-                    self.__player.add_to_balance(-1 * self.__player.get_bet())
-                # If player scores better than dealer.
-                elif best_score > dealer_score:
-                    self.__gameUI.win_msg()
-                    self.__player.add_to_balance(self.__player.get_bet())
-                # If dealer scores better than player.
-                elif best_score < dealer_score:
-                    self.__gameUI.lose_msg()
-                    self.__player.add_to_balance(-1 * self.__player.get_bet())
-                # If both have equal score.
-                else:
-                    self.__gameUI.tie_msg()
+                self.__renderer.write(f'Dealer has:{dealers_hand.get_final_score()}')
+                self.__renderer.write(f'And Player has:{hand.get_final_score()}')
+                outcome, net = settle_hand(hand.resolve_score(), dealer_score,
+                                           self.__player.has_blackjack(hand),
+                                           self.__dealer.has_blackjack(dealers_hand),
+                                           hand.get_bet(), self.__rules.blackjack_payout)
+                self.__gameUI.outcome_msg(outcome)
+                self.__player.add_to_balance(net)
+                if self.__history is not None:
+                    self.__history.settle(hand_num, outcome, net)
         else:
             pass
 
     def double_down(self, hand):
-        self.__player.place_bet(self.__player.get_bet() * 2)
+        hand.set_bet(hand.get_bet() * 2)
         self.hit(hand)
-        print(f'->[] You were dealt a: {hand.get_cards()[-1].get_face_value()}'
-              f' of {hand.get_cards()[-1].get_suit().name}')
+        self.__renderer.write(f'->[] You were dealt a: {hand.get_cards()[-1].get_face_value()}'
+                              f' of {hand.get_cards()[-1].get_suit().name}')
         self.bust_check(hand)
         if not hand.get_stand_state():
             hand.set_stand_state(True)
@@ -409,85 +835,133 @@ class Game:
             pass
 
     def split(self, hand):
-        # Player gets 2 hands
+        # Player gets 2 hands, each with the bet of the one split
         cards = hand.get_cards()
-        self.__player.add_hand(Hand(cards[0], self.__shoe.deal_card()))
-        self.__player.add_hand(Hand(cards[1], self.__shoe.deal_card()))
+        self.__player.add_hand(Hand(cards[0], self.__shoe.deal_card(), hand.get_bet(), split=True))
+        self.__player.add_hand(Hand(cards[1], self.__shoe.deal_card(), hand.get_bet(), split=True))
         self.__player.remove_hand(hand)
+        if self.__history is not None:
+            for new_hand in self.__player.get_hands()[-2:]:
+                self.__history.deal(new_hand.get_cards()[1])
+
+    def get_game_ui(self):
+        return self.__gameUI
+
+    # ---- The steps of a round, for anything driving the game other than play_round ----
+    def deal_round(self, bet):
+        # Shuffle between rounds, once the cut card came out
+        if self.__shoe.cut_card_reached():
+            self.__shoe.new_shoe()
+        self.__player.place_bet(bet)
+        # Deal to Player
+        player_hand = Hand(self.__shoe.deal_card(),
+                           self.__shoe.deal_card(), bet)
+        self.__player.add_hand(player_hand)
+        # Deal to Dealer
+        dealer_hand = Hand(self.__shoe.deal_card(),
+                           self.__shoe.deal_card())
+        self.__dealer.add_hand(dealer_hand)
+        if self.__history is not None:
+            self.__history.round(bet)
+            for card in player_hand.get_cards():
+                self.__history.deal(card)
+            for card in dealer_hand.get_cards():
+                self.__history.deal(card, dealer=True)
+        # Show cards to User
+        self.__gameUI.show_starting_hands()
+        return player_hand, dealer_hand
+
+    def offers_insurance(self):
+        dealer_hand = self.__dealer.get_hands()[0]
+        return dealer_hand.get_first_card_value() == 10 or dealer_hand.get_first_card_value() == 1
+
+    def settle_insurance(self, accepted):
+        # Returns True if the insurance bet ended the round.
+        if accepted:
+            player_hand = self.__player.get_hands()[0]
+            dealer_hand = self.__dealer.get_hands()[0]
+            self.__player.place_side_bet(round(0.5 * self.__player.get_bet()))
+            # Resolve to Side bet/Insurance bet.
+            if self.__dealer.has_blackjack(dealer_hand):
+                player_hand.set_stand_state(True)
+                self.stand(player_hand)
+                self.__gameUI.insurance_win_msg()
+                self.__player.add_to_balance(2 * self.__player.get_side_bet())
+                if self.__history is not None:
+                    self.__history.insurance(self.__player.get_side_bet(), 2 * self.__player.get_side_bet())
+                return True
+            else:
+                self.__gameUI.insurance_lose_msg()
+                self.__player.add_to_balance(-1 * self.__player.get_side_bet())
+                if self.__history is not None:
+                    self.__history.insurance(self.__player.get_side_bet(), -1 * self.__player.get_side_bet())
+                # Then we continue to play the round.
+        else:
+            self.__renderer.write("No...? Well fine then, it's your credits after all!")
+            if self.__history is not None:
+                self.__history.insurance(0, 0)
+        return False
+
+    def auto_stand(self, hand):
+        # Returns True if the hand is 21, which then stands by itself.
+        if hand.resolve_score() == 21:
+            self.__renderer.write("Good hand! You have 21.")
+            hand.set_stand_state(True)
+            self.stand(hand)
+            return True
+        return False
+
+    def end_round(self):
+        self.__player.clear_hands()
+        self.__dealer.clear_hands()
+
+    def play_round(self, on_round):
+        # ---- GAME: Start Screen ----
+        self.__gameUI.start_screen(on_round)
+        self.deal_round(self.__gameUI.get_bet_from_user())
+
+        # ---- GAME: Insurance Scenario ----
+        if self.offers_insurance():
+            self.__gameUI.offer_insurance_msg()
+            if self.settle_insurance(self.__gameUI.get_insurance_bet_from_user() == "y"):
+                # Clear Hands and Move on to next round!
+                self.end_round()
+                return
+
+        # ---- GAME: Main Event ----
+        # Break out of this loop for a new round!
+        while True:
+            action = ""
+            hands = self.__player.get_hands()
+            for hand_num, hand in enumerate(hands):
+                if not hand.get_stand_state():
+                    if not self.auto_stand(hand):
+                        # User gets to choose an action.
+                        self.__gameUI.show_scores(hand_num)
+                        action = self.__gameUI.get_user_action(hand)
+                        self.play_action(action, hand)
+                        if action == 'split':
+                            break
+                        else:
+                            continue
+                else:
+                    continue
+            if self.__player.all_hands_standing():
+                self.__renderer.write("Moving on to the next round... ")
+                break
+            else:
+                self.__gameUI.show_starting_hands()
+        # Ending the round.
+        self.end_round()
 
     def start(self):
         while True:
             self.__player.set_balance(1000)
+            if self.__history is not None:
+                self.__history.session(1000)
             on_round = 1
             while True:
-                # ---- GAME: Start Screen ----
-                self.__gameUI.start_screen(on_round)
-                my_bet = self.__gameUI.get_bet_from_user()
-                self.__player.place_bet(my_bet)
-                # Deal to Player
-                player_hand = Hand(self.__shoe.deal_card(),
-                                   self.__shoe.deal_card())
-                self.__player.add_hand(player_hand)
-                # Deal to Dealer
-                dealer_hand = Hand(self.__shoe.deal_card(),
-                                   self.__shoe.deal_card())
-                self.__dealer.add_hand(dealer_hand)
-                # Show cards to User
-                self.__gameUI.show_starting_hands()
-
-                # ---- GAME: Insurance Scenario ----
-                if dealer_hand.get_first_card_value() is 10 or dealer_hand.get_first_card_value() is 1:
-                    self.__gameUI.offer_insurance_msg()
-                    if self.__gameUI.get_insurance_bet_from_user() == "y":
-                        self.__player.place_side_bet(round(0.5 * my_bet))
-                        # Resolve to Side bet/Insurance bet.
-                        if self.__dealer.has_blackjack(dealer_hand):
-                            player_hand.set_stand_state(True)
-                            self.stand(player_hand)
-                            self.__gameUI.insurance_win_msg()
-                            self.__player.add_to_balance(2 * self.__player.get_side_bet())
-                            # Clear Hands and Move on to next round!
-                            self.__player.clear_hands()
-                            self.__dealer.clear_hands()
-                            continue
-                        else:
-                            self.__gameUI.insurance_lose_msg()
-                            self.__player.add_to_balance(-1 * self.__player.get_side_bet())
-                            # Then we continue to play the round.
-                    else:
-                        print("No...? Well fine then, it's your credits after all!")
-
-                # ---- GAME: Main Event ----
-                # Break out of this loop for a new round!
-                while True:
-                    action = ""
-                    hands = self.__player.get_hands()
-                    for hand_num, hand in enumerate(hands):
-                        if not hand.get_stand_state():
-                            if hand.resolve_score() == 21:
-                                # Hand is 21, then auto-stand.
-                                print("Good hand! You have 21.")
-                                hand.set_stand_state(True)
-                                self.stand(hand)
-                            else:
-                                # User gets to choose an action.
-                                self.__gameUI.show_scores(hand_num)
-                                action = self.__gameUI.get_user_action(hand)
-                                self.play_action(action, hand)
-                                if action == 'split':
-                                    break
-                                else:
-                                    continue
-                        else:
-                            continue
-                    if self.__player.all_hands_standing():
-                        print("Moving on to the next round... ")
-                        break
-                    else:
-                        self.__gameUI.show_starting_hands()
-                # Ending the round.
-                self.__player.clear_hands()
-                self.__dealer.clear_hands()
+                self.play_round(on_round)
                 if self.__player.get_balance() <= 0:
                     self.__gameUI.game_over_screen()
                     break
@@ -497,87 +971,96 @@ class Game:
                 else:
                     on_round = on_round + 1
             # Offer the User a Restart
-            if input("Do you want to restart [Y/N]?").lower() == "n":
+            if self.__gameUI.ask("Do you want to restart [Y/N]?").lower() == "n":
                 break
             else:
                 continue
-        print("Thank you for playing...Good bye ;)")
+        self.__renderer.write("Thank you for playing...Good bye ;)")
+        self.__renderer.flush()
+        if self.__history is not None:
+            self.__history.flush()
 
 
 # GameUI: This class contains functions for user prompts and messages:
 class GameUI:
-    def __init__(self, player, dealer):
+    def __init__(self, player, dealer, renderer=None, rules=HOUSE_RULES):
         self.__player = player
         self.__dealer = dealer
+        self.__renderer = TerminalRenderer() if renderer is None else renderer
+        self.__rules = rules
+
+    def get_renderer(self):
+        return self.__renderer
+
+    def ask(self, prompt):
+        # Show the whole screen before waiting on the user
+        self.__renderer.flush()
+        return input(prompt)
+
+    def get_available_actions(self, hand):
+        # What the rules allow for this hand, e.g. split only for a pair
+        return self.__rules.get_actions(hand, len(self.__player.get_hands()))
 
-    @staticmethod
-    def get_user_action(hand):
-        list_of_actions = ["hit", "stand", "double down"]
+    def get_user_action(self, hand):
+        list_of_actions = self.get_available_actions(hand)
 
         while True:
-            print("_____________________________"
-                  "\n  T I M E   T O   P L A Y! ")
-            # Check for Split scenario
-            cards = hand.get_cards()
-            if len(cards) == 2 and cards[0].get_face_value() == cards[1].get_face_value():
-                if "split" not in list_of_actions:
-                    list_of_actions.append("split")
-                print('Your options are:', *list_of_actions, sep='\n\t')
-                player_action = input("Do you want to do?:\n")
-            else:
-                print('Your options are:', *list_of_actions, sep='\n\t')
-                player_action = input("Do you want to do?:\n")
+            self.__renderer.write("_____________________________"
+                                  "\n  T I M E   T O   P L A Y! ")
+            self.__renderer.write('Your options are:', *list_of_actions, sep='\n\t')
+            player_action = self.ask("Do you want to do?:\n")
             # Validate Player Action
             if player_action.lower() in list_of_actions:
                 return player_action
             else:
-                print("x x x x x x x x x x x x")
-                print("Error! Invalid action!")
-                print("x x x x x x x x x x x x")
+                self.__renderer.write("x x x x x x x x x x x x")
+                self.__renderer.write("Error! Invalid action!")
+                self.__renderer.write("x x x x x x x x x x x x")
                 continue  # Try again, for a valid action.
 
     def get_bet_from_user(self):
         while True:
             try:
-                bet = int(input("Place your bet!:\n"))
+                bet = int(self.ask("Place your bet!:\n"))
             except ValueError:
-                print("Sorry, I didn't understand that. Try Again.")
+                self.__renderer.write("Sorry, I didn't understand that. Try Again.")
                 continue
             else:
-                if bet <= self.__player.get_balance():
-                    print(f'Ok, You are betting {bet} credits.')
+                if bet < 0:
+                    self.__renderer.write("Sorry, a bet can't be negative. Try Again.")
+                elif bet <= self.__player.get_balance():
+                    self.__renderer.write(f'Ok, You are betting {bet} credits.')
                     break
                 else:
-                    print(f'Sorry, but that is more then your current balance: {self.__player.get_balance()}')
-                    print("\nTry entering a lower amount.")
+                    self.__renderer.write(f'Sorry, but that is more then your current balance: {self.__player.get_balance()}')
+                    self.__renderer.write("\nTry entering a lower amount.")
         return bet
 
-    @staticmethod
-    def get_insurance_bet_from_user():
+    def get_insurance_bet_from_user(self):
         while True:
-            player_response = input("Accept Insurance Bet? [Y/N]").lower()
+            player_response = self.ask("Accept Insurance Bet? [Y/N]").lower()
             if player_response == "y" or player_response == "n":
                 break
             else:
-                print("x x x x x x x x x x x x")
-                print("Error! Invalid action!")
-                print("x x x x x x x x x x x x")
+                self.__renderer.write("x x x x x x x x x x x x")
+                self.__renderer.write("Error! Invalid action!")
+                self.__renderer.write("x x x x x x x x x x x x")
                 continue  # Try again, for a valid action.
         return player_response
 
     def show_starting_hands(self):
-        print("=============  [?]  [ ]  ==============|")
-        print("Dealer's Hand:")
-        self.__dealer.print_first_card()
-        self.__player.print_hands()
-        print("=============  [ ]  [ ]  ==============|")
+        self.__renderer.write("=============  [?]  [ ]  ==============|")
+        self.__renderer.write("Dealer's Hand:")
+        self.__dealer.print_first_card(renderer=self.__renderer)
+        self.__player.print_hands(renderer=self.__renderer)
+        self.__renderer.write("=============  [ ]  [ ]  ==============|")
 
     def show_all_hands(self):
-        print("===========================|")
-        print("Dealer's Hand:")
-        self.__dealer.print_hands()
-        self.__player.print_hands()
-        print("===========================|")
+        self.__renderer.write("===========================|")
+        self.__renderer.write("Dealer's Hand:")
+        self.__dealer.print_hands(renderer=self.__renderer)
+        self.__player.print_hands(renderer=self.__renderer)
+        self.__renderer.write("===========================|")
 
     def show_scores(self, hand_num):
         hands = self.__player.get_hands()
@@ -589,94 +1072,119 @@ class GameUI:
             end_str = '\n'
 
         if len(hands) > 1:
-            print("_____________________________")
-            print(f'\nYour scores for Hand #{hand_num + 1} are:')
-            print(sep='/', *hands[hand_num].get_scores(), end=end_str)
+            self.__renderer.write("_____________________________")
+            self.__renderer.write(f'\nYour scores for Hand #{hand_num + 1} are:')
+            self.__renderer.write(sep='/', *hands[hand_num].get_scores(), end=end_str)
         else:
-            print("_____________________________")
-            print(f'\nYour scores are:')
-            print(sep='/', *hands[0].get_scores())
+            self.__renderer.write("_____________________________")
+            self.__renderer.write(f'\nYour scores are:')
+            self.__renderer.write(sep='/', *hands[0].get_scores())
 
     def start_screen(self, round_number):
-        print("\n=======@┌──────────────────────┐@======  ___  ____ ===")
-        print("=======@| Let's Play Blackjack |@====== | A |/ K / ===")
-        print("=======@└──────────────────────┘@====== | ♥_| ♦_/  ===")
-        print(f'Round {round_number} \t\t\t Balance: {self.__player.get_balance()} CREDITS')
-
-    @staticmethod
-    def game_over_screen():
-        print("==================================\n")
-        print("======== G A M E    O V E R ======\n")
-        print("==================================\n")
-
-    @staticmethod
+        self.__renderer.write("\n=======@┌──────────────────────┐@======  ___  ____ ===")
+        self.__renderer.write("=======@| Let's Play Blackjack |@====== | A |/ K / ===")
+        self.__renderer.write("=======@└──────────────────────┘@====== | ♥_| ♦_/  ===")
+        self.__renderer.write(f'Round {round_number} \t\t\t Balance: {self.__player.get_balance()} CREDITS')
+
+    def game_over_screen(self):
+        self.__renderer.write("==================================\n")
+        self.__renderer.write("======== G A M E    O V E R ======\n")
+        self.__renderer.write("==================================\n")
+
     def EPIC_WIN_SCREEN(self):
-        print("\nMan, You. Are. An. Absolute. Legend!")
-        print("You reached over 20.000 credits! Congrats! You are the Blackjack EPIC...\n")
-        print("$$\      $$\ $$$$$$\ $$\   $$\ $$\   $$\ $$$$$$$$\ $$$$$$$\  ")
-        print("$$ | $\  $$ |\_$$  _|$$$\  $$ |$$$\  $$ |$$  _____|$$  __$$\ ")
-        print("$$ |$$$\ $$ |  $$ |  $$$$\ $$ |$$$$\ $$ |$$ |      $$ |  $$ |")
-        print("$$ $$ $$\$$ |  $$ |  $$ $$\$$ |$$ $$\$$ |$$$$$\    $$$$$$$  |")
-        print("$$$$  _$$$$ |  $$ |  $$ \$$$$ |$$ \$$$$ |$$  __|   $$  __$$< ")
-        print("$$$  / \$$$ |  $$ |  $$ |\$$$ |$$ |\$$$ |$$ |      $$ |  $$ |")
-        print("$$  /   \$$ |$$$$$$\ $$ | \$$ |$$ | \$$ |$$$$$$$$\ $$ |  $$ |")
-        print("\__/     \__|\______|\__|  \__|\__|  \__|\________|\__|  \__|")
-
-    @staticmethod
-    def win_by_blackjack_msg():
-        print("##########################################################")
-        print("#  We Got BlackJack baby! Pay 3:2 of the bet! [X_____x]  #")
-        print("##########################################################")
-
-    @staticmethod
-    def win_msg():
-        print("################################################")
-        print("#  Player Wins! Pay 1:1 of the bet! [>_____<]  #")
-        print("################################################")
-
-    @staticmethod
-    def lose_by_blackjack_msg():
-        print("############################################################################")
-        print("#  Player Loses, Dealer has Blackjack! Collect bet from player! [^_____^]  #")
-        print("############################################################################")
-
-    @staticmethod
-    def lose_msg():
-        print("###################################################################")
-        print("#  Player Loses, Dealer wins! Collect bet from player! [^_____^]  #")
-        print("###################################################################")
-
-    @staticmethod
-    def tie_msg():
-        print("##############################################################")
-        print("#  We tied! Pay Nothing. Bet goes back to player. [-_____-]  #")
-        print("##############################################################")
-
-    @staticmethod
-    def bust_msg():
-        print("/|/|/|/|/|/|/|/|/|/|/|/|/")
-        print("|  Oh no! It's a BUST!  |")
-        print("|/|/|/|/|/|/|/|/|/|/|/|/|")
-
-    @staticmethod
-    def offer_insurance_msg():
-        print("-------------------------------------------------------")
-        print("| Yikes! Dealer might have a blackjack on their hand. |")
-        print("| Would you like some Insurance?      ['  ..  ']      |")
-        print("-------------------------------------------------------")
-
-    @staticmethod
-    def insurance_win_msg():
-        print("##############################################################")
-        print("#  ...Hey, but look at that!     [O  .  O]                   #")
-        print("#  Player Wins Insurance Bet! Pay 2:1 of the bet! [>_____<]  #")
-        print("##############################################################")
+        self.__renderer.write("\nMan, You. Are. An. Absolute. Legend!")
+        self.__renderer.write("You reached over 20.000 credits! Congrats! You are the Blackjack EPIC...\n")
+        self.__renderer.write("$$\      $$\ $$$$$$\ $$\   $$\ $$\   $$\ $$$$$$$$\ $$$$$$$\  ")
+        self.__renderer.write("$$ | $\  $$ |\_$$  _|$$$\  $$ |$$$\  $$ |$$  _____|$$  __$$\ ")
+        self.__renderer.write("$$ |$$$\ $$ |  $$ |  $$$$\ $$ |$$$$\ $$ |$$ |      $$ |  $$ |")
+        self.__renderer.write("$$ $$ $$\$$ |  $$ |  $$ $$\$$ |$$ $$\$$ |$$$$$\    $$$$$$$  |")
+        self.__renderer.write("$$$$  _$$$$ |  $$ |  $$ \$$$$ |$$ \$$$$ |$$  __|   $$  __$$< ")
+        self.__renderer.write("$$$  / \$$$ |  $$ |  $$ |\$$$ |$$ |\$$$ |$$ |      $$ |  $$ |")
+        self.__renderer.write("$$  /   \$$ |$$$$$$\ $$ | \$$ |$$ | \$$ |$$$$$$$$\ $$ |  $$ |")
+        self.__renderer.write("\__/     \__|\______|\__|  \__|\__|  \__|\________|\__|  \__|")
+
+    def outcome_msg(self, outcome):
+        if outcome is OUTCOME.BLACKJACK:
+            self.win_by_blackjack_msg()
+        elif outcome is OUTCOME.LOSE_BY_BLACKJACK:
+            self.lose_by_blackjack_msg()
+        elif outcome is OUTCOME.WIN:
+            self.win_msg()
+        elif outcome is OUTCOME.LOSE:
+            self.lose_msg()
+        elif outcome is OUTCOME.SURRENDER:
+            self.surrender_msg()
+        else:
+            self.tie_msg()
+
+    def win_by_blackjack_msg(self):
+        self.__renderer.write("##########################################################")
+        self.__renderer.write(f'#  We Got BlackJack baby! Pay {self.__rules.get_payout_name()} of the bet! [X_____x]  #')
+        self.__renderer.write("##########################################################")
+
+    def win_msg(self):
+        self.__renderer.write("################################################")
+        self.__renderer.write("#  Player Wins! Pay 1:1 of the bet! [>_____<]  #")
+        self.__renderer.write("################################################")
+
+    def lose_by_blackjack_msg(self):
+        self.__renderer.write("############################################################################")
+        self.__renderer.write("#  Player Loses, Dealer has Blackjack! Collect bet from player! [^_____^]  #")
+        self.__renderer.write("############################################################################")
+
+    def lose_msg(self):
+        self.__renderer.write("###################################################################")
+        self.__renderer.write("#  Player Loses, Dealer wins! Collect bet from player! [^_____^]  #")
+        self.__renderer.write("###################################################################")
+
+    def tie_msg(self):
+        self.__renderer.write("##############################################################")
+        self.__renderer.write("#  We tied! Pay Nothing. Bet goes back to player. [-_____-]  #")
+        self.__renderer.write("##############################################################")
+
+    def surrender_msg(self):
+        self.__renderer.write("##########################################################")
+        self.__renderer.write("#  Player Surrenders! Half the bet goes back. [._____.]  #")
+        self.__renderer.write("##########################################################")
+
+    def bust_msg(self):
+        self.__renderer.write("/|/|/|/|/|/|/|/|/|/|/|/|/")
+        self.__renderer.write("|  Oh no! It's a BUST!  |")
+        self.__renderer.write("|/|/|/|/|/|/|/|/|/|/|/|/|")
+
+    def offer_insurance_msg(self):
+        self.__renderer.write("-------------------------------------------------------")
+        self.__renderer.write("| Yikes! Dealer might have a blackjack on their hand. |")
+        self.__renderer.write("| Would you like some Insurance?      ['  ..  ']      |")
+        self.__renderer.write("-------------------------------------------------------")
+
+    def insurance_win_msg(self):
+        self.__renderer.write("##############################################################")
+        self.__renderer.write("#  ...Hey, but look at that!     [O  .  O]                   #")
+        self.__renderer.write("#  Player Wins Insurance Bet! Pay 2:1 of the bet! [>_____<]  #")
+        self.__renderer.write("##############################################################")
 
     def insurance_lose_msg(self):
-        print("#########################################################################")
-        print("#  Player Loses Insurance Bet! Collect side-bet from player! [^_____^]  #")
-        print(f'#  [Player lost {self.__player.get_side_bet()} credits]')
-        print("#########################################################################")
+        self.__renderer.write("#########################################################################")
+        self.__renderer.write("#  Player Loses Insurance Bet! Collect side-bet from player! [^_____^]  #")
+        self.__renderer.write(f'#  [Player lost {self.__player.get_side_bet()} credits]')
+        self.__renderer.write("#########################################################################")
+
+
+# ScriptedGameUI: a GameUI that answers every prompt itself, for benchmarks and recordings:
+class ScriptedGameUI(GameUI):
+    """ Bets 10, never takes insurance and hits below 17, like the dealer. """
+    def ask(self, prompt):
+        self.get_renderer().flush()
+        return "n"
+
+    def get_bet_from_user(self):
+        self.get_renderer().flush()
+        return 10
+
+    def get_user_action(self, hand):
+        self.get_renderer().flush()
+        return "hit" if hand.resolve_score() < 17 else "stand"
 
 
 # ----------------------------------
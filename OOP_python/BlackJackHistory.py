@@ -0,0 +1,257 @@
+import mmap
+import os
+import struct
+import tempfile
+import time
+
+from BlackJackGame import Game, Player, Dealer, NullRenderer, OUTCOME, encode_card, ScriptedGameUI
+
+"""
+Title: Append-only hand history for the on-Terminal Blackjack game.
+Game hands every bet, card, action, insurance bet and payout to a HandHistoryWriter, which
+appends them to a binary log as small length-prefixed records. HandHistoryReader memory-maps
+a log and replays it, rebuilding the balance and the outcomes of every round from the events alone.
+
+Record layout, little-endian: <length: uint8><kind: uint8><fields>, where length counts the bytes after itself.
+    SESSION    balance: int64                       the balance a new game starts with
+    ROUND      bet: int64                           a round starts with this bet
+    DEAL       seat: uint8, card code: uint8        a card to the player (0) or the dealer (1)
+    ACTION     hand: uint8, action: uint8           index into ACTIONS, 255 for anything else
+    INSURANCE  side bet: int64, net: int64          side bet 0 if insurance was declined
+    SETTLE     hand: uint8, outcome: uint8, net: int64
+Credits are int64, as the game's balance has no bound of its own. The writer refuses a field that doesn't fit
+with a ValueError, before writing any of its record.
+
+"""
+
+# ----------------------------------
+# STATIC FUNCTIONS & VARIABLES
+# ----------------------------------
+SESSION, ROUND, DEAL, ACTION, INSURANCE, SETTLE = range(6)
+PLAYER, DEALER = 0, 1
+ACTIONS = ("hit", "stand", "double down", "split", "surrender")
+UNKNOWN_ACTION = 255
+ACTION_CODES = {action: code for code, action in enumerate(ACTIONS)}
+
+# Fields of each kind of record, and what replay needs of them
+FIELDS = {
+    SESSION: struct.Struct('<q'),
+    ROUND: struct.Struct('<q'),
+    DEAL: struct.Struct('<BB'),
+    ACTION: struct.Struct('<BB'),
+    INSURANCE: struct.Struct('<qq'),
+    SETTLE: struct.Struct('<BBq'),
+}
+
+
+def _record(kind):
+    # Struct for a whole record, header included, and the value of its length byte
+    record = struct.Struct('<BB' + FIELDS[kind].format.lstrip('<'))
+    return record, record.size - 1
+
+
+RECORDS = {kind: _record(kind) for kind in FIELDS}
+
+
+# ----------------------------------
+# CLASSES
+# ----------------------------------
+class HandHistoryWriter:
+    """ Appends events to a hand history log through a buffered file. Use it as a context manager, or close() it. """
+    def __init__(self, path, buffer_size=1 << 16):
+        self.__file = open(path, 'ab', buffering=buffer_size)
+
+    def __record(self, kind, *fields):
+        record, length = RECORDS[kind]
+        try:
+            packed = record.pack(length, kind, *fields)
+        except struct.error as error:
+            raise ValueError(f'Cannot log {fields} in a record of kind {kind}: {error}') from error
+        self.__file.write(packed)
+
+    def session(self, balance):
+        self.__record(SESSION, balance)
+
+    def round(self, bet):
+        self.__record(ROUND, bet)
+
+    def deal(self, card, dealer=False):
+        self.__record(DEAL, DEALER if dealer else PLAYER, encode_card(card.get_suit(), card.get_face_value()))
+
+    def action(self, hand_num, action):
+        self.__record(ACTION, hand_num, ACTION_CODES.get(action, UNKNOWN_ACTION))
+
+    def insurance(self, side_bet, net):
+        self.__record(INSURANCE, side_bet, net)
+
+    def settle(self, hand_num, outcome, net):
+        self.__record(SETTLE, hand_num, outcome.value, net)
+
+    def flush(self):
+        self.__file.flush()
+
+    def close(self):
+        self.__file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class ReplayResult:
+    def __init__(self):
+        self.events = 0
+        self.balance = 0
+        # The balance each session ended with.
+        self.session_balances = []
+        # One (bet, net, balance after, OUTCOME values of its hands) tuple per round, in order.
+        self.rounds = []
+        self.outcomes = {outcome: 0 for outcome in OUTCOME}
+        self.insurance_taken = 0
+        self.seconds = 0.0
+        # Bytes of a record cut off by a crash while writing, left out of the replay.
+        self.torn_bytes = 0
+
+    def get_events_per_second(self):
+        if self.seconds == 0:
+            return 0.0
+        return self.events / self.seconds
+
+    def summary(self):
+        lines = [f'Events replayed: {self.events} in {self.seconds:.3f}s '
+                 f'({self.get_events_per_second():,.0f} events/sec)',
+                 f'Sessions: {len(self.session_balances)}, rounds: {len(self.rounds)}, final balance: {self.balance}']
+        for outcome, count in self.outcomes.items():
+            lines.append(f'\t{outcome.name}: {count}')
+        lines.append(f'Insurance taken: {self.insurance_taken}')
+        if self.torn_bytes:
+            lines.append(f'Torn record at the end of the log: {self.torn_bytes} bytes skipped')
+        return '\n'.join(lines)
+
+
+class HandHistoryReader:
+    def __init__(self, path):
+        self.__path = path
+
+    def events(self):
+        """ Yields every complete record of the log as (kind, fields). """
+        with open(self.__path, 'rb') as log:
+            if os.fstat(log.fileno()).st_size == 0:
+                return
+            with mmap.mmap(log.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                end = len(data)
+                offset = 0
+                while offset + 1 < end:
+                    next_offset = offset + data[offset] + 1
+                    if next_offset > end:
+                        break
+                    kind = data[offset + 1]
+                    yield kind, FIELDS[kind].unpack_from(data, offset + 2)
+                    offset = next_offset
+
+    def replay(self):
+        """ Rebuilds balances and round outcomes from the log. Deals and actions are only stepped over. """
+        result = ReplayResult()
+        start = time.perf_counter()
+        with open(self.__path, 'rb') as log:
+            if os.fstat(log.fileno()).st_size != 0:
+                with mmap.mmap(log.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                    self.__replay(data, result)
+        result.seconds = time.perf_counter() - start
+        return result
+
+    @staticmethod
+    def __replay(data, result):
+        session = FIELDS[SESSION].unpack_from
+        round_bet = FIELDS[ROUND].unpack_from
+        insurance = FIELDS[INSURANCE].unpack_from
+        settle = FIELDS[SETTLE].unpack_from
+        rounds = result.rounds
+        outcome_counts = [0] * (max(outcome.value for outcome in OUTCOME) + 1)
+        events = 0
+        insurance_taken = 0
+        balance = 0
+        bet = None
+        net = 0
+        outcomes = []
+        end = len(data)
+        offset = 0
+        while offset + 1 < end:
+            next_offset = offset + data[offset] + 1
+            if next_offset > end:
+                break
+            kind = data[offset + 1]
+            events += 1
+            if kind == DEAL or kind == ACTION:
+                pass
+            elif kind == SETTLE:
+                outcome, hand_net = settle(data, offset + 2)[1:]
+                outcome_counts[outcome] += 1
+                outcomes.append(outcome)
+                net += hand_net
+                balance += hand_net
+            elif kind == ROUND:
+                if bet is not None:
+                    rounds.append((bet, net, balance, tuple(outcomes)))
+                bet = round_bet(data, offset + 2)[0]
+                net = 0
+                outcomes = []
+            elif kind == INSURANCE:
+                side_bet, side_net = insurance(data, offset + 2)
+                if side_bet:
+                    insurance_taken += 1
+                net += side_net
+                balance += side_net
+            elif kind == SESSION:
+                if bet is not None:
+                    rounds.append((bet, net, balance, tuple(outcomes)))
+                    bet = None
+                if events > 1:
+                    result.session_balances.append(balance)
+                balance = session(data, offset + 2)[0]
+            offset = next_offset
+        if bet is not None:
+            rounds.append((bet, net, balance, tuple(outcomes)))
+        if events:
+            result.session_balances.append(balance)
+        result.events = events
+        result.balance = balance
+        result.insurance_taken = insurance_taken
+        result.torn_bytes = end - offset
+        for outcome in OUTCOME:
+            result.outcomes[outcome] = outcome_counts[outcome.value]
+
+
+# ----------------------------------
+# DRIVER FUNCTION
+# ----------------------------------
+def record_games(path, number_of_games):
+    """ Plays number_of_games scripted games, each until bankrupt or an epic win, logging them to path. """
+    player = Player()
+    with HandHistoryWriter(path) as history:
+        game = Game(player, Dealer(), NullRenderer(), ScriptedGameUI, history)
+        balances = []
+        for _ in range(number_of_games):
+            game.start()
+            balances.append(player.get_balance())
+    return balances
+
+
+def main():
+    path = os.path.join(tempfile.gettempdir(), 'blackjack_history.log')
+    if os.path.exists(path):
+        os.remove(path)
+    start = time.perf_counter()
+    balances = record_games(path, 50)
+    print(f'Recorded 50 games, {os.path.getsize(path)} bytes, in {time.perf_counter() - start:.2f}s')
+    result = HandHistoryReader(path).replay()
+    print(result.summary())
+    print(f'Replayed balances match the games: {balances == result.session_balances}')
+    os.remove(path)
+
+
+if __name__ == "__main__":
+    # execute only if run as a script
+    main()
@@ -0,0 +1,179 @@
+import os
+import tempfile
+import time
+
+from BlackJackGame import Game, Player, Dealer, BufferedRenderer, ScriptedGameUI
+
+"""
+Title: Per-phase timing of the on-Terminal Blackjack game.
+PhaseProfiler wraps the methods of a Game, its GameUI, renderer and Shoe with timers, so every
+call adds its wall time and a call count to the stack of phases it ran in (round;settlement;dealer;...).
+Nothing is wrapped unless a profiler is passed in, so a Game without one runs exactly the code it always did.
+The stacks export as a collapsed-stack file for flamegraph.pl or speedscope, and as a summary table.
+
+"""
+
+# ----------------------------------
+# STATIC FUNCTIONS & VARIABLES
+# ----------------------------------
+# (method, phase) pairs that get timed on each kind of object.
+GAME_PHASES = (
+    ("start", "session"),
+    ("play_round", "round"),
+    ("deal_round", "deal"),
+    ("settle_insurance", "insurance"),
+    ("play_action", "action"),
+    ("dealer_plays", "dealer_play"),
+    ("stand", "settlement"),
+)
+GAME_UI_PHASES = (
+    ("get_bet_from_user", "bet"),
+    ("get_insurance_bet_from_user", "insurance_decision"),
+    ("get_user_action", "decision"),
+    ("start_screen", "render"),
+    ("show_starting_hands", "render"),
+    ("show_all_hands", "render"),
+    ("show_scores", "render"),
+    ("outcome_msg", "render"),
+)
+RENDERER_PHASES = (
+    ("write", "write"),
+    ("flush", "flush"),
+)
+SHOE_PHASES = (
+    ("deal_card", "shoe_deal"),
+    ("shuffle", "shoe_shuffle"),
+)
+
+
+# ----------------------------------
+# CLASSES
+# ----------------------------------
+class PhaseProfiler:
+    """ Wall time and call counts per stack of phases, in nanoseconds. """
+    def __init__(self):
+        self.__path = []
+        self.__starts = []
+        # Time spent in the phases called from each open phase, to tell its own time apart
+        self.__children = []
+        # Stack of phases -> [calls, total ns, self ns]
+        self.__stacks = {}
+
+    def enter(self, phase):
+        self.__path.append(phase)
+        self.__children.append(0)
+        self.__starts.append(time.perf_counter_ns())
+
+    def exit(self):
+        elapsed = time.perf_counter_ns() - self.__starts.pop()
+        key = tuple(self.__path)
+        self.__path.pop()
+        stats = self.__stacks.get(key)
+        if stats is None:
+            stats = self.__stacks[key] = [0, 0, 0]
+        stats[0] += 1
+        stats[1] += elapsed
+        stats[2] += elapsed - self.__children.pop()
+        if self.__children:
+            self.__children[-1] += elapsed
+
+    def instrument(self, obj, phases):
+        """ Times every method of obj named in phases, a sequence of (method, phase), from now on. """
+        for name, phase in phases:
+            setattr(obj, name, self.__timed(getattr(obj, name), phase))
+
+    def __timed(self, method, phase):
+        enter = self.enter
+        exit = self.exit
+
+        def timed(*args, **kwargs):
+            enter(phase)
+            try:
+                return method(*args, **kwargs)
+            finally:
+                exit()
+        return timed
+
+    def instrument_game(self, game):
+        game_ui = game.get_game_ui()
+        self.instrument(game, GAME_PHASES)
+        self.instrument(game_ui, GAME_UI_PHASES)
+        self.instrument(game_ui.get_renderer(), RENDERER_PHASES)
+
+    def instrument_shoe(self, shoe):
+        self.instrument(shoe, SHOE_PHASES)
+
+    def reset(self):
+        self.__stacks.clear()
+
+    def get_stacks(self):
+        return self.__stacks
+
+    def get_phases(self):
+        """ Totals per phase over every stack it shows up in: phase -> [calls, total ns, self ns]. """
+        phases = {}
+        for key, (calls, total, own) in self.__stacks.items():
+            phase = phases.setdefault(key[-1], [0, 0, 0])
+            phase[0] += calls
+            phase[2] += own
+            # A phase called from within itself would count twice towards its total
+            if key[-1] not in key[:-1]:
+                phase[1] += total
+        return phases
+
+    def collapsed_stacks(self):
+        """ One 'phase;phase;phase microseconds' line per stack, with the time spent in that phase itself. """
+        lines = []
+        for key, (calls, total, own) in sorted(self.__stacks.items()):
+            if own >= 1000:
+                lines.append(f'{";".join(key)} {own // 1000}')
+        return '\n'.join(lines) + '\n'
+
+    def write_collapsed(self, path):
+        with open(path, 'w') as collapsed:
+            collapsed.write(self.collapsed_stacks())
+
+    def summary(self, per="round"):
+        """ Table of every phase by its own time, with the time per call and per call of the phase per. """
+        phases = self.get_phases()
+        all_time = sum(own for calls, total, own in phases.values()) or 1
+        rounds = phases.get(per, [0])[0]
+        lines = [f'{"phase":<20}{"calls":>10}{"total ms":>12}{"self ms":>12}{"self %":>8}'
+                 f'{"us/call":>10}{"us/" + per:>12}']
+        for phase, (calls, total, own) in sorted(phases.items(), key=lambda item: -item[1][2]):
+            per_round = f'{own / rounds / 1000:12.2f}' if rounds else f'{"-":>12}'
+            lines.append(f'{phase:<20}{calls:>10}{total / 1e6:>12.2f}{own / 1e6:>12.2f}'
+                         f'{100 * own / all_time:>7.1f}%{total / calls / 1000:>10.2f}{per_round}')
+        return '\n'.join(lines)
+
+
+# ----------------------------------
+# DRIVER FUNCTION
+# ----------------------------------
+def play_rounds(rounds, renderer, profiler=None):
+    """ Plays scripted rounds through Game.play_round and returns the rounds per second. """
+    player = Player()
+    game = Game(player, Dealer(), renderer, ScriptedGameUI, profiler=profiler)
+    start = time.perf_counter()
+    for on_round in range(1, rounds + 1):
+        player.set_balance(1000)
+        game.play_round(on_round)
+    return rounds / (time.perf_counter() - start)
+
+
+def main():
+    rounds = 20000
+    profiler = PhaseProfiler()
+    with open(os.devnull, 'w') as devnull:
+        disabled = play_rounds(rounds, BufferedRenderer(devnull))
+        enabled = play_rounds(rounds, BufferedRenderer(devnull), profiler)
+    print(f'{rounds} rounds, rounds/sec: {disabled:,.0f} without a profiler, {enabled:,.0f} profiled')
+    print(profiler.summary())
+    path = os.path.join(tempfile.gettempdir(), 'blackjack_phases.collapsed')
+    profiler.write_collapsed(path)
+    print(f'Collapsed stacks written to {path}, e.g. flamegraph.pl {path} > blackjack_phases.svg')
+
+
+if __name__ == "__main__":
+    # execute only if run as a script
+    main()
@@ -0,0 +1,273 @@
+import argparse
+import asyncio
+import multiprocessing
+import os
+import time
+
+from BlackJackGame import Game, Player, Dealer, BufferedRenderer, NullRenderer
+
+"""
+Title: Asyncio server that hosts many Blackjack tables in one process.
+Every connection gets its own table (Player, Dealer, Game and Shoe), driven with the same
+round steps as Game.play_round, but waiting on the socket instead of input().
+
+Protocol, one line per message:
+    client -> server  first line "hello", or "hello quiet" to skip the table screens.
+    server -> client  the table screen, as it would show on a terminal, then a prompt:
+        "> bet <balance>"                           reply with an amount
+        "> insurance"                               reply with y or n
+        "> action <score> <dealer upcard> <a>|<b>"  reply with one of the actions
+    server -> client  "> balance <credits>" after every round,
+                      "> game over" or "> epic win" when the game ends.
+    client -> server  "quit" at any prompt leaves the table.
+    server -> client  "> error <reason>" before closing, if the first line is not UTF-8 or too long.
+A reply that is not UTF-8 or too long counts as an invalid one, and the prompt comes again.
+No screen line starts with "> ", so those lines are always protocol.
+
+"""
+
+# ----------------------------------
+# CLASSES
+# ----------------------------------
+class StreamWriterFile:
+    """ Lets a renderer write to an asyncio StreamWriter as if it were a text file. """
+    def __init__(self, writer):
+        self.__writer = writer
+
+    def write(self, text):
+        self.__writer.write(text.encode())
+
+    def flush(self):
+        pass
+
+
+class LeftTable(Exception):
+    pass
+
+
+class Table:
+    def __init__(self, reader, writer, quiet=False):
+        self.__reader = reader
+        self.__writer = writer
+        self.__renderer = NullRenderer() if quiet else BufferedRenderer(StreamWriterFile(writer))
+        self.__player = Player()
+        self.__game = Game(self.__player, Dealer(), self.__renderer)
+        self.__gameUI = self.__game.get_game_ui()
+
+    async def send(self, line):
+        # Flush the screen built up so far, then the line, in one go
+        self.__renderer.flush()
+        self.__writer.write(line.encode() + b'\n')
+        await self.__writer.drain()
+
+    async def ask(self, prompt, answers=None):
+        """ Sends a prompt and waits for a reply, asking again until it is one of answers. """
+        while True:
+            await self.send(prompt)
+            try:
+                line = await self.__reader.readline()
+                reply = line.decode().strip().lower()
+            except ValueError:
+                # Not UTF-8 (UnicodeDecodeError), or past the stream's limit, which readline reports as ValueError
+                self.__renderer.write("Error! Replies are one short line of text.")
+                continue
+            if not line or reply == "quit":
+                raise LeftTable()
+            if answers is None or reply in answers:
+                return reply
+            self.__renderer.write("Error! Invalid action!")
+
+    async def get_bet(self):
+        balance = self.__player.get_balance()
+        while True:
+            reply = await self.ask(f'> bet {balance}')
+            if reply.isdigit() and 0 < int(reply) <= balance:
+                return int(reply)
+            self.__renderer.write(f'Sorry, a bet has to be between 1 and your balance: {balance}')
+
+    async def get_action(self, hand, dealer_upcard):
+        actions = self.__gameUI.get_available_actions(hand)
+        return await self.ask(f'> action {hand.resolve_score()} {dealer_upcard} ' + '|'.join(actions), actions)
+
+    async def play_round(self, on_round):
+        # Same steps as Game.play_round
+        game = self.__game
+        self.__gameUI.start_screen(on_round)
+        player_hand, dealer_hand = game.deal_round(await self.get_bet())
+        if game.offers_insurance():
+            self.__gameUI.offer_insurance_msg()
+            if game.settle_insurance(await self.ask('> insurance', ("y", "n")) == "y"):
+                game.end_round()
+                return
+        dealer_upcard = dealer_hand.get_first_card_value()
+        while True:
+            for hand_num, hand in enumerate(self.__player.get_hands()):
+                if hand.get_stand_state() or game.auto_stand(hand):
+                    continue
+                self.__gameUI.show_scores(hand_num)
+                action = await self.get_action(hand, dealer_upcard)
+                game.play_action(action, hand)
+                if action == 'split':
+                    break
+            if self.__player.all_hands_standing():
+                self.__renderer.write("Moving on to the next round... ")
+                break
+            else:
+                self.__gameUI.show_starting_hands()
+        game.end_round()
+
+    async def play(self):
+        # Same as one game of Game.start, without the restart
+        self.__player.set_balance(1000)
+        on_round = 1
+        while True:
+            await self.play_round(on_round)
+            await self.send(f'> balance {self.__player.get_balance()}')
+            if self.__player.get_balance() <= 0:
+                self.__gameUI.game_over_screen()
+                await self.send('> game over')
+                break
+            elif self.__player.get_balance() >= 20000:
+                self.__gameUI.EPIC_WIN_SCREEN()
+                await self.send('> epic win')
+                break
+            on_round = on_round + 1
+
+
+# ----------------------------------
+# SERVER
+# ----------------------------------
+async def handle_connection(reader, writer):
+    try:
+        hello = (await reader.readline()).decode().split()
+        if hello and hello[0] == "hello":
+            await Table(reader, writer, quiet="quiet" in hello[1:]).play()
+    except ValueError:
+        # The first line wasn't UTF-8, or was too long
+        writer.write(b'> error expected a short "hello" line\n')
+    except (LeftTable, ConnectionError):
+        pass
+    finally:
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except ConnectionError:
+            pass
+
+
+async def serve(host='127.0.0.1', port=8707, unix_path=None):
+    if unix_path is not None:
+        server = await asyncio.start_unix_server(handle_connection, unix_path, backlog=4096)
+    else:
+        server = await asyncio.start_server(handle_connection, host, port, backlog=4096)
+    async with server:
+        await server.serve_forever()
+
+
+# ----------------------------------
+# LOAD GENERATOR
+# ----------------------------------
+async def simulated_player(rounds, latencies, host, port, unix_path):
+    """ Plays rounds at one table like the dealer would, recording the time from each reply to the next prompt. """
+    if unix_path is not None:
+        reader, writer = await asyncio.open_unix_connection(unix_path)
+    else:
+        reader, writer = await asyncio.open_connection(host, port)
+    writer.write(b'hello quiet\n')
+    replied_at = None
+    rounds_played = 0
+    while True:
+        line = await reader.readline()
+        if not line:
+            break
+        if not line.startswith(b'> '):
+            continue
+        prompt = line.decode().split()
+        if prompt[1] not in ("bet", "insurance", "action"):
+            if prompt[1] == "balance":
+                continue
+            break
+        if replied_at is not None:
+            latencies.append(time.perf_counter() - replied_at)
+        if prompt[1] == "bet":
+            rounds_played += 1
+            reply = "10" if rounds_played <= rounds else "quit"
+        elif prompt[1] == "insurance":
+            reply = "n"
+        else:
+            reply = "hit" if int(prompt[2]) < 17 else "stand"
+        writer.write(reply.encode() + b'\n')
+        if reply == "quit":
+            break
+        replied_at = time.perf_counter()
+    writer.close()
+    await writer.wait_closed()
+
+
+async def run_load(players=2000, rounds=20, host='127.0.0.1', port=8707, unix_path=None):
+    """ Plays players tables at once. The latencies are None if no decision was made, e.g. no connection worked. """
+    latencies = []
+    start = time.perf_counter()
+    results = await asyncio.gather(*(simulated_player(rounds, latencies, host, port, unix_path)
+                                     for _ in range(players)), return_exceptions=True)
+    seconds = time.perf_counter() - start
+    # A connection that failed only counts as failed, anything else is a bug
+    for result in results:
+        if isinstance(result, Exception) and not isinstance(result, OSError):
+            raise result
+    latencies.sort()
+    return {
+        'players': players,
+        'failed': sum(isinstance(result, OSError) for result in results),
+        'decisions': len(latencies),
+        'seconds': seconds,
+        'decisions_per_second': len(latencies) / seconds,
+        'p50_ms': latencies[len(latencies) // 2] * 1000 if latencies else None,
+        'p99_ms': latencies[int(len(latencies) * 0.99)] * 1000 if latencies else None,
+    }
+
+
+def _serve_in_process(host, port, unix_path):
+    asyncio.run(serve(host, port, unix_path))
+
+
+# ----------------------------------
+# DRIVER FUNCTION
+# ----------------------------------
+def main():
+    parser = argparse.ArgumentParser(description="Multi-table Blackjack server")
+    parser.add_argument("mode", choices=["serve", "load", "bench"],
+                        help="serve tables, run the load generator against a server, or both")
+    parser.add_argument("--host", default='127.0.0.1')
+    parser.add_argument("--port", type=int, default=8707)
+    parser.add_argument("--unix", default=None, help="path of a Unix socket to use instead of TCP")
+    parser.add_argument("--players", type=int, default=2000)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    if args.mode == "serve":
+        _serve_in_process(args.host, args.port, args.unix)
+        return
+    server = None
+    if args.mode == "bench":
+        # The server gets a process, and so a core, of its own
+        server = multiprocessing.Process(target=_serve_in_process, args=(args.host, args.port, args.unix))
+        server.start()
+        time.sleep(1)
+    try:
+        report = asyncio.run(run_load(args.players, args.rounds, args.host, args.port, args.unix))
+    finally:
+        if server is not None:
+            server.terminate()
+            if args.unix is not None and os.path.exists(args.unix):
+                os.remove(args.unix)
+    print(f'{report["players"]} tables served by one process (one core) for {report["seconds"]:.1f}s, '
+          f'{report["failed"]} failed')
+    print(f'Decisions: {report["decisions"]} ({report["decisions_per_second"]:,.0f}/sec)')
+    if report["decisions"]:
+        print(f'Decision latency: p50 {report["p50_ms"]:.2f} ms, p99 {report["p99_ms"]:.2f} ms')
+
+
+if __name__ == "__main__":
+    # execute only if run as a script
+    main()
@@ -0,0 +1,467 @@
+import math
+import time
+import random
+from multiprocessing import Pool, cpu_count
+
+import numpy as np
+
+from BlackJackStrategy import StrategyTables
+from BlackJackVectorized import deal_batch, evaluate_batch
+from BlackJackGame import (CompactShoe, Hand, Player, Dealer, OUTCOME, HI_LO, HOUSE_RULES, VEGAS_STRIP_RULES,
+                           DOWNTOWN_RULES, SIX_FIVE_RULES, settle_key)
+
+"""
+Title: Headless Monte Carlo simulator for the on-Terminal Blackjack game.
+Plays rounds with the same (compact) Shoe, Hand, Player/Dealer and settlement rules as Game,
+but asks a strategy callback for actions instead of the user, and never prints.
+In pure Python that is about 50,000 rounds/sec per core (51,000 measured for mimic_dealer_strategy, 39,000 for
+the basic strategy tables), 20 times short of a million. run_threshold gets there for hit/stand threshold policies,
+like mimic_dealer_strategy, by playing them in batches with BlackJackVectorized.evaluate_batch (about a million
+rounds/sec with the dealing), at the price of independent hands: no count, insurance, doubles or splits.
+
+"""
+
+
+# ----------------------------------
+# STRATEGIES
+# ----------------------------------
+# A strategy is any callable taking (hand, dealer_upcard) and returning one of the
+# GameUI actions: "hit", "stand", "double down", "split" or "surrender".
+# dealer_upcard is the game value of the dealer's face-up card (Ace is 1).
+# When the rules don't allow the action, the Simulator plays what a basic strategy chart falls back on.
+def mimic_dealer_strategy(hand, dealer_upcard):
+    """ Hit below 17, just like the dealer has to. """
+    if hand.resolve_score() < 17:
+        return "hit"
+    return "stand"
+
+
+def never_bust_strategy(hand, dealer_upcard):
+    """ Never take a card that could bust the hand. """
+    if hand.get_final_score() < 12:
+        return "hit"
+    return "stand"
+
+
+def never_insure(dealer_upcard):
+    return False
+
+
+# A bet_size callback takes the true count before the round is dealt and returns the bet, in base bets.
+def flat_bet(true_count):
+    return 1
+
+
+def spread_1_to_8(true_count):
+    """ One base bet up to a true count of +1, then one more per true count, up to eight. """
+    return max(1, min(8, int(true_count)))
+
+
+# ----------------------------------
+# CLASSES
+# ----------------------------------
+# True counts beyond this are counted with it, e.g. every true count of +10 or more is the +10 bucket.
+TRUE_COUNT_LIMIT = 10
+
+
+class RunningStats:
+    """ Welford's online mean/variance, so memory stays constant over any number of rounds. """
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def push(self, x):
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (x - self.mean)
+
+    def merge(self, other):
+        """ Combine with the stats of another stream (Chan et al.), as if all values were pushed here. """
+        count = self.count + other.count
+        if count == 0:
+            return
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.count = count
+
+    def get_variance(self):
+        if self.count < 2:
+            return 0.0
+        return self.m2 / (self.count - 1)
+
+
+class SimulationResult:
+    def __init__(self, bet, histogram_bin=10):
+        # param: histogram_bin, width in bets of the buckets of the per-shoe bankroll histogram.
+        self.bet = bet
+        self.histogram_bin = histogram_bin
+        self.rounds = 0
+        self.shoes = 0
+        self.net = 0
+        self.seconds = 0.0
+        self.outcomes = {outcome: 0 for outcome in OUTCOME}
+        self.insurance_taken = 0
+        self.insurance_won = 0
+        self.bankroll_histogram = {}
+        self.stats = RunningStats()
+        # Rounds, and the sum and sum of squares of their net in bets of that round, by the true count they were
+        # dealt at, rounded down. Index 0 is -TRUE_COUNT_LIMIT. Plain sums keep this cheap enough for every round.
+        buckets = 2 * TRUE_COUNT_LIMIT + 1
+        self.true_count_rounds = [0] * buckets
+        self.true_count_net = [0.0] * buckets
+        self.true_count_squares = [0.0] * buckets
+
+    def add_shoe(self, shoe_net):
+        """ Count a finished shoe in the bankroll histogram, keyed by the lower edge of its bucket in bets. """
+        bucket = int(shoe_net // (self.bet * self.histogram_bin)) * self.histogram_bin
+        self.bankroll_histogram[bucket] = self.bankroll_histogram.get(bucket, 0) + 1
+        self.shoes += 1
+
+    def merge(self, other):
+        """ Add the counters of another result, e.g. from another worker, to this one. """
+        self.rounds += other.rounds
+        self.shoes += other.shoes
+        self.net += other.net
+        self.seconds += other.seconds
+        for outcome, count in other.outcomes.items():
+            self.outcomes[outcome] += count
+        self.insurance_taken += other.insurance_taken
+        self.insurance_won += other.insurance_won
+        for bucket, count in other.bankroll_histogram.items():
+            self.bankroll_histogram[bucket] = self.bankroll_histogram.get(bucket, 0) + count
+        self.stats.merge(other.stats)
+        for bucket in range(len(self.true_count_rounds)):
+            self.true_count_rounds[bucket] += other.true_count_rounds[bucket]
+            self.true_count_net[bucket] += other.true_count_net[bucket]
+            self.true_count_squares[bucket] += other.true_count_squares[bucket]
+
+    def get_ev(self):
+        """ Expected net result per round, in units of the base bet. """
+        return self.stats.mean / self.bet
+
+    def get_variance(self):
+        """ Variance of the net result per round, in units of the base bet squared. """
+        return self.stats.get_variance() / (self.bet * self.bet)
+
+    def add_true_count_round(self, true_count, net_in_bets):
+        bucket = min(max(math.floor(true_count), -TRUE_COUNT_LIMIT), TRUE_COUNT_LIMIT) + TRUE_COUNT_LIMIT
+        self.true_count_rounds[bucket] += 1
+        self.true_count_net[bucket] += net_in_bets
+        self.true_count_squares[bucket] += net_in_bets * net_in_bets
+
+    def get_ev_by_true_count(self):
+        """ Dict of true count to (rounds, EV per bet of the round, standard error of that EV). """
+        evs = {}
+        for bucket, rounds in enumerate(self.true_count_rounds):
+            if rounds == 0:
+                continue
+            mean = self.true_count_net[bucket] / rounds
+            variance = max(self.true_count_squares[bucket] / rounds - mean * mean, 0.0)
+            evs[bucket - TRUE_COUNT_LIMIT] = (rounds, mean, math.sqrt(variance / rounds))
+        return evs
+
+    def get_hands_per_second(self):
+        if self.seconds == 0:
+            return 0.0
+        return self.rounds / self.seconds
+
+    def summary(self):
+        lines = [f'Rounds played: {self.rounds} in {self.seconds:.2f}s '
+                 f'({self.get_hands_per_second():,.0f} hands/sec)',
+                 f'Net result: {self.net} credits',
+                 f'EV per round: {self.get_ev():+.5f} bets',
+                 f'Variance per round: {self.get_variance():.5f} bets^2']
+        for outcome, count in self.outcomes.items():
+            lines.append(f'\t{outcome.name}: {count}')
+        lines.append(f'Insurance taken: {self.insurance_taken}, won: {self.insurance_won}')
+        evs = self.get_ev_by_true_count()
+        if evs:
+            lines.append(f'EV per bet by true count (+-{TRUE_COUNT_LIMIT} include everything beyond):')
+            for count, (rounds, ev, error) in evs.items():
+                lines.append(f'\t{count:+d}: {ev:+.4f} +- {error:.4f} ({rounds} rounds)')
+        if self.bankroll_histogram:
+            lines.append(f'Bankroll per shoe, {self.shoes} shoes (bets: count):')
+            for bucket in sorted(self.bankroll_histogram):
+                lines.append(f'\t{bucket:+d}: {self.bankroll_histogram[bucket]}')
+        return '\n'.join(lines)
+
+
+class Simulator:
+    def __init__(self, strategy=mimic_dealer_strategy, number_of_decks=3, bet=10, insurance=never_insure, rng=random,
+                 penetration=0.75, counting_system=HI_LO, bet_size=flat_bet, shoe=None, rules=HOUSE_RULES):
+        # param: bet_size, the callback that sizes each bet from the true count, see flat_bet.
+        # param: rules, the Rules to play by.
+        # param: shoe, a CompactShoe to deal from instead of a new one, e.g. one that a strategy
+        #   reading get_true_count() was built around. Then number_of_decks, rng, penetration
+        #   and counting_system are the shoe's own.
+        self.__strategy = strategy
+        self.__insurance = insurance
+        self.__bet = bet
+        self.__bet_size = bet_size
+        self.__rules = rules
+        self.__player = Player()
+        self.__dealer = Dealer()
+        if shoe is None:
+            shoe = CompactShoe(number_of_decks, rng, penetration, counting_system)
+        self.__shoe = shoe
+
+    def get_shoe(self):
+        return self.__shoe
+
+    def play_round(self, result):
+        """ Plays one round like Game.start does, records it in result and returns the net for the round. """
+        shoe = self.__shoe
+        player = self.__player
+        dealer = self.__dealer
+        true_count = shoe.get_true_count()
+        bet = self.__bet * self.__bet_size(true_count)
+        player.place_bet(bet)
+        player_hand = Hand(shoe.deal_card(), shoe.deal_card(), bet)
+        dealer_hand = Hand(shoe.deal_card(), shoe.deal_card())
+        player.add_hand(player_hand)
+        dealer.add_hand(dealer_hand)
+        net = 0
+
+        # ---- Insurance Scenario ----
+        upcard = dealer_hand.get_first_card_value()
+        if (upcard == 10 or upcard == 1) and self.__insurance(upcard):
+            side_bet = round(0.5 * bet)
+            result.insurance_taken += 1
+            if dealer.has_blackjack(dealer_hand):
+                result.insurance_won += 1
+                net = self.__settle(result) + 2 * side_bet
+                return self.__end_round(result, net, bet, true_count)
+            net = -1 * side_bet
+
+        # ---- Main Event ----
+        strategy = self.__strategy
+        while not player.all_hands_standing():
+            for hand in player.get_hands():
+                if hand.get_stand_state():
+                    continue
+                if hand.resolve_score() == 21:
+                    hand.set_stand_state(True)
+                    continue
+                action = strategy(hand, upcard)
+                if action != "hit" and action != "stand":
+                    action = self.__allowed(action, hand)
+                if action == "hit":
+                    hand.add_card(shoe.deal_card())
+                    if hand.resolve_score() == 0:
+                        hand.set_stand_state(True)
+                elif action == "stand":
+                    hand.set_stand_state(True)
+                elif action == "double down":
+                    hand.set_bet(hand.get_bet() * 2)
+                    hand.add_card(shoe.deal_card())
+                    hand.set_stand_state(True)
+                elif action == "split":
+                    cards = hand.get_cards()
+                    player.add_hand(Hand(cards[0], shoe.deal_card(), hand.get_bet(), split=True))
+                    player.add_hand(Hand(cards[1], shoe.deal_card(), hand.get_bet(), split=True))
+                    player.remove_hand(hand)
+                    break
+                else:
+                    hand.surrender()
+        net += self.__settle(result)
+        return self.__end_round(result, net, bet, true_count)
+
+    def __allowed(self, action, hand):
+        """ The action itself if the rules allow it for this hand, or what a basic strategy chart does instead. """
+        if action in self.__rules.get_actions(hand, len(self.__player.get_hands())):
+            return action
+        if action == "split":
+            cards = hand.get_cards()
+            if len(cards) != 2 or cards[0].get_face_value() != cards[1].get_face_value():
+                raise ValueError('Strategy tried to split a hand that is not a pair')
+        elif action == "double down":
+            # Double if allowed, otherwise hit (or stand on a soft 18 and up)
+            return "hit" if hand.resolve_score() < 18 else "stand"
+        elif action != "surrender":
+            raise ValueError(f'Strategy returned an invalid action: {action}')
+        # A pair past the resplit limit, or no surrender here
+        return "hit" if hand.resolve_score() < 17 else "stand"
+
+    def __settle(self, result):
+        """ Same settlement as Game.stand, without the printing, and looked up in the rules' tables. """
+        rules = self.__rules
+        dealer_hits = rules.dealer_hits_by_state
+        outcome_table = rules.outcome_table
+        payouts = rules.payouts
+        player = self.__player
+        dealer = self.__dealer
+        dealers_hand = dealer.get_hands()[0]
+        dealer_blackjack = dealer.has_blackjack(dealers_hand)
+        net = 0
+        for hand in player.get_hands():
+            if hand.is_surrendered():
+                # Late surrender loses the whole bet to a dealer blackjack
+                outcome = OUTCOME.LOSE_BY_BLACKJACK if dealer_blackjack else OUTCOME.SURRENDER
+            else:
+                best_score = hand.resolve_score()
+                # If player's hand is busted or the dealer has to stand, the dealer does not play any further.
+                if best_score != 0:
+                    while dealer_hits[dealers_hand.get_state()]:
+                        dealers_hand.add_card(self.__shoe.deal_card())
+                outcome = outcome_table[settle_key(best_score, player.has_blackjack(hand)) * 23
+                                        + settle_key(dealers_hand.resolve_score(), dealer_blackjack)]
+            result.outcomes[outcome] += 1
+            net += round(hand.get_bet() * payouts[outcome.value])
+        return net
+
+    def __end_round(self, result, net, bet, true_count):
+        self.__player.clear_hands()
+        self.__dealer.clear_hands()
+        result.rounds += 1
+        result.net += net
+        result.stats.push(net)
+        result.add_true_count_round(true_count, net / bet)
+        return net
+
+    def run(self, number_of_rounds):
+        result = SimulationResult(self.__bet)
+        shoe = self.__shoe
+        play_round = self.play_round
+        start = time.perf_counter()
+        for _ in range(number_of_rounds):
+            # Shuffle between rounds, once the cut card came out
+            if shoe.cut_card_reached():
+                shoe.new_shoe()
+            play_round(result)
+        result.seconds = time.perf_counter() - start
+        return result
+
+    def run_shoes(self, number_of_shoes, histogram_bin=10):
+        """ Plays every shoe from a fresh shuffle until the cut card comes out. """
+        result = SimulationResult(self.__bet, histogram_bin)
+        shoe = self.__shoe
+        play_round = self.play_round
+        start = time.perf_counter()
+        for _ in range(number_of_shoes):
+            shoe.new_shoe()
+            shoe_net = 0
+            while not shoe.cut_card_reached():
+                shoe_net += play_round(result)
+            result.add_shoe(shoe_net)
+        result.seconds = time.perf_counter() - start
+        return result
+
+
+# ----------------------------------
+# PARALLEL RUNNER
+# ----------------------------------
+def shard_rng(seed, shard):
+    """ Independent, reproducible random stream for one shard of a parallel run. """
+    return random.Random(f'{seed}/{shard}')
+
+
+def _run_shard(args):
+    (shard, number_of_shoes, seed, strategy, insurance, number_of_decks, bet, penetration, histogram_bin,
+     counting_system, bet_size, rules) = args
+    simulator = Simulator(strategy, number_of_decks, bet, insurance, shard_rng(seed, shard), penetration,
+                          counting_system, bet_size, rules=rules)
+    return simulator.run_shoes(number_of_shoes, histogram_bin)
+
+
+def run_parallel(number_of_shoes, strategy=mimic_dealer_strategy, insurance=never_insure, number_of_decks=3,
+                 bet=10, seed=0, workers=None, shoes_per_shard=1000, penetration=0.75, histogram_bin=10,
+                 counting_system=HI_LO, bet_size=flat_bet, rules=HOUSE_RULES):
+    """
+    Shards number_of_shoes across a process pool and merges the per-shard results.
+    Shards are a fixed number of shoes, each seeded from (seed, shard index), so the merged
+    result is the same no matter how many workers run them.
+    strategy, insurance and bet_size must be picklable, i.e. module level functions.
+    :return: The merged SimulationResult, with seconds set to the wall time of the whole run
+    """
+    shards = []
+    for shard, first_shoe in enumerate(range(0, number_of_shoes, shoes_per_shard)):
+        shoes = min(shoes_per_shard, number_of_shoes - first_shoe)
+        shards.append((shard, shoes, seed, strategy, insurance, number_of_decks, bet, penetration, histogram_bin,
+                       counting_system, bet_size, rules))
+    start = time.perf_counter()
+    result = SimulationResult(bet, histogram_bin)
+    with Pool(workers or cpu_count()) as pool:
+        for shard_result in pool.imap(_run_shard, shards):
+            result.merge(shard_result)
+    result.seconds = time.perf_counter() - start
+    return result
+
+
+def compare_rules(rules_list, number_of_shoes, number_of_decks=3, seed=0, shoes_per_shard=250):
+    """
+    Plays the basic strategy of every Rules on the same seeded shoes and prints the EV of each, and how far
+    it is from the first. The shared seeds keep the shuffles alike, so the differences are less noisy.
+    :return: Dict of Rules name to SimulationResult
+    """
+    results = {}
+    for rules in rules_list:
+        strategy = StrategyTables.load_or_build(number_of_decks, rules=rules)
+        results[rules.name] = run_parallel(number_of_shoes, strategy, number_of_decks=number_of_decks, seed=seed,
+                                           shoes_per_shard=shoes_per_shard, rules=rules)
+    baseline = results[rules_list[0].name].get_ev()
+    for rules in rules_list:
+        result = results[rules.name]
+        error = math.sqrt(result.get_variance() / result.rounds)
+        print(f'{rules}\n\tEV {result.get_ev():+.2%} +/- {error:.2%} per round, '
+              f'{result.get_ev() - baseline:+.2%} against {rules_list[0].name}')
+    return results
+
+
+# ----------------------------------
+# VECTORIZED RUNNER
+# ----------------------------------
+def run_threshold(number_of_rounds, stand_on=17, soft_stand_on=None, number_of_decks=3, bet=10, seed=0,
+                  rules=HOUSE_RULES, batch_size=1 << 18):
+    """
+    Plays a policy that hits below stand_on (soft_stand_on for soft hands) with evaluate_batch, batch_size rounds
+    at a time; stand_on=17 plays mimic_dealer_strategy. Every round is dealt from its own place in freshly
+    shuffled shoes, so the result has no true counts, shoes or insurance, and no hand doubles or splits.
+    :return: SimulationResult of the rounds, with seconds set to the time taken, dealing included
+    """
+    result = SimulationResult(bet)
+    rng = np.random.default_rng(seed)
+    start = time.perf_counter()
+    for first in range(0, number_of_rounds, batch_size):
+        player_codes, dealer_codes = deal_batch(min(batch_size, number_of_rounds - first), number_of_decks, rng)
+        nets, outcomes = evaluate_batch(player_codes, dealer_codes, stand_on, soft_stand_on, bet, rules)
+        counts = np.bincount(outcomes, minlength=len(rules.payouts))
+        for outcome in OUTCOME:
+            result.outcomes[outcome] += int(counts[outcome.value])
+        batch = RunningStats()
+        batch.count = nets.size
+        batch.mean = float(nets.mean())
+        batch.m2 = float(np.square(nets - batch.mean).sum())
+        result.stats.merge(batch)
+        result.rounds += nets.size
+        result.net += int(nets.sum())
+    result.seconds = time.perf_counter() - start
+    return result
+
+
+# ----------------------------------
+# DRIVER FUNCTION
+# ----------------------------------
+def main():
+    for strategy in (mimic_dealer_strategy, never_bust_strategy):
+        print(f'Strategy: {strategy.__name__}')
+        print(Simulator(strategy).run(200000).summary())
+        print()
+    print('Strategy: mimic_dealer_strategy, vectorized')
+    print(run_threshold(2000000).summary())
+    print()
+    print(f'Parallel run on {cpu_count()} cores:')
+    print(run_parallel(2000, shoes_per_shard=100).summary())
+    print()
+    print('Basic strategy, Hi-Lo count, betting 1 to 8:')
+    print(run_parallel(5000, StrategyTables.load_or_build(3), shoes_per_shard=250, bet_size=spread_1_to_8).summary())
+    print()
+    print('Basic strategy under different rules, flat bets:')
+    compare_rules((HOUSE_RULES, VEGAS_STRIP_RULES, DOWNTOWN_RULES, SIX_FIVE_RULES), 5000)
+
+
+if __name__ == "__main__":
+    # execute only if run as a script
+    main()
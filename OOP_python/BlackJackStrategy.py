@@ -0,0 +1,304 @@
+import hashlib
+import json
+import os
+import tempfile
+import time
+from functools import lru_cache
+
+from BlackJackGame import HOUSE_RULES
+
+"""
+Title: Probability tables for the on-Terminal Blackjack game.
+Exact dealer outcome probabilities for a given shoe composition, and the best
+hit/stand/double down/split/surrender decision built on them, under the Rules of Game:
+the dealer standing on or hitting soft 17, and surrender if the rules allow it.
+
+"""
+
+# ----------------------------------
+# STATIC FUNCTIONS & VARIABLES
+# ----------------------------------
+# A composition counts the cards left in the shoe by game value: index 0 is Aces, index 9 is all 10s.
+# Dealer outcomes are indexed as below: 0 for bust, then 17 to 21, then blackjack.
+DEALER_OUTCOMES = (0, 17, 18, 19, 20, 21, 'blackjack')
+BUST, BLACKJACK = 0, 6
+ACTIONS = ("hit", "stand", "double down", "split", "surrender")
+# Bumped whenever what the tables hold changes, so caches of older tables are not used.
+CACHE_VERSION = 2
+
+
+def cache_directory():
+    # Per-user cache directory, only readable by its owner: $XDG_CACHE_HOME/blackjack or ~/.cache/blackjack
+    root = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    directory = os.path.join(root, "blackjack")
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    return directory
+
+
+def shoe_composition(number_of_decks):
+    return (4 * number_of_decks,) * 9 + (16 * number_of_decks,)
+
+
+def remove_card(composition, value):
+    counts = list(composition)
+    counts[value - 1] -= 1
+    return tuple(counts)
+
+
+def resolve(hard_total, has_ace):
+    # Same as Hand.resolve_score, for a hand summarized as (hard total, holds an Ace).
+    if hard_total > 21:
+        return 0
+    elif has_ace and hard_total <= 11:
+        return hard_total + 10
+    return hard_total
+
+
+def dealer_distribution(composition, upcard, hits_soft_17=False):
+    """
+    Exact probabilities of the dealer's final outcome.
+    :param composition: Cards the dealer draws from, with the upcard already removed
+    :param upcard: Game value of the dealer's face-up card
+    :param hits_soft_17: True if the dealer draws on a soft 17 (H17)
+    :return: Tuple of probabilities, indexed like DEALER_OUTCOMES
+    """
+    return _dealer_from(composition, upcard, upcard == 1, 1, hits_soft_17)
+
+
+@lru_cache(maxsize=None)
+def _dealer_from(composition, hard_total, has_ace, number_of_cards, hits_soft_17):
+    score = resolve(hard_total, has_ace)
+    outcome = [0.0] * len(DEALER_OUTCOMES)
+    if score == 21 and number_of_cards == 2:
+        outcome[BLACKJACK] = 1.0
+        return tuple(outcome)
+    elif score == 0:
+        outcome[BUST] = 1.0
+        return tuple(outcome)
+    elif score > 17 or (score == 17 and not (hits_soft_17 and has_ace and hard_total == 7)):
+        outcome[score - 16] = 1.0
+        return tuple(outcome)
+    cards_left = sum(composition)
+    for value in range(1, 11):
+        count = composition[value - 1]
+        if count == 0:
+            continue
+        after = _dealer_from(remove_card(composition, value), hard_total + value,
+                             has_ace or value == 1, number_of_cards + 1, hits_soft_17)
+        weight = count / cards_left
+        for i in range(len(outcome)):
+            outcome[i] += weight * after[i]
+    return tuple(outcome)
+
+
+def stand_ev(score, dealer):
+    """ EV per unit bet of standing on score (0 is bust, never a blackjack) against a dealer distribution. """
+    if score == 0:
+        return -1.0
+    ev = dealer[BUST] - dealer[BLACKJACK]
+    for i in range(1, 6):
+        dealer_score = DEALER_OUTCOMES[i]
+        if score > dealer_score:
+            ev += dealer[i]
+        elif score < dealer_score:
+            ev -= dealer[i]
+    return ev
+
+
+# ----------------------------------
+# CLASSES
+# ----------------------------------
+class StrategyTables:
+    """
+    Dealer outcome and decision tables for one shoe composition, filled once so a player can look
+    a decision up in O(1).
+    Player draws are taken from the full composition, and split hands are played out as two
+    independent hands that may hit, stand or double, which is the usual basic strategy approximation.
+    Of the Rules, only soft 17 and surrender change the tables; the Simulator handles the rest.
+    """
+    def __init__(self, composition, rules=HOUSE_RULES):
+        self.composition = tuple(composition)
+        self.hits_soft_17 = rules.dealer_hits_soft_17
+        self.surrender = rules.surrender
+        self.dealer = {}
+        # Keys are ('hard', total, upcard), ('soft', total, upcard) and ('pair', value, upcard).
+        self.two_card_actions = {}
+        # Best of just hit and stand, for hands of three or more cards.
+        self.hit_or_stand = {}
+        self.evs = {}
+        self.build()
+
+    @classmethod
+    def for_decks(cls, number_of_decks, rules=HOUSE_RULES):
+        return cls(shoe_composition(number_of_decks), rules)
+
+    @staticmethod
+    def cache_key(composition, rules):
+        # Everything the tables depend on, and the version of the code that built them
+        return {"version": CACHE_VERSION, "composition": list(composition),
+                "hits_soft_17": rules.dealer_hits_soft_17, "surrender": rules.surrender}
+
+    @classmethod
+    def load_or_build(cls, number_of_decks, path=None, rules=HOUSE_RULES):
+        """
+        Load the tables from a JSON disk cache, building and saving them the first time.
+        The cache lives in cache_directory() under a name hashed from cache_key, and a file whose key
+        doesn't match (older code, other rules, or not a cache at all) gets rebuilt instead of used.
+        """
+        composition = shoe_composition(number_of_decks)
+        key = cls.cache_key(composition, rules)
+        if path is None:
+            digest = hashlib.sha256(json.dumps(key, sort_keys=True).encode()).hexdigest()[:16]
+            path = os.path.join(cache_directory(), f'strategy_v{CACHE_VERSION}_{digest}.json')
+        try:
+            with open(path) as cache:
+                data = json.load(cache)
+            if data["key"] == key:
+                return cls.from_json(data)
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+        tables = cls(composition, rules)
+        # Written next to the cache and renamed over it, so a reader never sees half a file
+        handle, temporary = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix='.tmp')
+        with os.fdopen(handle, 'w') as cache:
+            json.dump(tables.to_json(key), cache)
+        os.replace(temporary, path)
+        return tables
+
+    def to_json(self, key):
+        # Tuple keys become lists: [kind, total, upcard, value]
+        return {
+            "key": key,
+            "dealer": [[upcard, list(outcomes)] for upcard, outcomes in self.dealer.items()],
+            "two_card_actions": [list(table_key) + [action] for table_key, action in self.two_card_actions.items()],
+            "hit_or_stand": [list(table_key) + [action] for table_key, action in self.hit_or_stand.items()],
+            "evs": [list(table_key) + [options] for table_key, options in self.evs.items()],
+        }
+
+    @classmethod
+    def from_json(cls, data):
+        tables = cls.__new__(cls)
+        key = data["key"]
+        tables.composition = tuple(key["composition"])
+        tables.hits_soft_17 = key["hits_soft_17"]
+        tables.surrender = key["surrender"]
+        tables.dealer = {upcard: tuple(outcomes) for upcard, outcomes in data["dealer"]}
+        tables.two_card_actions = {(kind, total, upcard): action
+                                   for kind, total, upcard, action in data["two_card_actions"]}
+        tables.hit_or_stand = {(kind, total, upcard): action for kind, total, upcard, action in data["hit_or_stand"]}
+        tables.evs = {(kind, total, upcard): options for kind, total, upcard, options in data["evs"]}
+        return tables
+
+    def build(self):
+        cards_left = sum(self.composition)
+        draw = [count / cards_left for count in self.composition]
+        for upcard in range(1, 11):
+            dealer = dealer_distribution(remove_card(self.composition, upcard), upcard, self.hits_soft_17)
+            self.dealer[upcard] = dealer
+            self.__build_for_upcard(upcard, dealer, draw)
+
+    def __build_for_upcard(self, upcard, dealer, draw):
+        stand = {}
+        best = {}
+
+        # Best EV of a hand that may still hit or stand, worked down from the highest totals.
+        def best_ev(hard_total, has_ace):
+            key = (hard_total, has_ace)
+            if key not in best:
+                score = resolve(hard_total, has_ace)
+                stand[key] = stand_ev(score, dealer)
+                if score == 0 or score == 21:
+                    # Bust hands are settled and 21 auto-stands.
+                    best[key] = stand[key]
+                else:
+                    best[key] = max(stand[key], hit_ev(hard_total, has_ace))
+            return best[key]
+
+        def hit_ev(hard_total, has_ace):
+            return sum(draw[value - 1] * best_ev(hard_total + value, has_ace or value == 1)
+                       for value in range(1, 11))
+
+        def double_ev(hard_total, has_ace):
+            return 2 * sum(draw[value - 1] * stand_ev(resolve(hard_total + value, has_ace or value == 1), dealer)
+                           for value in range(1, 11))
+
+        def decide(hard_total, has_ace, can_double, can_surrender=False):
+            options = {"stand": stand_ev(resolve(hard_total, has_ace), dealer), "hit": hit_ev(hard_total, has_ace)}
+            if can_double:
+                options["double down"] = double_ev(hard_total, has_ace)
+            if can_surrender:
+                # Late surrender: half the bet back, but all of it lost to a dealer blackjack
+                options["surrender"] = -0.5 * (1 - dealer[BLACKJACK]) - dealer[BLACKJACK]
+            action = max(options, key=options.get)
+            return action, options
+
+        for hard_total in range(4, 22):
+            key = ('hard', hard_total, upcard)
+            self.two_card_actions[key], self.evs[key] = decide(hard_total, False, True, self.surrender)
+            self.hit_or_stand[key] = decide(hard_total, False, False)[0]
+        for soft_total in range(12, 22):
+            key = ('soft', soft_total, upcard)
+            self.two_card_actions[key], self.evs[key] = decide(soft_total - 10, True, True, self.surrender)
+            self.hit_or_stand[key] = decide(soft_total - 10, True, False)[0]
+        for value in range(1, 11):
+            key = ('pair', value, upcard)
+            # One split hand: the pair card plus a fresh card, then played on with hit/stand/double.
+            split_ev = 0.0
+            for drawn in range(1, 11):
+                hard_total = value + drawn
+                has_ace = value == 1 or drawn == 1
+                if resolve(hard_total, has_ace) == 21:
+                    hand_ev = stand_ev(21, dealer)
+                else:
+                    hand_ev = max(decide(hard_total, has_ace, True)[1].values())
+                split_ev += draw[drawn - 1] * hand_ev
+            action, options = decide(2 * value, value == 1, True, self.surrender)
+            options["split"] = 2 * split_ev
+            if options["split"] > options[action]:
+                action = "split"
+            self.two_card_actions[key], self.evs[key] = action, options
+
+    def lookup(self, hand, dealer_upcard):
+        """ Best action for a Hand against the dealer's upcard, in the GameUI vocabulary. """
+        cards = hand.get_cards()
+        hard_total = hand.get_hard_total()
+        if hand.is_soft():
+            key = ('soft', hard_total + 10, dealer_upcard)
+        else:
+            key = ('hard', hard_total, dealer_upcard)
+        if len(cards) == 2:
+            if cards[0].get_face_value() == cards[1].get_face_value():
+                return self.two_card_actions[('pair', cards[0].get_game_value(), dealer_upcard)]
+            return self.two_card_actions[key]
+        return self.hit_or_stand[key]
+
+    # A StrategyTables can be used directly as a Simulator strategy
+    __call__ = lookup
+
+    def chart(self):
+        short = {"hit": "H", "stand": "S", "double down": "D", "split": "P", "surrender": "R"}
+        upcards = list(range(2, 11)) + [1]
+        lines = ['\t' + ' '.join('A' if upcard == 1 else str(upcard) for upcard in upcards)]
+        for kind, totals in (('hard', range(5, 21)), ('soft', range(13, 21)), ('pair', range(1, 11))):
+            for total in totals:
+                row = ' '.join(short[self.two_card_actions[(kind, total, upcard)]] for upcard in upcards)
+                lines.append(f'{kind} {total}\t{row}')
+        return '\n'.join(lines)
+
+
+# ----------------------------------
+# DRIVER FUNCTION
+# ----------------------------------
+def main():
+    start = time.perf_counter()
+    tables = StrategyTables.for_decks(3)
+    print(f'Built tables for 3 decks in {time.perf_counter() - start:.2f}s')
+    print(tables.chart())
+    print('Dealer outcomes (bust, 17, 18, 19, 20, 21, blackjack) by upcard:')
+    for upcard, outcome in tables.dealer.items():
+        print(f'\t{upcard}: ' + ' '.join(f'{p:.3f}' for p in outcome))
+
+
+if __name__ == "__main__":
+    # execute only if run as a script
+    main()
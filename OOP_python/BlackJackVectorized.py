@@ -0,0 +1,201 @@
+import time
+
+import numpy as np
+
+from BlackJackGame import (Hand, Player, Dealer, OUTCOME, CARDS_BY_CODE, GAME_VALUE_TABLE, HOUSE_RULES,
+                           DOWNTOWN_RULES, SIX_FIVE_RULES, settle_hand)
+
+"""
+Title: NumPy evaluator that plays a whole batch of independent blackjack hands at once.
+Every hand gets its own row of cards, the player and dealer draw as table lookups on
+just the rows still drawing, and the batch is settled with the payouts of Game.stand.
+Only hit/stand threshold policies are vectorized; splits and doubles stay in the Simulator.
+
+"""
+
+# ----------------------------------
+# STATIC FUNCTIONS & VARIABLES
+# ----------------------------------
+GAME_VALUES = np.frombuffer(GAME_VALUE_TABLE, dtype=np.uint8)[:52]
+# Enough card slots per hand for any hit/stand policy: eleven cards always reach 21 or bust.
+MAX_CARDS = 12
+
+# A hand is summarized as one small int, state = 2 * hard_total + holds_an_ace, so drawing a card is
+# a single lookup in NEXT_STATE[state * 52 + code], and scoring and settling are lookups too.
+# Every bust total shares the state of 22, and a two-card 21 gets a state of its own.
+NUMBER_OF_STATES = 64
+BLACKJACK_STATE = NUMBER_OF_STATES - 1
+
+
+def resolve_score(state):
+    # Hand.resolve_score for a state: best total of 21 or less, 0 if bust.
+    if state == BLACKJACK_STATE:
+        return 21
+    hard_total, has_ace = state // 2, state % 2
+    if hard_total > 21:
+        return 0
+    elif has_ace and hard_total <= 11:
+        return hard_total + 10
+    return hard_total
+
+
+def _next_state(state, code):
+    value = int(GAME_VALUES[code])
+    return 2 * min(state // 2 + value, 22) | (state % 2) | (value == 1)
+
+
+NEXT_STATE = np.array([_next_state(state, code) for state in range(NUMBER_OF_STATES) for code in range(52)],
+                      dtype=np.uint8)
+SCORES = np.array([resolve_score(state) for state in range(NUMBER_OF_STATES)], dtype=np.uint8)
+TWO_CARD_STATE = np.array([BLACKJACK_STATE if resolve_score(_next_state(_next_state(0, first), second)) == 21
+                           else _next_state(_next_state(0, first), second)
+                           for first in range(52) for second in range(52)], dtype=np.uint8)
+# OUTCOME value of every (player state, dealer state) pair, straight from settle_hand
+OUTCOMES_BY_STATES = np.array([settle_hand(SCORES[player], SCORES[dealer], player == BLACKJACK_STATE,
+                                           dealer == BLACKJACK_STATE, 1)[0].value
+                               for player in range(NUMBER_OF_STATES) for dealer in range(NUMBER_OF_STATES)],
+                              dtype=np.uint8)
+
+
+def hit_table(stand_on, soft_stand_on):
+    # For every state, True if a policy that stands on stand_on (soft_stand_on for soft hands) draws.
+    return np.array([state != BLACKJACK_STATE and
+                     0 < SCORES[state] < (soft_stand_on if state % 2 and state // 2 <= 11 else stand_on)
+                     for state in range(NUMBER_OF_STATES)])
+
+
+def deal_batch(number_of_hands, number_of_decks=3, rng=None):
+    """
+    Deals number_of_hands rounds from freshly shuffled shoes.
+    :return: Tuple of (player codes, dealer codes), each an array of shape (number_of_hands, MAX_CARDS),
+        where row i holds every card hand i could draw, in dealing order
+    """
+    if rng is None:
+        rng = np.random.default_rng()
+    shoe_size = 52 * number_of_decks
+    cards_needed = number_of_hands * 2 * MAX_CARDS
+    number_of_shoes = -(-cards_needed // shoe_size)
+    shoes = np.tile(np.arange(52, dtype=np.uint8), (number_of_shoes, number_of_decks))
+    cards = rng.permuted(shoes, axis=1).ravel()[:cards_needed].reshape(number_of_hands, 2 * MAX_CARDS)
+    return cards[:, :MAX_CARDS], cards[:, MAX_CARDS:]
+
+
+def _state_index(states, codes):
+    # Flat index into a (state, code) table; uint16 is wide enough and much cheaper than intp
+    index = states.astype(np.uint16)
+    index *= 52
+    index += codes
+    return index
+
+
+def _play_out(codes, hits, hit_mask=None):
+    """
+    Draws from the rows of codes while the hits table says so.
+    Only the rows still drawing are touched, so each extra card slot costs less than the last.
+    :return: Array of final hand states
+    """
+    states = TWO_CARD_STATE.take(_state_index(codes[:, 0], codes[:, 1]))
+    hitting = hits.take(states)
+    if hit_mask is not None:
+        hitting &= hit_mask
+    rows = np.flatnonzero(hitting)
+    for slot in range(2, MAX_CARDS):
+        if rows.size == 0:
+            break
+        row_states = NEXT_STATE.take(_state_index(states.take(rows), codes[:, slot].take(rows)))
+        states[rows] = row_states
+        rows = rows[hits.take(row_states)]
+    if rows.size != 0:
+        raise ValueError('A hand ran out of card slots, check the stand thresholds')
+    return states
+
+
+def evaluate_batch(player_codes, dealer_codes, stand_on=17, soft_stand_on=None, bet=10, rules=HOUSE_RULES):
+    """
+    Plays and settles every row as one round of Game: the player hits below stand_on
+    (soft_stand_on for soft hands), then the dealer draws by the rules unless the player went bust.
+    :return: Tuple of (net result per hand, OUTCOME value per hand)
+    """
+    if soft_stand_on is None:
+        soft_stand_on = stand_on
+    player_states = _play_out(player_codes, hit_table(stand_on, soft_stand_on))
+    # Rules.dealer_hits_by_state uses the same states; blackjack sits past every real total, so it stands.
+    dealer_states = _play_out(dealer_codes, np.array(rules.dealer_hits_by_state), SCORES.take(player_states) > 0)
+    index = player_states.astype(np.uint16)
+    index *= NUMBER_OF_STATES
+    index += dealer_states
+    outcomes = OUTCOMES_BY_STATES.take(index)
+    # The net that Game.stand pays for each outcome
+    payouts = np.array([round(bet * payout) for payout in rules.payouts], dtype=np.int64)
+    return payouts.take(outcomes), outcomes
+
+
+# ----------------------------------
+# SCALAR REFERENCE
+# ----------------------------------
+def play_scalar(player_codes, dealer_codes, stand_on=17, soft_stand_on=None, bet=10, rules=HOUSE_RULES):
+    """ The same round as one row of evaluate_batch, played with Hand, Player/Dealer and settle_hand. """
+    if soft_stand_on is None:
+        soft_stand_on = stand_on
+    player = Player()
+    dealer = Dealer()
+    player_hand = Hand(CARDS_BY_CODE[player_codes[0]], CARDS_BY_CODE[player_codes[1]])
+    dealer_hand = Hand(CARDS_BY_CODE[dealer_codes[0]], CARDS_BY_CODE[dealer_codes[1]])
+    player.add_hand(player_hand)
+    dealer.add_hand(dealer_hand)
+    slot = 2
+    while 0 < player_hand.resolve_score() < (soft_stand_on if player_hand.is_soft() else stand_on):
+        player_hand.add_card(CARDS_BY_CODE[player_codes[slot]])
+        slot += 1
+    best_score = player_hand.resolve_score()
+    slot = 2
+    if best_score != 0:
+        while rules.dealer_hits(dealer_hand):
+            dealer_hand.add_card(CARDS_BY_CODE[dealer_codes[slot]])
+            slot += 1
+    outcome, net = settle_hand(best_score, dealer_hand.resolve_score(), player.has_blackjack(player_hand),
+                               dealer.has_blackjack(dealer_hand), bet, rules.blackjack_payout)
+    return net, outcome
+
+
+def cross_check(number_of_hands=20000, seeds=(0, 1, 2), policies=((17, 17), (12, 18), (15, 19), (21, 21)),
+                rules_list=(HOUSE_RULES, DOWNTOWN_RULES, SIX_FIVE_RULES)):
+    """ Compares evaluate_batch with play_scalar hand by hand; returns the number of mismatches. """
+    mismatches = 0
+    for seed in seeds:
+        player_codes, dealer_codes = deal_batch(number_of_hands, rng=np.random.default_rng(seed))
+        for rules in rules_list:
+            for stand_on, soft_stand_on in policies:
+                nets, outcomes = evaluate_batch(player_codes, dealer_codes, stand_on, soft_stand_on, rules=rules)
+                for i in range(number_of_hands):
+                    net, outcome = play_scalar(player_codes[i].tolist(), dealer_codes[i].tolist(),
+                                               stand_on, soft_stand_on, rules=rules)
+                    if net != nets[i] or outcome.value != outcomes[i]:
+                        mismatches += 1
+    return mismatches
+
+
+# ----------------------------------
+# DRIVER FUNCTION
+# ----------------------------------
+def main():
+    print(f'Cross-check mismatches: {cross_check()}')
+    number_of_hands = 1000000
+    player_codes, dealer_codes = deal_batch(number_of_hands, rng=np.random.default_rng(0))
+    start = time.perf_counter()
+    nets, outcomes = evaluate_batch(player_codes, dealer_codes)
+    vector_seconds = time.perf_counter() - start
+    scalar_hands = 100000
+    player_rows, dealer_rows = player_codes[:scalar_hands].tolist(), dealer_codes[:scalar_hands].tolist()
+    start = time.perf_counter()
+    for i in range(scalar_hands):
+        play_scalar(player_rows[i], dealer_rows[i])
+    scalar_seconds = (time.perf_counter() - start) * number_of_hands / scalar_hands
+    print(f'{number_of_hands} hands: NumPy {vector_seconds:.3f}s, Hand loop {scalar_seconds:.2f}s '
+          f'(extrapolated), speedup {scalar_seconds / vector_seconds:.0f}x')
+    print(f'EV per round: {nets.mean() / 10:+.5f} bets')
+
+
+if __name__ == "__main__":
+    # execute only if run as a script
+    main()